@@ -77,6 +77,42 @@ st.markdown("""
 BASE_URL = os.environ.get("BACKEND_URL", "http://localhost:8000")
 GENERATE_DOCS_ENDPOINT = f"{BASE_URL}/walker/generate_docs"
 STATUS_ENDPOINT = f"{BASE_URL}/walker/get_status"
+DOWNLOAD_DOCS_ENDPOINT = f"{BASE_URL}/walker/download_docs"
+POLL_INTERVAL_SECONDS = 2
+
+# Pipeline stages reported by the orchestrator, with progress-bar positions
+STAGES = {
+    "queued": (0.02, "Queued", "Waiting for a free worker"),
+    "started": (0.05, "Initializing", "Setting up analysis environment"),
+    "clone": (0.1, "Cloning Repository", "Downloading repository files"),
+    "tree": (0.2, "Mapping Files", "Building the file tree"),
+    "parse": (0.25, "Analyzing Code Structure", "Parsing functions, classes, and relationships"),
+    "graph": (0.3, "Building Code Graph", "Resolving imports and relationships"),
+    "analysis": (0.35, "Generating AI Insights", "Using Google Gemini for intelligent analysis"),
+    "render": (0.9, "Creating Documentation", "Compiling professional markdown documentation"),
+    "summarize": (0.92, "Summarizing Repository", "Reducing file insights into package and repository summaries"),
+    "embed": (0.94, "Indexing Code", "Embedding summaries for code search"),
+    "save": (0.95, "Finalizing", "Saving documentation"),
+}
+
+
+def first_report(response):
+    """Return the first walker report from a Jac API response, or {}."""
+    response.raise_for_status()
+    reports = response.json().get("reports", [])
+    return reports[0] if reports else {}
+
+
+def show_stage(job, progress_bar, status_text):
+    """Render a job's current stage and per-file analysis counts."""
+    value, name, description = STAGES.get(job.get("stage"), (0.05, "Processing", "Working"))
+    counts = job.get("progress", {})
+    if job.get("stage") == "analysis" and counts.get("files_total"):
+        done, total = counts.get("files_done", 0), counts["files_total"]
+        value += (0.9 - value) * done / total
+        description = f"Analyzed {done} of {total} files"
+    progress_bar.progress(value)
+    status_text.markdown(f"**{name}**\n{description}")
 
 # Initialize session state
 if 'generated_docs' not in st.session_state:
@@ -163,57 +199,45 @@ with col1:
                 progress_bar = st.progress(0)
                 status_text = st.empty()
 
-            # Progress phases
-            phases = [
-                ("Initializing", 0.1, "Setting up analysis environment"),
-                ("Cloning Repository", 0.3, "Downloading repository files"),
-                ("Analyzing Code Structure", 0.5, "Parsing functions, classes, and relationships"),
-                ("Generating AI Insights", 0.7, "Using Google Gemini for intelligent analysis"),
-                ("Creating Documentation", 0.9, "Compiling professional markdown documentation"),
-                ("Finalizing", 1.0, "Preparing download")
-            ]
-
             try:
-                # Simulate progress through phases
-                for phase_name, progress_value, description in phases[:-1]:
-                    progress_bar.progress(progress_value)
-                    status_text.markdown(f"**{phase_name}**\n{description}")
-                    time.sleep(0.5)
-
-                # Make the actual API call
+                # Submit the job; the backend answers with a job id right away
                 payload = {"repo_url": repo_url, "session_id": ""}
-                progress_bar.progress(0.95)
-                status_text.markdown("**Processing with AI**\nThis may take 1-3 minutes for larger repositories.")
+                status_text.markdown("**Submitting**\nQueuing documentation job")
+                # Without a worker the backend runs synchronously, so allow a long wait
+                report = first_report(requests.post(GENERATE_DOCS_ENDPOINT, json=payload, timeout=300))
 
-                response = requests.post(GENERATE_DOCS_ENDPOINT, json=payload, timeout=300)
+                if report.get("job_id"):
+                    job = report
+                    while job.get("status") in ("queued", "running"):
+                        show_stage(job, progress_bar, status_text)
+                        time.sleep(POLL_INTERVAL_SECONDS)
+                        job = first_report(requests.post(STATUS_ENDPOINT, json={"job_id": report["job_id"]}, timeout=30))
+                    if job.get("status") == "succeeded":
+                        report = first_report(requests.post(DOWNLOAD_DOCS_ENDPOINT, json={"job_id": report["job_id"]}, timeout=60))
+                    else:
+                        report = {"status": "error", "docs": job.get("error", "Unknown error")}
 
                 # Complete progress
                 progress_bar.progress(1.0)
                 status_text.markdown("**Processing Complete**")
 
-                if response.status_code == 200:
-                    data = response.json()
-                    reports = data.get("reports", [])
-
-                    if reports:
-                        report = reports[0]
-                        if report.get("status") == "success":
-                            docs = report.get("docs", "")
-                            st.session_state.generated_docs = docs
-                            st.success("Documentation generated successfully!")
-
-                            # Show preview
-                            with st.expander("Preview Documentation", expanded=True):
-                                st.markdown(docs)
-                        else:
-                            st.error(f"Generation failed: {report.get('docs', 'Unknown error')}")
-                    else:
-                        st.error("No response received from server")
+                if report.get("status") == "success":
+                    docs = report.get("docs", "")
+                    st.session_state.generated_docs = docs
+                    st.success("Documentation generated successfully!")
+
+                    # Show preview
+                    with st.expander("Preview Documentation", expanded=True):
+                        st.markdown(docs)
+                elif report:
+                    st.error(f"Generation failed: {report.get('docs') or report.get('error', 'Unknown error')}")
                 else:
-                    st.error(f"Server error: {response.status_code} - {response.text}")
+                    st.error("No response received from server")
 
+            except requests.exceptions.HTTPError as e:
+                st.error(f"Server error: {e}")
             except requests.exceptions.Timeout:
-                st.warning("Processing is taking longer than expected. Large repositories can take up to 5 minutes. Please wait or try a smaller repository.")
+                st.warning("The server did not respond in time. Please try again.")
             except requests.exceptions.ConnectionError:
                 st.error("Cannot connect to backend server. Please ensure the backend is running.")
             except Exception as e:
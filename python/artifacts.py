@@ -0,0 +1,116 @@
+"""
+Run artifacts persisted under outputs/<repo>-<url digest>/.
+
+Instead of shipping the file tree, graph and markdown inline in the
+orchestrator's JSON response, each run writes them to disk and returns
+compact references (path, size, SHA-256) that callers read or stream on
+demand. The markdown is streamed straight to docs.md as it is rendered,
+optionally sharded into per-package pages under pages/.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import Callable, Optional
+
+from symbol_table import SymbolTable
+
+DOCS_FILE = 'docs.md'
+GRAPH_FILE = 'graph.json'
+TREE_FILE = 'tree.json'
+MANIFEST_FILE = 'manifest.json'
+PAGES_DIR = 'pages'
+# Held by a run while it writes the directory, so runs for one repository take turns
+LOCK_FILE = '.lock'
+
+
+def output_dir_for(repo_url: str, output_root: Optional[str] = None) -> str:
+    """Return the artifact directory for `repo_url` under OUTPUT_DIR (or outputs/).
+
+    The directory is named after the repository plus a digest of its URL, so
+    same-named repositories of different owners do not share one.
+    """
+    if output_root is None:
+        output_root = os.getenv(
+            "OUTPUT_DIR",
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'outputs'),
+        )
+    repo_name = re.sub(r'[^\w.-]', '_', repo_url.rstrip('/').split('/')[-1])
+    url_digest = hashlib.sha1(repo_url.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(os.path.normpath(output_root), f"{repo_name}-{url_digest}")
+
+
+def describe(path: str) -> dict:
+    """Return {path, size, sha256} for an artifact file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return {'path': path, 'size': os.path.getsize(path), 'sha256': digest.hexdigest()}
+
+
+def _write_atomic(path: str, write) -> dict:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with open(fd, 'w', encoding='utf-8') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return describe(path)
+
+
+def write_docs(output_dir: str, render: Callable, sharded: bool = False) -> dict:
+    """Stream docs.md into `output_dir` through `render(f, pages_dir)` and return its reference.
+
+    With `sharded`, `render` gets an emptied pages/ directory for per-package
+    pages (see repo_parser.write_markdown) and the reference lists them
+    under 'pages'; otherwise pages_dir is None and stale pages are removed.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    pages_dir = os.path.join(output_dir, PAGES_DIR)
+    shutil.rmtree(pages_dir, ignore_errors=True)
+    if sharded:
+        os.makedirs(pages_dir)
+    reference = _write_atomic(os.path.join(output_dir, DOCS_FILE),
+                              lambda f: render(f, pages_dir if sharded else None))
+    if sharded:
+        reference['pages'] = {'path': pages_dir, 'count': len(os.listdir(pages_dir))}
+    return reference
+
+
+def write_artifacts(output_dir: str, repo_url: str, docs, graph,
+                    tree, stats: Optional[dict] = None) -> dict:
+    """Write docs, graph, tree and an artifact manifest; return their references by name.
+
+    `docs` is the markdown or the reference write_docs returned for it.
+    `graph` is node-link data or a SymbolTable, which is streamed as node-link JSON.
+    """
+    write_graph = graph.write_json if isinstance(graph, SymbolTable) else lambda f: json.dump(graph, f)
+    os.makedirs(output_dir, exist_ok=True)
+    artifacts = {
+        'docs': docs if isinstance(docs, dict) else _write_atomic(os.path.join(output_dir, DOCS_FILE),
+                                                                  lambda f: f.write(docs)),
+        'graph': _write_atomic(os.path.join(output_dir, GRAPH_FILE), write_graph),
+        'tree': _write_atomic(os.path.join(output_dir, TREE_FILE), lambda f: json.dump(tree, f)),
+    }
+    manifest = {
+        'repo_url': repo_url,
+        'generated_at': time.time(),
+        'artifacts': {name: {'file': os.path.basename(info['path']), 'size': info['size'],
+                             'sha256': info['sha256'],
+                             **({'pages': info['pages']['count']} if 'pages' in info else {})}
+                      for name, info in artifacts.items()},
+        'stats': stats or {},
+    }
+    artifacts['manifest'] = _write_atomic(os.path.join(output_dir, MANIFEST_FILE),
+                                          lambda f: json.dump(manifest, f, indent=2))
+    return artifacts
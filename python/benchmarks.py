@@ -0,0 +1,1154 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Codebase Genius pipeline on synthetic repositories.
+
+Usage:
+    python python/benchmarks.py parse --files 20000 --workers 1,2,4,8
+    python python/benchmarks.py scan --files 2000 --vendored 20000
+    python python/benchmarks.py classify --files 2000 --noise 600
+    python python/benchmarks.py extract --files 2000
+    python python/benchmarks.py ast --files 2000 [--source /usr/lib/python3.11]
+    python python/benchmarks.py graph --files 5000 --legacy
+    python python/benchmarks.py symbols --files 5000 --methods 40
+    python python/benchmarks.py startup --requests 5
+    python python/benchmarks.py queue --jobs 60 --repos 10 --workers 4
+    python python/benchmarks.py payload --files 5000
+    python python/benchmarks.py render --files 10000 --packages 50
+    python python/benchmarks.py diagrams --files 1000,10000,50000
+    python python/benchmarks.py context --files 500 --budget 500
+    python python/benchmarks.py vectors --vectors 100000 --dim 768
+    python python/benchmarks.py budget --files 400 --seconds 5
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+PY_TEMPLATE = '''import os
+from pkg{dep}.module{dep_file} import Helper{dep_file}
+
+class Service{index}(object):
+    """Synthetic service {index}."""
+
+    def __init__(self, name):
+        self.name = name
+
+{methods}
+def helper_{index}(value):
+    return value * {index}
+'''
+
+METHOD_TEMPLATE = '''    def method_{n}(self, arg):
+        # Compute something for method {n}
+        result = [x * {n} for x in range(arg)]
+        return sum(result)
+
+'''
+
+JS_TEMPLATE = '''import {{ util{dep_file} }} from './module{dep_file}';
+
+class Widget{index} {{
+  render() {{ return util{dep_file}(); }}
+}}
+
+function build{index}(options) {{
+  return new Widget{index}(options);
+}}
+
+const handler{index} = (event) => event.target;
+'''
+
+JAVA_TEMPLATE = '''package pkg{dep};
+
+import java.util.List;
+import java.util.Map;
+
+public class Service{index} extends Base{dep_file} {{
+    private final Map<String, Integer> cache;
+
+    public Service{index}(Map<String, Integer> cache) {{
+        this.cache = cache;
+    }}
+
+    public int compute(int value) {{
+        if (value > 0) {{
+            return helper(value) * 2;
+        }}
+        return 0;
+    }}
+
+    private static int helper(int x) {{
+        return x + {index};
+    }}
+}}
+'''
+
+
+def make_synthetic_repo(root: str, num_files: int, packages: int = 50,
+                        methods_per_class: int = 20, seed: int = 0) -> str:
+    """Write a synthetic mixed Python/JavaScript/Java tree of `num_files` files under `root`."""
+    rng = random.Random(seed)
+    for index in range(num_files):
+        package = index % packages
+        directory = os.path.join(root, f"pkg{package}")
+        os.makedirs(directory, exist_ok=True)
+        dep_file = rng.randrange(num_files)
+        dep = dep_file % packages
+        if index % 4 == 3:
+            path = os.path.join(directory, f"module{index}.js")
+            content = JS_TEMPLATE.format(index=index, dep_file=dep_file)
+        elif index % 8 == 2:
+            path = os.path.join(directory, f"Service{index}.java")
+            content = JAVA_TEMPLATE.format(index=index, dep=dep, dep_file=dep_file)
+        else:
+            path = os.path.join(directory, f"module{index}.py")
+            methods = ''.join(METHOD_TEMPLATE.format(n=n) for n in range(methods_per_class))
+            content = PY_TEMPLATE.format(index=index, dep=dep, dep_file=dep_file, methods=methods)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+    return root
+
+
+def legacy_extract_symbols(file: str, code: str) -> tuple:
+    """The original multi-pass regex extraction, kept as a benchmark baseline."""
+    if file.endswith('.py'):
+        functions = re.findall(r'def\s+(\w+)\s*\(', code)
+        classes = re.findall(r'class\s+(\w+)\s*[:\(]', code)
+        imports = re.findall(r'^(?:from\s+[\w.]+\s+import|import\s+[\w.]+)', code, re.MULTILINE)
+    elif file.endswith(('.js', '.ts', '.jsx', '.tsx')):
+        functions = re.findall(r'(?:function\s+(\w+)|const\s+(\w+)\s*=\s*(?:\([^)]*\)\s*=>|function))', code)
+        functions = [f[0] if f[0] else f[1] for f in functions if f[0] or f[1]]
+        classes = re.findall(r'class\s+(\w+)', code)
+        imports = re.findall(r'^(?:import\s+.*?\s+from\s+[\'"]([^\'"]+)[\'"]|const\s+\w+\s*=\s*require\([^)]+\))', code, re.MULTILINE)
+    elif file.endswith('.java'):
+        functions = re.findall(r'(?:public|private|protected)?\s*(?:static\s+)?(?:\w+\s+)+\s+(\w+)\s*\(', code)
+        classes = re.findall(r'class\s+(\w+)', code)
+        imports = re.findall(r'^import\s+[^;]+;', code, re.MULTILINE)
+    else:
+        functions = re.findall(r'(?:function|def|func)\s+(\w+)\s*\(', code)
+        classes = re.findall(r'class\s+(\w+)', code)
+        imports = []
+    return functions, classes, imports
+
+
+def timed(fn, *args, **kwargs) -> tuple:
+    """Run `fn` and return (result, elapsed seconds)."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def bench_parse(args) -> dict:
+    """Measure parse_code wall time from 1 to N worker processes."""
+    from repo_parser import parse_code
+
+    root = tempfile.mkdtemp(prefix="cg-bench-")
+    try:
+        make_synthetic_repo(root, args.files)
+        size_mb = sum(os.path.getsize(os.path.join(d, f))
+                      for d, _, files in os.walk(root) for f in files) / (1024 * 1024)
+        results = []
+        baseline = None
+        for workers in [int(w) for w in args.workers.split(',')]:
+            context, elapsed = timed(parse_code, root, workers=workers)
+            baseline = baseline or elapsed
+            results.append({
+                'workers': workers,
+                'seconds': round(elapsed, 3),
+                'speedup': round(baseline / elapsed, 2),
+                'files': len(context),
+            })
+        return {'benchmark': 'parse', 'files': args.files, 'size_mb': round(size_mb, 1), 'results': results}
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def legacy_scan_and_parse(repo_path: str) -> tuple:
+    """The original two walks: the tree with excludes, then every supported file parsed."""
+    from extractors import get_extractor
+    from repo_parser import _parse_file
+
+    tree = {}
+    exclude = {'.git', 'node_modules', '__pycache__', '.env', 'venv', '.vscode', '.idea', 'dist', 'build'}
+    for root, dirs, files in os.walk(repo_path):
+        dirs[:] = [d for d in dirs if d not in exclude]
+        rel_root = os.path.relpath(root, repo_path)
+        tree['' if rel_root == '.' else rel_root] = files
+    context = {}
+    for root, _, files in os.walk(repo_path):
+        for file in files:
+            if get_extractor(file) is not None:
+                filepath = os.path.join(root, file)
+                rel_path, entry = _parse_file((filepath, os.path.relpath(filepath, repo_path), None,
+                                               os.path.getsize(filepath), None, None))
+                if entry is not None:
+                    context[rel_path] = entry
+    return tree, context
+
+
+def bench_scan(args) -> dict:
+    """Compare two walks (the parser's without excludes) with one shared RepoScanner pass.
+
+    The synthetic repository gets a vendored node_modules of --vendored
+    JavaScript files, which only the legacy parser walk descends into.
+    """
+    from repo_parser import generate_file_tree, parse_code
+    from scanner import RepoScanner
+
+    root = tempfile.mkdtemp(prefix="cg-bench-")
+    try:
+        make_synthetic_repo(root, args.files)
+        for index in range(args.vendored):
+            directory = os.path.join(root, 'node_modules', f"dep{index % 200}", 'lib')
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, f"index{index}.js"), 'w', encoding='utf-8') as f:
+                f.write(JS_TEMPLATE.format(index=index, dep_file=index) * 20)
+
+        (legacy_tree, legacy_context), legacy_seconds = timed(legacy_scan_and_parse, root)
+
+        def shared():
+            scan = RepoScanner.from_env().scan(root)
+            return scan, generate_file_tree(root, scan), parse_code(root, scan=scan, workers=1)
+
+        (scan, tree, context), seconds = timed(shared)
+        return {
+            'benchmark': 'scan',
+            'files': args.files,
+            'vendored_files': args.vendored,
+            'legacy_parsed_files': len(legacy_context),
+            'parsed_files': len(context),
+            # The scanner lists names sorted; os.walk in directory order
+            'same_tree': {d: sorted(names) for d, names in legacy_tree.items()} == tree,
+            'legacy_seconds': round(legacy_seconds, 3),
+            'seconds': round(seconds, 3),
+            'speedup': round(legacy_seconds / seconds, 2),
+            'scan': scan.stats(),
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_classify(args) -> dict:
+    """Parse time and analysis prompts with and without generated/minified/vendored detection.
+
+    The synthetic repository gets --noise files split between minified
+    bundles, protobuf stubs and a vendor/ directory.
+    """
+    from file_classifier import FileClassifier
+    from repo_parser import parse_code
+    from scanner import RepoScanner
+
+    root = tempfile.mkdtemp(prefix="cg-bench-")
+    try:
+        make_synthetic_repo(root, args.files)
+        bundle = '/*! bundle */\n' + JS_TEMPLATE.format(index=0, dep_file=0).replace('\n', ' ') * 1000
+        for index in range(args.noise):
+            package = os.path.join(root, f"pkg{index % 50}")
+            if index % 3 == 0:
+                path, content = os.path.join(package, f"chunk{index}.js"), bundle
+            elif index % 3 == 1:
+                path = os.path.join(package, f"api{index}_pb2.py")
+                content = ('# Generated by the protocol buffer compiler.  DO NOT EDIT!\n'
+                           + PY_TEMPLATE.format(index=index, dep=0, dep_file=0, methods=''))
+            else:
+                path = os.path.join(root, 'vendor', f"lib{index % 20}", f"mod{index}.py")
+                content = PY_TEMPLATE.format(index=index, dep=0, dep_file=0, methods='')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        scan = RepoScanner.from_env().scan(root)
+
+        # A classifier that skips nothing and analyzes everything only counts
+        plain, plain_seconds = timed(parse_code, root, scan=scan, workers=1,
+                                     classifier=FileClassifier(skip=(), no_analysis=()))
+        classifier = FileClassifier()
+        context, seconds = timed(parse_code, root, scan=scan, workers=1, classifier=classifier)
+        return {
+            'benchmark': 'classify',
+            'files': args.files,
+            'noise_files': args.noise,
+            'unclassified_parsed_files': len(plain),
+            'parsed_files': len(context),
+            'unclassified_analyzed_files': len(plain),
+            'analyzed_files': sum(1 for data in context.values() if not data.get('skip_analysis')),
+            'unclassified_seconds': round(plain_seconds, 3),
+            'seconds': round(seconds, 3),
+            'categories': classifier.stats(),
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_extract(args) -> dict:
+    """Compare legacy multi-pass regex extraction with the single-pass registry per MB."""
+    from extractors import get_extractor
+
+    root = tempfile.mkdtemp(prefix="cg-bench-")
+    try:
+        make_synthetic_repo(root, args.files)
+        sources = []
+        for directory, _, files in os.walk(root):
+            for name in files:
+                with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+                    sources.append((name, f.read()))
+        size_mb = sum(len(code) for _, code in sources) / (1024 * 1024)
+
+        def run_legacy():
+            for _ in range(args.repeat):
+                for name, code in sources:
+                    legacy_extract_symbols(name, code)
+
+        def run_registry():
+            for _ in range(args.repeat):
+                for name, code in sources:
+                    get_extractor(name).extract(code)
+
+        _, legacy_seconds = timed(run_legacy)
+        _, registry_seconds = timed(run_registry)
+        processed = size_mb * args.repeat
+        return {
+            'benchmark': 'extract',
+            'size_mb': round(processed, 2),
+            'legacy_ms_per_mb': round(legacy_seconds * 1000 / processed, 2),
+            'registry_ms_per_mb': round(registry_seconds * 1000 / processed, 2),
+            'speedup': round(legacy_seconds / registry_seconds, 2),
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_ast(args) -> dict:
+    """Compare the regex and `ast` Python extractors per MB and by what they find.
+
+    Runs on the .py files of a synthetic repository, or of --source (e.g. the
+    standard library) for real-world code. Definitions only one extractor
+    reports are counted by (kind, name): regex-only hits are usually matches
+    inside strings or comments, and a method sharing its name with another
+    definition in the file is merged by the regex path.
+    """
+    from extractors import PYTHON_REGEX_EXTRACTOR, get_extractor
+
+    root = None
+    if args.source:
+        source_root = args.source
+    else:
+        root = source_root = tempfile.mkdtemp(prefix="cg-bench-")
+        make_synthetic_repo(root, args.files)
+    try:
+        sources = []
+        for directory, _, files in os.walk(source_root):
+            for name in files:
+                if name.endswith('.py'):
+                    with open(os.path.join(directory, name), 'r', encoding='utf-8', errors='ignore') as f:
+                        sources.append(f.read())
+        size_mb = sum(len(code) for code in sources) / (1024 * 1024)
+        ast_extractor = get_extractor('module.py')
+
+        def run(extractor):
+            for _ in range(args.repeat - 1):
+                for code in sources:
+                    extractor.extract(code)
+            return [extractor.extract(code) for code in sources]
+
+        regex_results, regex_seconds = timed(run, PYTHON_REGEX_EXTRACTOR)
+        ast_results, ast_seconds = timed(run, ast_extractor)
+        regex_only = ast_only = fallbacks = 0
+        for regex, parsed in zip(regex_results, ast_results):
+            if not parsed['definitions'] and regex['functions'] + regex['classes']:
+                fallbacks += 1
+                continue
+            found_regex = {(kind, name) for kind, name, _ in regex['symbols'] if kind != 'import'}
+            found_ast = {(kind, name.rsplit('.', 1)[-1]) for kind, name, _ in parsed['symbols'] if kind != 'import'}
+            regex_only += len(found_regex - found_ast)
+            ast_only += sum(1 for kind, name, _ in parsed['symbols'] if kind != 'import') - len(found_ast & found_regex)
+        processed = size_mb * args.repeat
+        return {
+            'benchmark': 'ast',
+            'files': len(sources),
+            'size_mb': round(processed, 2),
+            'regex_ms_per_mb': round(regex_seconds * 1000 / processed, 2),
+            'ast_ms_per_mb': round(ast_seconds * 1000 / processed, 2),
+            'slowdown': round(ast_seconds / regex_seconds, 2),
+            'definitions': sum(len(r['definitions']) for r in ast_results),
+            'regex_only_definitions': regex_only,
+            'ast_only_definitions': ast_only,
+            'regex_fallback_files': fallbacks,
+        }
+    finally:
+        if root:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def legacy_resolve_imports(code_context: dict) -> int:
+    """The original quadratic import matching, kept as a benchmark baseline."""
+    edges = 0
+    for file, data in code_context.items():
+        for imp in data['imports']:
+            for other_file in code_context.keys():
+                if other_file.replace('.py', '').replace('/', '.') in imp:
+                    if file != other_file:
+                        edges += 1
+    return edges
+
+
+def indexed_resolve_imports(code_context: dict) -> int:
+    """Resolve every import through ImportIndex, as build_graph does."""
+    from import_index import ImportIndex
+
+    index = ImportIndex(code_context.keys())
+    edges = 0
+    for file, data in code_context.items():
+        import_names = data.get('import_names') or {}
+        for imp in data['imports']:
+            if imp in import_names:
+                targets = index.resolve_from(file, imp, import_names[imp])
+            else:
+                targets = [index.resolve(file, imp, data['language'])]
+            edges += sum(1 for other_file in targets if other_file is not None and other_file != file)
+    return edges
+
+
+def bench_graph(args) -> dict:
+    """Time build_graph and its indexed import resolution, optionally against the legacy scan.
+
+    Also counts edges by relation; legacy_contains_edges is what linking every
+    class of a file to every function of it used to add.
+    """
+    from repo_parser import build_graph, parse_code
+
+    root = tempfile.mkdtemp(prefix="cg-bench-")
+    try:
+        make_synthetic_repo(root, args.files)
+        context = parse_code(root)
+        graph, seconds = timed(build_graph, context)
+        _, indexed_seconds = timed(indexed_resolve_imports, context)
+        links = graph.get('links', graph.get('edges', []))  # key name varies across networkx versions
+        result = {
+            'benchmark': 'graph',
+            'files': len(context),
+            'imports': sum(len(data['imports']) for data in context.values()),
+            'import_edges': sum(1 for link in links if link.get('relation') == 'imports'),
+            'contains_edges': sum(1 for link in links if link.get('relation') == 'contains'),
+            'legacy_contains_edges': sum(len(data['classes']) * len(data['functions']) for data in context.values()),
+            'call_edges': sum(1 for link in links if link.get('relation') == 'calls'),
+            'build_graph_seconds': round(seconds, 3),
+            'indexed_import_seconds': round(indexed_seconds, 3),
+        }
+        if args.legacy:
+            _, legacy_seconds = timed(legacy_resolve_imports, context)
+            result['legacy_import_seconds'] = round(legacy_seconds, 3)
+        return result
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def legacy_build_graph(code_context: dict) -> dict:
+    """The original networkx build_graph, kept as a memory baseline."""
+    import networkx as nx
+    from import_index import ImportIndex
+    from repo_parser import _file_graph_fragment
+
+    G = nx.DiGraph()
+    fragments = {file: _file_graph_fragment(file, data) for file, data in code_context.items()}
+    for fragment in fragments.values():
+        for node, attrs in fragment['nodes']:
+            G.add_node(node, **attrs)
+    for fragment in fragments.values():
+        for source, target, attrs in fragment['edges']:
+            G.add_edge(source, target, **attrs)
+    index = ImportIndex(code_context.keys())
+    for file, data in code_context.items():
+        for imp in data['imports']:
+            other_file = index.resolve(file, imp, data.get('language', ''))
+            if other_file is not None and other_file != file:
+                G.add_edge(f"file:{file}", f"file:{other_file}", relation='imports')
+    return nx.node_link_data(G)
+
+
+def _traced(fn, *args) -> tuple:
+    """Run `fn` under tracemalloc and return (result, seconds, retained MB, peak MB)."""
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        result, seconds = timed(fn, *args)
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, seconds, round(retained / (1024 * 1024), 2), round(peak / (1024 * 1024), 2)
+
+
+def bench_symbols(args) -> dict:
+    """Compare memory of the networkx node-link graph with the interned SymbolTable.
+
+    The legacy pipeline kept the node-link dict for the whole run and
+    generate_markdown rebuilt a DiGraph from it; the SymbolTable is built
+    once and consumed directly.
+    """
+    import networkx as nx
+    from repo_parser import build_symbol_table, parse_code
+
+    root = tempfile.mkdtemp(prefix="cg-bench-")
+    try:
+        make_synthetic_repo(root, args.files, methods_per_class=args.methods)
+        context = parse_code(root)
+        graph, graph_seconds, graph_mb, graph_peak = _traced(legacy_build_graph, context)
+        _, load_seconds, load_mb, load_peak = _traced(nx.node_link_graph, graph)
+        del graph
+        table, table_seconds, table_mb, table_peak = _traced(build_symbol_table, context)
+        return {
+            'benchmark': 'symbols',
+            'files': len(context),
+            'nodes': table.node_count,
+            'edges': table.edge_count,
+            'legacy': {
+                'build_seconds': round(graph_seconds + load_seconds, 3),
+                'node_link_mb': graph_mb,
+                'digraph_mb': load_mb,
+                'peak_mb': max(graph_peak, graph_mb + load_peak),
+            },
+            'symbol_table': {
+                'build_seconds': round(table_seconds, 3),
+                'retained_mb': table_mb,
+                'peak_mb': table_peak,
+                'bytes_per_node': round(table_mb * 1024 * 1024 / max(1, table.node_count), 1),
+            },
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def synthetic_enhanced_context(num_files: int, packages: int = 50, methods: int = 20,
+                               subpackages: int = 0) -> dict:
+    """Build an analyzed code_context in memory, shaped like iter_file_sections input."""
+    def module(index: int) -> str:
+        directory = f"pkg{index % packages}" + (f"/sub{index % subpackages}" if subpackages else '')
+        return f"{directory}/module{index}"
+
+    context = {}
+    for index in range(num_files):
+        functions = [f"method_{n}" for n in range(methods)] + [f"helper_{index}"]
+        context[module(index) + '.py'] = {
+            'functions': functions,
+            'classes': [f"Service{index}"],
+            'imports': ['os'] + [module(other).replace('/', '.') for other in
+                                 ((index + 1) % num_files, (index * 7 + 3) % num_files)],
+            'language': 'PY',
+            'ai_analysis': f"Module {index} implements Service{index}. " + "It coordinates helpers. " * 20,
+            'function_descriptions': {name: f"Computes {name} for service {index}." for name in functions},
+            'class_descriptions': {f"Service{index}": f"Service {index} entry point."},
+        }
+    return context
+
+
+def legacy_generate_markdown(table, repo_url: str, enhanced_context: dict) -> str:
+    """The original string-concatenating renderer, kept as a baseline."""
+    from repo_parser import _render_file_section
+
+    files_md = ""
+    for file_path, data in enhanced_context.items():
+        files_md += _render_file_section(file_path, data)
+    md = f"# 📚 {repo_url.split('/')[-1]} - Codebase Documentation\n\n"
+    md += f"**Repository:** {repo_url}\n\n"
+    md += f"**Analysis Date:** Generated by Codebase Genius AI\n\n"
+    md += "## 📊 Overview\n\n"
+    md += f"- **Files Analyzed:** {len(enhanced_context)}\n"
+    md += f"- **Classes:** {table.count('class')}\n"
+    md += f"- **Functions:** {table.count('function')}\n"
+    md += f"- **Code Relationships:** {table.edge_count}\n\n"
+    md += "## 📁 File Analysis\n\n" + files_md
+    md += "## 🏗️ Code Structure\n\n```mermaid\ngraph TD\n"
+    for node_id in range(table.node_count):
+        node = table.label(node_id).replace(':', '_').replace('/', '_')
+        if table.kind(node_id) == 'class':
+            md += f"    {node}([Class: {table.name(node_id)}])\n"
+        elif table.kind(node_id) == 'function':
+            md += f"    {node}{{Function: {table.name(node_id)}}}\n"
+    for source, target, relation in table.edges():
+        source = table.label(source).replace(':', '_').replace('/', '_')
+        target = table.label(target).replace(':', '_').replace('/', '_')
+        md += f"    {source} -->|{relation}| {target}\n"
+    md += "```\n\n"
+    md += "## 🚀 Installation & Usage\n\n```bash\n"
+    md += f"# Clone the repository\ngit clone {repo_url}\n\n"
+    md += f"# Install dependencies\npip install -r requirements.txt\n\n"
+    md += f"# Run the application\npython main.py\n```\n\n"
+    md += "## 🤖 Generated by Codebase Genius\n\n"
+    md += "*This documentation was automatically generated using AI-powered code analysis.*\n"
+    return md
+
+
+def bench_render(args) -> dict:
+    """Compare render time and peak memory of string concatenation, streaming and sharding.
+
+    Sections are rendered from an in-memory analyzed context, so only the
+    document assembly and writing are measured.
+    """
+    from artifacts import write_docs
+    from repo_parser import build_symbol_table, save_docs, write_markdown
+
+    root = tempfile.mkdtemp(prefix="cg-bench-")
+    try:
+        repo_url = 'https://example.com/repo'
+        context = synthetic_enhanced_context(args.files, args.packages)
+        table = build_symbol_table(context)
+
+        def legacy():
+            return save_docs(legacy_generate_markdown(table, repo_url, context), repo_url, os.path.join(root, 'legacy'))
+
+        def streamed(sharded: bool):
+            return write_docs(os.path.join(root, 'sharded' if sharded else 'streamed'),
+                              lambda f, pages_dir: write_markdown(f, table, repo_url, context,
+                                                                  shard_dir=pages_dir),
+                              sharded=sharded)
+
+        result = {'benchmark': 'render', 'files': len(context), 'nodes': table.node_count,
+                  'edges': table.edge_count}
+        for name, run in (('legacy', legacy), ('streamed', lambda: streamed(False)),
+                          ('sharded', lambda: streamed(True))):
+            output, seconds, _, peak_mb = _traced(run)
+            result[name] = {'seconds': round(seconds, 3), 'peak_mb': peak_mb}
+            size = os.path.getsize(output) if name == 'legacy' else output['size']
+            result[name]['docs_mb'] = round(size / (1024 * 1024), 2)
+            if name == 'sharded':
+                result[name]['pages'] = output['pages']['count']
+        return result
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_diagrams(args) -> dict:
+    """Compare the one-node-per-symbol Mermaid diagram with clustered DiagramBuilder output.
+
+    Reports Mermaid lines and build time per graph size; the clustered
+    overview and drill-downs stay bounded as the graph grows.
+    """
+    from diagrams import DiagramBuilder
+    from repo_parser import build_symbol_table
+
+    results = []
+    for files in [int(n) for n in args.files.split(',')]:
+        context = synthetic_enhanced_context(files, args.packages, subpackages=args.subpackages)
+        table = build_symbol_table(context)
+        legacy, legacy_seconds = timed(lambda: legacy_generate_markdown(table, 'repo', {}))
+        legacy_mermaid = legacy[legacy.index('```mermaid'):legacy.index('## 🚀')]
+
+        def clustered():
+            builder = DiagramBuilder(table, args.max_nodes, args.max_edges)
+            packages = builder.drill_down_packages()
+            return builder.overview(), [builder.package(package) for package in packages]
+
+        (overview, drill_downs), seconds = timed(clustered)
+        results.append({
+            'files': files,
+            'nodes': table.node_count,
+            'edges': table.edge_count,
+            'legacy_lines': legacy_mermaid.count('\n'),
+            'legacy_seconds': round(legacy_seconds, 3),
+            'overview_lines': overview.count('\n'),
+            'drill_downs': len(drill_downs),
+            'max_drill_down_lines': max((d.count('\n') for d in drill_downs), default=0),
+            'clustered_seconds': round(seconds, 3),
+        })
+    return {'benchmark': 'diagrams', 'max_nodes': args.max_nodes, 'max_edges': args.max_edges,
+            'results': results}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def bench_startup(args) -> dict:
+    """Compare per-request latency of a cold orchestrator subprocess with a warm worker.
+
+    Uses a local repository without source files so no Gemini calls are made;
+    the difference is interpreter start, imports and client setup.
+    """
+    from worker import request_documentation
+
+    root = tempfile.mkdtemp(prefix="cg-bench-")
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    try:
+        repo = os.path.join(root, 'repo')
+        os.makedirs(repo)
+        with open(os.path.join(repo, 'README.md'), 'w', encoding='utf-8') as f:
+            f.write('# Startup benchmark\n')
+        subprocess.run(['git', 'init', '-q', repo], check=True)
+        subprocess.run(['git', '-C', repo, 'add', 'README.md'], check=True)
+        subprocess.run(['git', '-C', repo, '-c', 'user.name=bench', '-c', 'user.email=bench@example.com',
+                        'commit', '-q', '-m', 'readme'], check=True)
+
+        port = _free_port()
+        env = dict(os.environ,
+                   GEMINI_API_KEY=os.getenv('GEMINI_API_KEY', 'benchmark'),
+                   LLM_CACHE_PATH=os.path.join(root, 'llm_cache.sqlite'),
+                   MANIFEST_DIR=os.path.join(root, 'manifests'),
+                   MIRROR_CACHE_DIR=os.path.join(root, 'mirrors'),
+                   OUTPUT_DIR=os.path.join(root, 'outputs'),
+                   WORKER_PORT=str(port))
+
+        cold = []
+        for _ in range(args.requests):
+            result, elapsed = timed(subprocess.run, [sys.executable, os.path.join(script_dir, 'run_orchestrator.py'), repo],
+                                    capture_output=True, text=True, env=env)
+            if json.loads(result.stdout)['status'] != 'success':
+                raise RuntimeError(result.stdout)
+            cold.append(elapsed)
+
+        start = time.perf_counter()
+        worker = subprocess.Popen([sys.executable, os.path.join(script_dir, 'worker.py')],
+                                  env=env, stderr=subprocess.DEVNULL)
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            while True:
+                try:
+                    socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                    break
+                except OSError:
+                    if worker.poll() is not None:
+                        raise RuntimeError("worker exited during startup")
+                    time.sleep(0.05)
+            worker_startup = time.perf_counter() - start
+            warm = []
+            for _ in range(args.requests):
+                result, elapsed = timed(request_documentation, repo, base_url)
+                if result['status'] != 'success':
+                    raise RuntimeError(result)
+                warm.append(elapsed)
+        finally:
+            worker.terminate()
+            worker.wait()
+
+        cold_mean = sum(cold) / len(cold)
+        warm_mean = sum(warm) / len(warm)
+        return {
+            'benchmark': 'startup',
+            'requests': args.requests,
+            'cold_subprocess_ms': round(cold_mean * 1000, 1),
+            'worker_startup_ms': round(worker_startup * 1000, 1),
+            'warm_worker_ms': round(warm_mean * 1000, 1),
+            'speedup': round(cold_mean / warm_mean, 2),
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def _git_commit_all(repo: str) -> None:
+    subprocess.run(['git', 'init', '-q', repo], check=True)
+    subprocess.run(['git', '-C', repo, 'add', '-A'], check=True)
+    subprocess.run(['git', '-C', repo, '-c', 'user.name=bench', '-c', 'user.email=bench@example.com',
+                    'commit', '-q', '-m', 'synthetic'], check=True)
+
+
+def _percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def bench_queue(args) -> dict:
+    """Drive the job queue with a burst of mixed-priority requests against FakeConnector.
+
+    Requests are spread over --repos local repositories so identical in-flight
+    requests coalesce; submissions beyond --queue are rejected with QueueFull.
+    """
+    from fake_connector import FakeConnector
+    from jobs import BATCH, INTERACTIVE, JobManager, QueueFull
+
+    root = tempfile.mkdtemp(prefix="cg-bench-")
+    overrides = {
+        'LLM_CACHE_ENABLED': '0',
+        'MANIFEST_DIR': os.path.join(root, 'manifests'),
+        'MIRROR_CACHE_DIR': os.path.join(root, 'mirrors'),
+        'OUTPUT_DIR': os.path.join(root, 'outputs'),
+        'GEMINI_MAX_CONCURRENCY': str(args.llm_concurrency),
+    }
+    saved_env = {name: os.environ.get(name) for name in overrides}
+    os.environ.update(overrides)
+    try:
+        from orchestrator import PipelineServices, orchestrate_documentation
+
+        repos = []
+        for index in range(args.repos):
+            repo = os.path.join(root, f"repo{index}")
+            make_synthetic_repo(repo, args.files, packages=5, methods_per_class=3, seed=index)
+            _git_commit_all(repo)
+            repos.append(repo)
+
+        connector = FakeConnector(latency=args.latency)
+        services = PipelineServices(connector=connector)
+        manager = JobManager(lambda url, progress: orchestrate_documentation(url, services, progress),
+                             max_workers=args.workers, max_queue=args.queue)
+        rng = random.Random(0)
+        start = time.perf_counter()
+        submitted, rejected = [], 0
+        for _ in range(args.jobs):
+            priority = BATCH if rng.random() < args.batch_fraction else INTERACTIVE
+            try:
+                job = manager.submit(rng.choice(repos), priority)
+                submitted.append((priority, time.time(), job))
+            except QueueFull:
+                rejected += 1
+        latencies = {INTERACTIVE: [], BATCH: []}
+        for priority, submitted_at, job in submitted:
+            manager.wait(job.id)
+            latencies[priority].append(job.updated_at - submitted_at)
+        elapsed = time.perf_counter() - start
+        stats = manager.queue_stats()
+        manager.shutdown()
+        services.close()
+        return {
+            'benchmark': 'queue',
+            'requests': args.jobs,
+            'accepted': len(submitted),
+            'rejected': rejected,
+            'coalesced': stats['coalesced'],
+            'pipelines_run': stats['completed'],
+            'llm_calls': connector.calls,
+            'seconds': round(elapsed, 3),
+            'requests_per_second': round(len(submitted) / elapsed, 2),
+            'p50_seconds': {p: round(_percentile(v, 0.5), 3) for p, v in latencies.items()},
+            'p95_seconds': {p: round(_percentile(v, 0.95), 3) for p, v in latencies.items()},
+        }
+    finally:
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_payload(args) -> dict:
+    """Compare the old inline orchestrator response with artifact references.
+
+    Measures JSON size plus the serialize (worker) and parse (caller) time of
+    each response shape; the markdown is rendered without AI analysis.
+    """
+    from artifacts import write_artifacts
+    from repo_parser import build_graph, generate_file_tree, generate_markdown, parse_code
+
+    root = tempfile.mkdtemp(prefix="cg-bench-")
+    try:
+        repo = os.path.join(root, 'repo')
+        make_synthetic_repo(repo, args.files)
+        context = parse_code(repo)
+        graph = build_graph(context)
+        tree = generate_file_tree(repo)
+        docs = generate_markdown(graph, 'https://example.com/repo', enhanced_context=context)
+
+        legacy = {'status': 'success', 'file_tree': tree, 'code_graph': graph, 'docs': docs,
+                  'output_file': os.path.join(root, 'out', 'docs.md')}
+        artifacts, write_seconds = timed(write_artifacts, os.path.join(root, 'out'), 'https://example.com/repo',
+                                         docs, graph, tree)
+        compact = {'status': 'success', 'output_file': artifacts['docs']['path'], 'artifacts': artifacts}
+
+        result = {'benchmark': 'payload', 'files': len(context), 'artifact_write_seconds': round(write_seconds, 3)}
+        for name, payload in (('inline', legacy), ('compact', compact)):
+            encoded, dump_seconds = timed(json.dumps, payload)
+            _, load_seconds = timed(json.loads, encoded)
+            result[name] = {
+                'bytes': len(encoded.encode('utf-8')),
+                'dumps_ms': round(dump_seconds * 1000, 2),
+                'loads_ms': round(load_seconds * 1000, 2),
+            }
+        return result
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_context(args) -> dict:
+    """Compare definition coverage of the old 2000-character prefix with build_context.
+
+    Both strategies are measured at roughly the same token cost: the prefix
+    uses budget*4 characters, build_context a budget of `--budget` tokens.
+    """
+    from context_builder import build_context
+    from extractors import get_extractor
+    from request_scheduler import estimate_tokens
+
+    root = tempfile.mkdtemp(prefix="cg-bench-")
+    try:
+        make_synthetic_repo(root, args.files)
+        totals = {'prefix': [0, 0], 'context': [0, 0]}  # [tokens, definitions covered]
+        definitions = 0
+        build_seconds = 0.0
+        for directory, _, files in os.walk(root):
+            for name in files:
+                with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+                    code = f.read()
+                extracted = get_extractor(name).extract(code)
+                defs = [s for s in extracted['symbols'] if s[0] in ('function', 'class')]
+                definitions += len(defs)
+
+                prefix = code[:args.budget * 4]
+                prefix_lines = prefix.count('\n') + 1
+                totals['prefix'][0] += estimate_tokens(prefix)
+                totals['prefix'][1] += sum(1 for _, _, line in defs if line < prefix_lines)
+
+                (_, stats), seconds = timed(build_context, code, extracted['symbols'], args.budget,
+                                            extracted['imports'])
+                build_seconds += seconds
+                totals['context'][0] += stats['tokens']
+                totals['context'][1] += stats['definitions_covered']
+
+        result = {'benchmark': 'context', 'files': args.files, 'budget': args.budget,
+                  'definitions': definitions, 'build_ms_per_file': round(build_seconds * 1000 / args.files, 3)}
+        for name, (tokens, covered) in totals.items():
+            result[name] = {
+                'tokens': tokens,
+                'definitions_covered': covered,
+                'coverage': round(covered / definitions, 3) if definitions else 0.0,
+                'definitions_per_1k_tokens': round(covered * 1000 / tokens, 1) if tokens else 0.0,
+            }
+        return result
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_vectors(args) -> dict:
+    """Compare exact and IVF search over an embedding index built with FakeConnector.
+
+    Texts are drawn from --topics synthetic vocabularies so the fake hashed
+    bag-of-words embeddings cluster the way real summaries do. Reports build
+    time, on-disk size, query latency and IVF recall@k against exact search
+    on the reloaded, memory-mapped index. Recall counts IVF results scoring
+    at least the exact k-th similarity, so ties between equally similar
+    vectors are not counted as misses.
+    """
+    import numpy as np
+    from embedding_index import EmbeddingIndex, EmbeddingIndexer
+    from fake_connector import FakeConnector
+    from request_scheduler import RequestScheduler
+
+    rng = random.Random(0)
+    vocabularies = [[f"t{topic}w{word}" for word in range(16)] for topic in range(args.topics)]
+    common = [f"common{word}" for word in range(50)]
+
+    def text() -> str:
+        words = rng.sample(rng.choice(vocabularies), 8) + rng.sample(common, 2)
+        return ' '.join(words)
+
+    root = tempfile.mkdtemp(prefix="cg-bench-")
+    scheduler = RequestScheduler(FakeConnector(latency=0, embedding_dim=args.dim),
+                                 max_concurrency=args.workers)
+    try:
+        indexer = EmbeddingIndexer(scheduler, batch_size=100)
+        for n in range(args.vectors):
+            indexer.add_file(f"pkg/module{n // 50}.py", {'function_descriptions': {f"f{n}": text()}})
+        start = time.perf_counter()
+        index = indexer.build()
+        build_seconds = time.perf_counter() - start
+        reference = index.save(root)
+        index = EmbeddingIndex.load(root)
+        queries = [np.asarray(scheduler.connector.generate_embeddings(text()), dtype=np.float32)
+                   for _ in range(args.queries)]
+
+        def run(**options) -> tuple:
+            latencies, scores = [], []
+            for query in queries:
+                results, seconds = timed(index.search, query, args.k, **options)
+                latencies.append(seconds)
+                scores.append([r['score'] for r in results])
+            return latencies, scores
+
+        exact_latencies, exact_scores = run(exact=True)
+        result = {
+            'benchmark': 'vectors',
+            'vectors': len(index),
+            'dim': index.dim,
+            'ivf_lists': reference['ivf_lists'],
+            'build_seconds': round(build_seconds, 3),
+            'index_bytes': reference['size'],
+            'float32_bytes': len(index) * index.dim * 4,
+            'exact': {'p50_ms': round(_percentile(exact_latencies, 0.5) * 1000, 3),
+                      'p95_ms': round(_percentile(exact_latencies, 0.95) * 1000, 3)},
+        }
+        if index.centroids is not None:
+            for nprobe in [int(n) for n in args.nprobe.split(',')]:
+                latencies, scores = run(nprobe=nprobe)
+                found = sum(sum(1 for score in approx if score >= exact[-1] - 1e-4)
+                            for approx, exact in zip(scores, exact_scores))
+                recall = found / sum(len(exact) for exact in exact_scores)
+                result[f'ivf_nprobe_{nprobe}'] = {
+                    'p50_ms': round(_percentile(latencies, 0.5) * 1000, 3),
+                    'p95_ms': round(_percentile(latencies, 0.95) * 1000, 3),
+                    f'recall_at_{args.k}': round(recall, 3),
+                }
+        return result
+    finally:
+        scheduler.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_budget(args) -> dict:
+    """Compare a full run with a time-budgeted run on FakeConnector.
+
+    Each run starts from an empty manifest. Reports wall time, files analyzed
+    and the share of import in-degree (how often other files depend on a
+    file) covered by the analyzed files, which is what ranking by importance
+    should maximize for a given fraction of files.
+    """
+    from fake_connector import FakeConnector
+    from importance import AnalysisBudget
+
+    root = tempfile.mkdtemp(prefix="cg-bench-")
+    overrides = {
+        'LLM_CACHE_ENABLED': '0',
+        'MIRROR_CACHE_DIR': os.path.join(root, 'mirrors'),
+        'OUTPUT_DIR': os.path.join(root, 'outputs'),
+        'GEMINI_MAX_CONCURRENCY': str(args.llm_concurrency),
+        'SUMMARY_ENABLED': '0',
+        'EMBEDDINGS_ENABLED': '0',
+    }
+    saved_env = {name: os.environ.get(name) for name in list(overrides) + ['MANIFEST_DIR']}
+    os.environ.update(overrides)
+    try:
+        from orchestrator import PipelineServices, orchestrate_documentation
+
+        repo = os.path.join(root, 'repo')
+        make_synthetic_repo(repo, args.files, packages=10, methods_per_class=3)
+        _git_commit_all(repo)
+        result = {'benchmark': 'budget', 'files': args.files, 'latency': args.latency}
+        for name, budget in (('full', AnalysisBudget()), ('budgeted', AnalysisBudget(seconds=args.seconds))):
+            os.environ['MANIFEST_DIR'] = os.path.join(root, f'manifests-{name}')
+            services = PipelineServices(connector=FakeConnector(latency=args.latency))
+            try:
+                run, seconds = timed(orchestrate_documentation, repo, services, budget=budget)
+            finally:
+                services.close()
+            if run['status'] != 'success':
+                raise RuntimeError(run['error'])
+            with open(run['artifacts']['manifest']['path'], 'r', encoding='utf-8') as f:
+                stats = json.load(f)['stats']
+            analyzed = stats['context_tokens_per_file']
+            importance = stats['file_importance']
+            total_in_degree = sum(s['in_degree'] for s in importance.values()) or 1
+            result[name] = {
+                'seconds': round(seconds, 3),
+                'files_analyzed': len(analyzed),
+                'file_share': round(len(analyzed) / args.files, 3),
+                'in_degree_share': round(sum(importance[f]['in_degree'] for f in analyzed) / total_in_degree, 3),
+                'exhausted_by': budget.exhausted_by,
+            }
+        return result
+    finally:
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    parse = subparsers.add_parser('parse', help='parse_code scaling across worker processes')
+    parse.add_argument('--files', type=int, default=5000)
+    parse.add_argument('--workers', default=f"1,2,{os.cpu_count() or 4}")
+    parse.set_defaults(func=bench_parse)
+
+    scan = subparsers.add_parser('scan', help='two filesystem walks vs one shared scan')
+    scan.add_argument('--files', type=int, default=2000)
+    scan.add_argument('--vendored', type=int, default=20000, help='JavaScript files under node_modules')
+    scan.set_defaults(func=bench_scan)
+
+    classify = subparsers.add_parser('classify', help='parsing with and without file classification')
+    classify.add_argument('--files', type=int, default=2000)
+    classify.add_argument('--noise', type=int, default=600, help='minified, generated and vendored files')
+    classify.set_defaults(func=bench_classify)
+
+    extract = subparsers.add_parser('extract', help='symbol extraction throughput per MB')
+    extract.add_argument('--files', type=int, default=2000)
+    extract.add_argument('--repeat', type=int, default=3)
+    extract.set_defaults(func=bench_extract)
+
+    ast_parser = subparsers.add_parser('ast', help='regex vs ast Python extraction speed and accuracy')
+    ast_parser.add_argument('--files', type=int, default=2000)
+    ast_parser.add_argument('--repeat', type=int, default=3)
+    ast_parser.add_argument('--source', help='directory of real Python files instead of a synthetic repo')
+    ast_parser.set_defaults(func=bench_ast)
+
+    graph = subparsers.add_parser('graph', help='build_graph import resolution time')
+    graph.add_argument('--files', type=int, default=5000)
+    graph.add_argument('--legacy', action='store_true', help='also time the old quadratic resolution')
+    graph.set_defaults(func=bench_graph)
+
+    symbols = subparsers.add_parser('symbols', help='networkx graph vs SymbolTable memory')
+    symbols.add_argument('--files', type=int, default=5000)
+    symbols.add_argument('--methods', type=int, default=20, help='methods per synthetic Python class')
+    symbols.set_defaults(func=bench_symbols)
+
+    startup = subparsers.add_parser('startup', help='cold subprocess vs warm worker request latency')
+    startup.add_argument('--requests', type=int, default=5)
+    startup.set_defaults(func=bench_startup)
+
+    queue = subparsers.add_parser('queue', help='job queue throughput with FakeConnector')
+    queue.add_argument('--jobs', type=int, default=60, help='requests submitted in one burst')
+    queue.add_argument('--repos', type=int, default=10, help='distinct repositories requested')
+    queue.add_argument('--files', type=int, default=20, help='files per synthetic repository')
+    queue.add_argument('--workers', type=int, default=4, help='concurrent pipelines')
+    queue.add_argument('--queue', type=int, default=100, help='maximum queued jobs')
+    queue.add_argument('--batch-fraction', type=float, default=0.5)
+    queue.add_argument('--latency', type=float, default=0.02, help='fake LLM latency in seconds')
+    queue.add_argument('--llm-concurrency', type=int, default=8)
+    queue.set_defaults(func=bench_queue)
+
+    payload = subparsers.add_parser('payload', help='inline vs artifact-reference response size')
+    payload.add_argument('--files', type=int, default=5000)
+    payload.set_defaults(func=bench_payload)
+
+    render = subparsers.add_parser('render', help='concatenated vs streamed vs sharded markdown')
+    render.add_argument('--files', type=int, default=10000)
+    render.add_argument('--packages', type=int, default=50)
+    render.set_defaults(func=bench_render)
+
+    diagrams = subparsers.add_parser('diagrams', help='per-symbol vs clustered Mermaid diagram size')
+    diagrams.add_argument('--files', default='1000,10000,50000')
+    diagrams.add_argument('--packages', type=int, default=50)
+    diagrams.add_argument('--subpackages', type=int, default=8, help='subdirectories per package')
+    diagrams.add_argument('--max-nodes', type=int, default=60)
+    diagrams.add_argument('--max-edges', type=int, default=100)
+    diagrams.set_defaults(func=bench_diagrams)
+
+    context = subparsers.add_parser('context', help='prompt context coverage per token')
+    context.add_argument('--files', type=int, default=500)
+    context.add_argument('--budget', type=int, default=500, help='token budget per file')
+    context.set_defaults(func=bench_context)
+
+    vectors = subparsers.add_parser('vectors', help='exact vs IVF embedding search')
+    vectors.add_argument('--vectors', type=int, default=100000)
+    vectors.add_argument('--dim', type=int, default=768)
+    vectors.add_argument('--topics', type=int, default=500, help='synthetic vocabularies texts are drawn from')
+    vectors.add_argument('--queries', type=int, default=100)
+    vectors.add_argument('--k', type=int, default=10)
+    vectors.add_argument('--nprobe', default='4,16,64', help='IVF lists probed per query')
+    vectors.add_argument('--workers', type=int, default=4, help='concurrent embedding batches')
+    vectors.set_defaults(func=bench_vectors)
+
+    budget = subparsers.add_parser('budget', help='full vs time-budgeted analysis with FakeConnector')
+    budget.add_argument('--files', type=int, default=400)
+    budget.add_argument('--seconds', type=float, default=5.0, help='analysis time budget')
+    budget.add_argument('--latency', type=float, default=0.2, help='fake LLM latency in seconds')
+    budget.add_argument('--llm-concurrency', type=int, default=8)
+    budget.set_defaults(func=bench_budget)
+
+    args = parser.parse_args()
+    print(json.dumps(args.func(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Token-budget-aware source context for file analysis prompts.
+
+Rather than sending the first N characters of a file (often a license header
+and imports), the builder splits the file into spans around the extracted
+symbols (definition signatures, the docstring or comment that follows them,
+their bodies and top-level logic) and greedily keeps the highest-value spans
+that fit the token budget. Kept spans are emitted in file order with elided
+gaps marked, and per-file token usage is reported alongside the text.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+from extractors import split_lines
+from request_scheduler import estimate_tokens
+
+# Span priorities; higher is selected first
+SIGNATURE_SCORE = {'class': 10.0, 'function': 8.0}
+DOCSTRING_SCORE = 6.0
+MODULE_DOC_SCORE = 7.0
+TOP_LEVEL_SCORE = 3.0
+BODY_SCORE = 2.0
+
+# How many lines of a body are offered as one span (the rest as another)
+BODY_HEAD_LINES = 12
+
+ELISION = '...'
+
+_COMMENT_LINE = re.compile(r'^\s*(#|//|/\*|\*|"""|\'\'\'|--|;)')
+_DOC_START = re.compile(r'^\s*(?:[rbuRBU]{0,2}"""|[rbuRBU]{0,2}\'\'\'|/\*\*|///|//!|#(?!include|define|!))')
+_IMPORT_LINE = re.compile(r'^\s*(?:import|from|#\s*include|using|require|package|use)\b')
+_LICENSE = re.compile(r'licen[sc]e|copyright|spdx', re.IGNORECASE)
+
+
+class Span:
+    """A contiguous range of lines [start, end) with a selection score."""
+
+    __slots__ = ('start', 'end', 'score', 'label')
+
+    def __init__(self, start: int, end: int, score: float, label: str):
+        self.start = start
+        self.end = end
+        self.score = score
+        self.label = label
+
+
+def _signature_end(lines: List[str], start: int, limit: int) -> int:
+    """Return the line after a definition header, which may wrap over several lines."""
+    end = start
+    while end < limit and end - start < 6:
+        stripped = lines[end].rstrip()
+        end += 1
+        if stripped.endswith((':', '{', ';', '=>', ')')) or '{' in stripped:
+            break
+    return end
+
+
+def _doc_end(lines: List[str], start: int, limit: int) -> int:
+    """Return the end of a docstring or comment block beginning at `start` (or `start`)."""
+    if start >= limit or not _DOC_START.match(lines[start]):
+        return start
+    first = lines[start].strip()
+    for quote in ('"""', "'''"):
+        if quote in first:
+            if first.count(quote) >= 2:
+                return start + 1
+            end = start + 1
+            while end < limit and quote not in lines[end]:
+                end += 1
+            return min(end + 1, limit)
+    if first.startswith('/*'):
+        end = start
+        while end < limit and '*/' not in lines[end]:
+            end += 1
+        return min(end + 1, limit)
+    end = start
+    while end < limit and _COMMENT_LINE.match(lines[end]) and lines[end].strip():
+        end += 1
+    return end
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def _block_end(lines: List[str], start: int, body_start: int, limit: int) -> int:
+    """Return where a definition's body ends: the first line dedented to its level."""
+    level = _indent(lines[start])
+    n = body_start
+    while n < limit:
+        stripped = lines[n].strip()
+        # Closing brackets and Ruby/Lua "end" still belong to the block
+        if stripped and _indent(lines[n]) <= level and not stripped.startswith(('}', ')', ']', 'end')):
+            break
+        n += 1
+    return n
+
+
+def _chunked(start: int, end: int, score: float, label: str) -> List[Span]:
+    """Split [start, end) into BODY_HEAD_LINES-line spans of slowly decreasing score."""
+    return [Span(n, min(end, n + BODY_HEAD_LINES), score - 0.01 * i, label)
+            for i, n in enumerate(range(start, end, BODY_HEAD_LINES))]
+
+
+def _top_level(lines: List[str], start: int, end: int) -> List[Span]:
+    """Spans of module-level statements in [start, end), skipping imports and comments."""
+    code = [n for n in range(start, end)
+            if lines[n].strip() and not _IMPORT_LINE.match(lines[n]) and not _COMMENT_LINE.match(lines[n])]
+    if not code:
+        return []
+    return _chunked(code[0], code[-1] + 1, TOP_LEVEL_SCORE, 'top-level')
+
+
+def _candidate_spans(lines: List[str], symbols: list, definitions: Optional[list] = None) -> List[Span]:
+    spans = []
+    # Exact block ends (exclusive, 0-based) from parser definition spans, by start line;
+    # regex extractors leave the end unknown
+    block_ends = {row[3] - 1: row[4] for row in definitions or () if row[4] is not None}
+    definitions = sorted({(line - 1, kind, name) for kind, name, line in symbols
+                          if kind in SIGNATURE_SCORE and 0 < line <= len(lines)})
+    starts = [start for start, _, _ in definitions] + [len(lines)]
+
+    # Module docstring or leading comment, unless it is a license header
+    first_code = 0
+    while first_code < len(lines) and not lines[first_code].strip():
+        first_code += 1
+    doc_end = _doc_end(lines, first_code, starts[0])
+    if doc_end > first_code and not _LICENSE.search('\n'.join(lines[first_code:doc_end])):
+        spans.append(Span(first_code, doc_end, MODULE_DOC_SCORE, 'module-doc'))
+    spans.extend(_top_level(lines, max(first_code, doc_end), starts[0]))
+
+    for i, (start, kind, name) in enumerate(definitions):
+        limit = starts[i + 1]
+        signature_end = _signature_end(lines, start, limit)
+        spans.append(Span(start, signature_end, SIGNATURE_SCORE[kind], f'{kind}:{name}'))
+        doc_start = signature_end
+        while doc_start < limit and not lines[doc_start].strip():
+            doc_start += 1
+        doc_end = _doc_end(lines, doc_start, limit)
+        if doc_end > doc_start:
+            spans.append(Span(doc_start, doc_end, DOCSTRING_SCORE, f'doc:{name}'))
+        body_start = max(signature_end, doc_end)
+        if start in block_ends:
+            body_end = max(body_start, min(limit, block_ends[start]))
+        else:
+            body_end = _block_end(lines, start, body_start, limit)
+        if body_start < body_end:
+            head_end = min(body_end, body_start + BODY_HEAD_LINES)
+            spans.append(Span(body_start, head_end, BODY_SCORE, f'body:{name}'))
+            spans.extend(_chunked(head_end, body_end, BODY_SCORE / 2, f'body-rest:{name}'))
+        # Module-level code between this definition and the next one
+        spans.extend(_top_level(lines, body_end, limit))
+    return spans
+
+
+def build_context(source: str, symbols: list, token_budget: int,
+                  imports: Optional[list] = None, definitions: Optional[list] = None) -> Tuple[str, dict]:
+    """Select the highest-value spans of `source` within `token_budget` tokens.
+
+    `symbols` are [kind, name, line] triples as produced by the extractors.
+    Extractors that parse the file (see PythonASTExtractor) also provide
+    `definitions` rows whose exact line spans replace the indentation
+    heuristic for finding where each body ends.
+
+    Returns the prompt text (spans in file order, gaps marked with '...')
+    and stats: tokens, budget, selected/total lines and definitions covered.
+    """
+    lines = split_lines(source)
+    labels = {f'{kind}:{name}' for kind, name, _ in symbols if kind in SIGNATURE_SCORE}
+    stats = {'budget': token_budget, 'total_lines': len(lines), 'definitions': len(labels)}
+    if estimate_tokens(source) <= token_budget:
+        stats.update(tokens=estimate_tokens(source), lines=len(lines),
+                     definitions_covered=len(labels), truncated=False)
+        return source, stats
+
+    header = f"Imports: {', '.join(dict.fromkeys(imports))}\n" if imports else ''
+    used = estimate_tokens(header)
+    selected = [False] * len(lines)
+    covered = set()
+    spans = _candidate_spans(lines, symbols, definitions)
+    # Highest score first; earlier spans win ties so the file reads top-down
+    for span in sorted(spans, key=lambda s: (-s.score, s.start)):
+        text = '\n'.join(line for n, line in enumerate(lines[span.start:span.end], span.start)
+                         if not selected[n])
+        cost = estimate_tokens(text) + 2  # Joining newline plus a possible elision marker
+        if used + cost > token_budget:
+            continue
+        used += cost
+        for n in range(span.start, span.end):
+            selected[n] = True
+        if span.label.startswith(('class:', 'function:')):
+            covered.add(span.label)
+
+    out, gap = [], False
+    for n, line in enumerate(lines):
+        if selected[n]:
+            out.append(line)
+            gap = False
+        elif not gap:
+            out.append(ELISION)
+            gap = True
+    text = header + '\n'.join(out)
+    stats.update(
+        tokens=estimate_tokens(text),
+        lines=sum(selected),
+        definitions_covered=len(covered),
+        truncated=True,
+    )
+    return text, stats
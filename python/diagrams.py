@@ -0,0 +1,256 @@
+"""
+Bounded, clustered Mermaid diagrams of the code graph.
+
+One node per class and function stops rendering long before repositories
+get large. Instead, files are grouped by directory: starting from the
+repository root, the heaviest directories (by symbol count) are expanded
+into Mermaid subgraphs of their children for as long as the node budget
+allows, and every directory left unexpanded becomes one summary node.
+Edges between files are aggregated into weighted edges between the visible
+nodes, and only the heaviest are drawn.
+
+Each package (the first `package_depth` directories of a path) also gets a
+drill-down diagram built the same way from its own files, with the packages
+it connects to as single external nodes. Diagram size is capped by
+DIAGRAM_MAX_NODES and DIAGRAM_MAX_EDGES whatever the size of the graph;
+building one is a single pass over the table's nodes and edges.
+"""
+
+import heapq
+import os
+import posixpath
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from symbol_table import CLASS, FUNCTION, SymbolTable
+
+ROOT_PACKAGE = '(root)'
+# Visible node standing for the lightest top-level entries when they alone exceed the budget
+OVERFLOW = '\0overflow'
+
+
+def package_of(file_path: str, depth: int = 1) -> str:
+    """Return the package of a file: its first `depth` directories, or '(root)'."""
+    parts = file_path.replace('\\', '/').split('/')[:-1]
+    return '/'.join(parts[:depth]) or ROOT_PACKAGE
+
+
+def _label(text: str) -> str:
+    return '"' + text.replace('"', '#quot;') + '"'
+
+
+def _plural(count: int, noun: str) -> str:
+    return f"{count} {noun}{'' if count == 1 else 'es' if noun.endswith('s') else 's'}"
+
+
+class _Tree:
+    """Directory tree over a set of files with per-node symbol weights."""
+
+    def __init__(self, files: Dict[str, List[int]], root: str):
+        self.root = root
+        self.files = files
+        self.children: Dict[str, Set[str]] = defaultdict(set)
+        # [files, classes, functions] under each directory
+        self.totals: Dict[str, List[int]] = defaultdict(lambda: [0, 0, 0])
+        for path, (classes, functions) in files.items():
+            child = path
+            while child and child != root:
+                parent = posixpath.dirname(child)
+                self.children[parent].add(child)
+                total = self.totals[parent]
+                total[0] += 1
+                total[1] += classes
+                total[2] += functions
+                child = parent
+
+    def weight(self, path: str) -> int:
+        if path in self.files:
+            return 1 + sum(self.files[path])
+        files, classes, functions = self.totals[path]
+        return files + classes + functions
+
+    def cluster(self, max_nodes: int) -> Tuple[Set[str], Set[str]]:
+        """Return (visible nodes, expanded directories) within `max_nodes` visible nodes.
+
+        Directories are expanded heaviest first; an expansion that would
+        overflow the budget is skipped and the directory stays collapsed.
+        """
+        visible, expanded = set(), {self.root}
+        heap = []
+
+        def show(path: str) -> None:
+            visible.add(path)
+            if path in self.children:
+                heapq.heappush(heap, (-self.weight(path), path))
+
+        top = sorted(self.children.get(self.root, ()), key=lambda path: (-self.weight(path), path))
+        if len(top) > max_nodes:
+            top, rest = top[:max(0, max_nodes - 1)], top[max(0, max_nodes - 1):]
+            total = self.totals[OVERFLOW] = [0, 0, 0, len(rest)]
+            for path in rest:
+                counts = [1, *self.files[path]] if path in self.files else self.totals[path]
+                for i in range(3):
+                    total[i] += counts[i]
+            visible.add(OVERFLOW)
+        for child in top:
+            show(child)
+        while heap:
+            _, path = heapq.heappop(heap)
+            children = self.children[path]
+            if len(visible) - 1 + len(children) > max_nodes:
+                continue
+            visible.discard(path)
+            expanded.add(path)
+            for child in children:
+                show(child)
+        return visible, expanded
+
+    def describe(self, path: str) -> str:
+        if path == OVERFLOW:
+            files, classes, functions, entries = self.totals[OVERFLOW]
+            return (f"… {entries} more entries<br/>{_plural(files, 'file')}, {_plural(classes, 'class')}, "
+                    f"{_plural(functions, 'function')}")
+        name = posixpath.basename(path) or path
+        if path in self.files:
+            classes, functions = self.files[path]
+            return f"{name}<br/>{_plural(classes, 'class')}, {_plural(functions, 'function')}"
+        files, classes, functions = self.totals[path]
+        return (f"{name}/<br/>{_plural(files, 'file')}, {_plural(classes, 'class')}, "
+                f"{_plural(functions, 'function')}")
+
+
+class DiagramBuilder:
+    """Build bounded overview and per-package Mermaid diagrams from a SymbolTable."""
+
+    def __init__(self, table: SymbolTable, max_nodes: int = 60, max_edges: int = 100,
+                 package_depth: int = 1):
+        self.max_nodes = max_nodes
+        self.max_edges = max_edges
+        self.package_depth = package_depth
+        # [classes, functions] per file
+        self.files: Dict[str, List[int]] = {}
+        # (source file, target file, relation) -> number of symbol-level edges
+        self.edges: Counter = Counter()
+
+        path_of = [path.replace('\\', '/') for path in table.pool.strings]
+        node_path = [path_of[file_id] for file_id in table.node_file]
+        for kind, path in zip(table.node_kind, node_path):
+            counts = self.files.setdefault(path, [0, 0])
+            if kind == CLASS:
+                counts[0] += 1
+            elif kind == FUNCTION:
+                counts[1] += 1
+        for source, target, relation in table.edges():
+            source_path, target_path = node_path[source], node_path[target]
+            if source_path != target_path:
+                self.edges[source_path, target_path, relation] += 1
+
+        self.packages: Dict[str, Dict[str, List[int]]] = defaultdict(dict)
+        for path, counts in self.files.items():
+            self.packages[package_of(path, package_depth)][path] = counts
+        # Edges touching each package, so drill-downs never rescan the whole graph
+        self.package_edges: Dict[str, list] = defaultdict(list)
+        for key in self.edges:
+            source_package, target_package = package_of(key[0], package_depth), package_of(key[1], package_depth)
+            self.package_edges[source_package].append(key)
+            if target_package != source_package:
+                self.package_edges[target_package].append(key)
+        self._overview: Optional[Tuple[_Tree, Set[str], Set[str]]] = None
+
+    @classmethod
+    def from_env(cls, table: SymbolTable, package_depth: int = 1) -> "DiagramBuilder":
+        return cls(table,
+                   max_nodes=int(os.getenv("DIAGRAM_MAX_NODES", "60")),
+                   max_edges=int(os.getenv("DIAGRAM_MAX_EDGES", "100")),
+                   package_depth=package_depth)
+
+    def _render(self, tree: _Tree, visible: Set[str], expanded: Set[str], edges,
+                external: Optional[Dict[str, str]] = None) -> str:
+        """Render the clustered tree and the heaviest of `edges` between its visible nodes.
+
+        `external` maps files outside the tree to the node they collapse into.
+        """
+        external = external or {}
+        ids: Dict[str, str] = {}
+        lines = ["```mermaid", "graph LR"]
+
+        def emit(path: str, indent: str) -> None:
+            for child in sorted(tree.children.get(path, ())):
+                if child in expanded:
+                    ids[child] = f"d{len(ids)}"
+                    lines.append(f"{indent}subgraph {ids[child]}[{_label(posixpath.basename(child) + '/')}]")
+                    emit(child, indent + '    ')
+                    lines.append(f"{indent}end")
+                elif child in visible:
+                    ids[child] = f"n{len(ids)}"
+                    shape = '[{}]' if child in tree.files else '[[{}]]'
+                    lines.append(indent + ids[child] + shape.format(_label(tree.describe(child))))
+
+        emit(tree.root, '    ')
+        if OVERFLOW in visible:
+            ids[OVERFLOW] = f"n{len(ids)}"
+            lines.append(f"    {ids[OVERFLOW]}[[{_label(tree.describe(OVERFLOW))}]]")
+        for name in sorted(set(external.values())):
+            ids[name] = f"x{len(ids)}"
+            lines.append(f"    {ids[name]}([{_label(name)}])")
+
+        def node_of(path: str) -> Optional[str]:
+            if path not in tree.files:
+                return external.get(path)
+            while path not in visible and path != tree.root:
+                path = posixpath.dirname(path)
+            if path in visible:
+                return path
+            # Only the top-level entries folded into the overflow node are not under a visible node
+            return OVERFLOW if OVERFLOW in visible else None
+
+        weights = Counter()
+        for key in edges:
+            source, target = node_of(key[0]), node_of(key[1])
+            if source and target and source != target:
+                weights[source, target, key[2]] += self.edges[key]
+        ranked = sorted(weights.items(), key=lambda item: (-item[1], item[0]))
+        for (source, target, relation), weight in ranked[:self.max_edges]:
+            label = relation if weight == 1 else f"{relation} ×{weight}"
+            lines.append(f"    {ids[source]} -->|{_label(label)}| {ids[target]}")
+        if len(ranked) > self.max_edges:
+            lines.append(f"    %% {len(ranked) - self.max_edges} lighter edges omitted")
+        lines.append("```")
+        return '\n'.join(lines) + '\n\n'
+
+    def overview(self) -> str:
+        """Return the repository-wide diagram as a fenced Mermaid block."""
+        if self._overview is None:
+            tree = _Tree(self.files, '')
+            self._overview = (tree, *tree.cluster(self.max_nodes))
+        return self._render(*self._overview, self.edges)
+
+    def drill_down_packages(self) -> List[str]:
+        """Packages with files the overview collapsed, heaviest first."""
+        self.overview()
+        _, visible, _ = self._overview
+        partial = [package for package, files in self.packages.items()
+                   if any(path not in visible for path in files)]
+        return sorted(partial, key=lambda package: (-sum(map(sum, self.packages[package].values())), package))
+
+    def package(self, package: str) -> str:
+        """Return the drill-down diagram of one package as a fenced Mermaid block.
+
+        Other packages it imports or is imported by appear as single external
+        nodes, at most a quarter of the node budget, heaviest first.
+        """
+        files = self.packages.get(package, {})
+        edges = self.package_edges.get(package, [])
+        outside = {}
+        external_weight = Counter()
+        for key in edges:
+            for inside, other in ((key[0], key[1]), (key[1], key[0])):
+                if inside in files and other not in files:
+                    outside[other] = package_of(other, self.package_depth)
+                    external_weight[outside[other]] += self.edges[key]
+        kept = {name for name, _ in external_weight.most_common(max(1, self.max_nodes // 4))}
+        external = {path: name for path, name in outside.items() if name in kept}
+
+        tree = _Tree(files, '' if package == ROOT_PACKAGE else package)
+        visible, expanded = tree.cluster(max(1, self.max_nodes - len(kept)))
+        return self._render(tree, visible, expanded, edges, external)
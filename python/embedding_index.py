@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Vector index over file and symbol summaries for "where is X implemented" queries.
+
+After analysis, every file's AI summary and every class/function description
+is embedded in batched requests through the RequestScheduler. Vectors are
+L2-normalized and stored as a float16 matrix under outputs/<repo>/embeddings/
+that is memory-mapped at query time, so searching never loads the whole index
+into memory.
+
+Small indexes are searched exactly. Larger ones also get an inverted-file
+(IVF) partition: vectors are clustered with spherical k-means and stored
+grouped by cluster, and a query only scores the rows of its `nprobe` nearest
+clusters.
+
+Usage:
+    python python/embedding_index.py <repo_url> "where is rate limiting implemented" [--k 10] [--exact]
+"""
+
+import json
+import math
+import os
+import sys
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from artifacts import describe, output_dir_for
+from request_scheduler import RequestScheduler
+
+INDEX_DIR = 'embeddings'
+VECTORS_FILE = 'vectors.f16'
+META_FILE = 'index.json'
+IVF_FILE = 'ivf.npz'
+
+# Indexes smaller than this are always searched exactly
+IVF_MIN_VECTORS = 20000
+# Rows scored per block when scanning the memory-mapped matrix
+SEARCH_BLOCK_ROWS = 65536
+# Longest excerpt of the embedded text kept for displaying results
+SUMMARY_CHARS = 200
+
+
+def index_dir_for(repo_url: str) -> str:
+    """Return the embedding index directory for `repo_url`."""
+    return os.path.join(output_dir_for(repo_url), INDEX_DIR)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def train_ivf(vectors: np.ndarray, nlist: int, iterations: int = 8,
+              sample_per_list: int = 64, seed: int = 0) -> np.ndarray:
+    """Cluster unit vectors with spherical k-means on a sample; return (nlist, dim) centroids."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), nlist * sample_per_list)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))],
+                        dtype=np.float32)
+    centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        counts = np.bincount(assignments, minlength=nlist)
+        empty = counts == 0
+        # Re-seed empty clusters from random sample rows
+        sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+        centroids = _normalize(sums)
+    return centroids
+
+
+def assign_ivf(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Return the nearest centroid of every vector, computed block by block."""
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), SEARCH_BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+class _TopK:
+    """Running top-k of (score, row) pairs fed in blocks."""
+
+    def __init__(self, k: int):
+        self.k = k
+        self.scores = np.empty(0, dtype=np.float32)
+        self.rows = np.empty(0, dtype=np.int64)
+
+    def add(self, scores: np.ndarray, first_row: int) -> None:
+        if len(scores) > self.k:
+            keep = np.argpartition(scores, -self.k)[-self.k:]
+        else:
+            keep = np.arange(len(scores))
+        self.scores = np.concatenate([self.scores, scores[keep]])
+        self.rows = np.concatenate([self.rows, keep + first_row])
+        if len(self.scores) > self.k:
+            keep = np.argpartition(self.scores, -self.k)[-self.k:]
+            self.scores, self.rows = self.scores[keep], self.rows[keep]
+
+    def results(self) -> List[tuple]:
+        order = np.argsort(-self.scores)
+        return [(float(self.scores[i]), int(self.rows[i])) for i in order]
+
+
+class EmbeddingIndex:
+    """Unit-length float16 vectors with per-row metadata and an optional IVF partition."""
+
+    def __init__(self, vectors: np.ndarray, entries: List[dict],
+                 centroids: Optional[np.ndarray] = None, offsets: Optional[np.ndarray] = None,
+                 model: Optional[str] = None):
+        self.vectors = vectors
+        self.entries = entries
+        # Rows of IVF list i are vectors[offsets[i]:offsets[i + 1]]
+        self.centroids = centroids
+        self.offsets = offsets
+        self.model = model
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1] if len(self.vectors) else 0
+
+    @classmethod
+    def build(cls, vectors, entries: List[dict], nlist: Optional[int] = None,
+              model: Optional[str] = None) -> "EmbeddingIndex":
+        """Normalize `vectors` and, for large indexes, group them into IVF lists.
+
+        `nlist` defaults to sqrt(n) once there are IVF_MIN_VECTORS vectors;
+        pass 0 to force an exact-only index.
+        """
+        vectors = _normalize(vectors)
+        if nlist is None:
+            nlist = int(math.sqrt(len(vectors))) if len(vectors) >= IVF_MIN_VECTORS else 0
+        if not nlist:
+            return cls(vectors.astype(np.float16), list(entries), model=model)
+        centroids = train_ivf(vectors, nlist)
+        assignments = assign_ivf(vectors, centroids)
+        order = np.argsort(assignments, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=nlist))])
+        return cls(vectors[order].astype(np.float16), [entries[i] for i in order],
+                   centroids.astype(np.float32), offsets.astype(np.int64), model)
+
+    def save(self, directory: str) -> dict:
+        """Write the index files into `directory` and return a reference to the vectors."""
+        os.makedirs(directory, exist_ok=True)
+        vectors_path = os.path.join(directory, VECTORS_FILE)
+        np.ascontiguousarray(self.vectors, dtype=np.float16).tofile(f"{vectors_path}.tmp")
+        os.replace(f"{vectors_path}.tmp", vectors_path)
+        ivf_path = os.path.join(directory, IVF_FILE)
+        if self.centroids is not None:
+            with open(f"{ivf_path}.tmp", 'wb') as f:
+                np.savez(f, centroids=self.centroids, offsets=self.offsets)
+            os.replace(f"{ivf_path}.tmp", ivf_path)
+        elif os.path.exists(ivf_path):
+            os.remove(ivf_path)
+        meta_path = os.path.join(directory, META_FILE)
+        with open(f"{meta_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump({'count': len(self), 'dim': self.dim, 'model': self.model,
+                       'ivf_lists': 0 if self.centroids is None else len(self.centroids),
+                       'entries': self.entries}, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+        return {**describe(vectors_path), 'count': len(self), 'dim': self.dim,
+                'ivf_lists': 0 if self.centroids is None else len(self.centroids)}
+
+    @classmethod
+    def load(cls, directory: str) -> "EmbeddingIndex":
+        """Open a saved index; the vectors stay memory-mapped on disk."""
+        with open(os.path.join(directory, META_FILE), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['count']:
+            vectors = np.memmap(os.path.join(directory, VECTORS_FILE), dtype=np.float16, mode='r',
+                                shape=(meta['count'], meta['dim']))
+        else:
+            vectors = np.empty((0, meta['dim']), dtype=np.float16)
+        centroids = offsets = None
+        if meta.get('ivf_lists'):
+            with np.load(os.path.join(directory, IVF_FILE)) as ivf:
+                centroids, offsets = ivf['centroids'], ivf['offsets']
+        return cls(vectors, meta['entries'], centroids, offsets, meta.get('model'))
+
+    def _score_rows(self, query: np.ndarray, start: int, end: int, top: _TopK) -> int:
+        for block_start in range(start, end, SEARCH_BLOCK_ROWS):
+            block = np.asarray(self.vectors[block_start:min(end, block_start + SEARCH_BLOCK_ROWS)],
+                               dtype=np.float32)
+            top.add(block @ query, block_start)
+        return end - start
+
+    def search(self, query: Sequence[float], k: int = 10, nprobe: Optional[int] = None,
+               exact: bool = False) -> List[dict]:
+        """Return the `k` entries most similar to `query`, best first, each with its score.
+
+        IVF indexes probe the `nprobe` nearest lists (default: an eighth of
+        them, at least 8) unless `exact` is set.
+        """
+        query = _normalize(query)
+        if len(query) != self.dim:
+            raise ValueError(f"Query has {len(query)} dimensions; the index has {self.dim}")
+        top = _TopK(k)
+        if exact or self.centroids is None:
+            self._score_rows(query, 0, len(self), top)
+        else:
+            if nprobe is None:
+                nprobe = max(8, len(self.centroids) // 8)
+            nprobe = min(nprobe, len(self.centroids))
+            for cluster in np.argpartition(self.centroids @ query, -nprobe)[-nprobe:]:
+                self._score_rows(query, int(self.offsets[cluster]), int(self.offsets[cluster + 1]), top)
+        return [{**self.entries[row], 'score': round(score, 4)} for score, row in top.results()]
+
+
+class EmbeddingIndexer:
+    """Collect file and symbol summaries during analysis and embed them in batches."""
+
+    def __init__(self, scheduler: RequestScheduler, batch_size: int = 100):
+        self.scheduler = scheduler
+        self.batch_size = max(1, batch_size)
+        self.entries: List[dict] = []
+        self.texts: List[str] = []
+        self.stats = {'entries': 0, 'batches': 0, 'failed_batches': 0}
+
+    def _add(self, text: str, **entry) -> None:
+        self.entries.append({**entry, 'summary': ' '.join(text.split())[:SUMMARY_CHARS]})
+        self.texts.append(text)
+
+    def add_file(self, file_path: str, data: dict) -> None:
+        """Queue a file's analysis and its symbol descriptions for embedding."""
+        lines = {(kind, name): line for kind, name, line in data.get('symbols', [])}
+        analysis = data.get('ai_analysis')
+        if analysis and not analysis.startswith("AI analysis failed"):
+            self._add(f"File {file_path}: {analysis}", kind='file', path=file_path, name=file_path, line=1)
+        for kind, key in (('class', 'class_descriptions'), ('function', 'function_descriptions')):
+            for name, description in data.get(key, {}).items():
+                self._add(f"{kind.capitalize()} {name} in {file_path}: {description}",
+                          kind=kind, path=file_path, name=name, line=lines.get((kind, name)))
+
+    def _embed(self, texts: List[str]) -> Optional[List[List[float]]]:
+        try:
+            return self.scheduler.generate_embeddings(texts)
+        except Exception as e:
+            print(f"Embedding batch failed: {e}", file=sys.stderr)
+            return None
+
+    def build(self, nlist: Optional[int] = None) -> EmbeddingIndex:
+        """Embed every queued text, batches in parallel, and build the index."""
+        batches = [(start, self.texts[start:start + self.batch_size])
+                   for start in range(0, len(self.texts), self.batch_size)]
+        results = self.scheduler.map(lambda batch: self._embed(batch[1]), batches)
+        vectors, entries = [], []
+        for (start, texts), embedded in zip(batches, results):
+            if embedded is None:
+                self.stats['failed_batches'] += 1
+                continue
+            vectors.extend(embedded)
+            entries.extend(self.entries[start:start + len(texts)])
+        self.stats.update(entries=len(entries), batches=len(batches))
+        model = getattr(self.scheduler.connector, 'embedding_model_name', None)
+        if not vectors:
+            return EmbeddingIndex(np.empty((0, 0), dtype=np.float16), [], model=model)
+        return EmbeddingIndex.build(np.asarray(vectors, dtype=np.float32), entries, nlist, model)
+
+
+def search_code(repo_url: str, query: str, scheduler: RequestScheduler, k: int = 10,
+                exact: bool = False, index: Optional[EmbeddingIndex] = None) -> dict:
+    """Answer a natural-language code search against a repository's saved index."""
+    try:
+        if index is None:
+            index = EmbeddingIndex.load(index_dir_for(repo_url))
+        if not len(index):
+            return {"status": "success", "query": query, "results": []}
+        vector = scheduler.generate_embeddings([query], task_type="retrieval_query")[0]
+        return {"status": "success", "query": query, "results": index.search(vector, k, exact=exact)}
+    except FileNotFoundError:
+        return {"status": "error", "error": f"No embedding index for {repo_url}; generate its documentation first"}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+def main():
+    """Run one search from the command line and print the JSON result."""
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+    from gemini_connector import GeminiConnector
+    from llm_cache import LLMCache
+
+    args = sys.argv[1:]
+    exact = '--exact' in args
+    k = int(args[args.index('--k') + 1]) if '--k' in args else 10
+    positional = [arg for i, arg in enumerate(args)
+                  if not arg.startswith('--') and (i == 0 or args[i - 1] != '--k')]
+    if len(positional) < 2:
+        print(json.dumps({"status": "error", "error": "Usage: embedding_index.py <repo_url> <query> [--k N] [--exact]"}))
+        sys.exit(1)
+    cache = LLMCache.from_env()
+    scheduler = RequestScheduler.from_env(GeminiConnector(cache=cache))
+    try:
+        print(json.dumps(search_code(positional[0], positional[1], scheduler, k, exact)))
+    finally:
+        scheduler.shutdown()
+        if cache:
+            cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,469 @@
+"""
+Language extractor registry for source parsing.
+
+Each LanguageExtractor compiles its function, class and import patterns into
+a single alternation so a file is scanned once, yielding every symbol with
+its line number. Python files are parsed with the `ast` module instead, which
+also yields a definition table with qualified names and line spans.
+Extractors are looked up by file extension; adding a language means
+registering another extractor.
+"""
+
+import ast
+import os
+import re
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Keywords that look like "<type> <name>(" in C-family languages
+_CONTROL_WORDS = r'(?!(?:return|new|throw|else|if|for|while|switch|case|catch|do|delete|sizeof)\b)'
+
+# The first plain (non-"(?") capture group in a pattern
+_CAPTURE_GROUP = re.compile(r'(?<!\\)\((?!\?)')
+
+# Indentation before a symbol; possessive (3.11+) so failed lines never backtrack
+_INDENT = r'[ \t]*+' if sys.version_info >= (3, 11) else r'[ \t]*'
+
+# Leading modifier words, e.g. "public static" or "private inline"
+_MODIFIERS = r'(?:[\w@]+[ \t]+)*?'
+
+# "name(" and "receiver.name(" call sites, matched on the reversed source: a pattern
+# starting with a literal lets the engine skip to each "(" instead of trying every word start
+_REVERSED_CALL = re.compile(r'\([ \t]*(\w+)(\.\w*)?')
+
+# Receivers whose attribute calls stay within the caller's own class
+_SELF_RECEIVERS = frozenset({'self', 'cls', 'this'})
+
+# Words followed by "(" that are not calls
+_NOT_CALLS = frozenset({
+    'if', 'elif', 'for', 'foreach', 'while', 'switch', 'catch', 'return', 'function', 'func', 'fn', 'def',
+    'sizeof', 'typeof', 'and', 'or', 'not', 'in', 'is', 'with', 'assert', 'yield', 'await', 'lambda',
+    'print', 'super', 'this', 'self', 'until', 'unless', 'when', 'match', 'using', 'lock', 'fixed',
+})
+
+
+def _region_calls(code: str, scopes: List[Tuple[int, Optional[int], str]]) -> list:
+    """Return [caller, callee] pairs for definitions given as (start, end, name) offsets.
+
+    The callee is the called name, prefixed with '.' when it is an attribute
+    of something other than self, cls or this ("items.append(" gives ".append").
+
+    Scopes are in source order; each owns its text after its header line
+    except for nested scopes, and a scope without an end runs until the
+    next one starts. Every region is scanned with one C-level findall, so
+    the Python work is per definition, not per call site. Strings and
+    comments are scanned too; resolving callees against known definitions
+    discards most of what they contribute.
+    """
+    found: Dict[str, Dict[Tuple[str, str], None]] = {}
+
+    def scan(owner: str, start: int, end: int) -> None:
+        if start < end:
+            names = _REVERSED_CALL.findall(code[start:end][::-1])
+            names.reverse()
+            found.setdefault(owner, {}).update(dict.fromkeys(names))
+
+    stack: List[Tuple[Optional[int], str]] = []
+    position = 0
+    for start, end, name in scopes:
+        while stack and stack[-1][0] is not None and stack[-1][0] <= start:
+            scope_end, owner = stack.pop()
+            scan(owner, position, scope_end)
+            position = scope_end
+        if stack:
+            scan(stack[-1][1], position, start)
+        header_end = code.find('\n', start)
+        position = len(code) if header_end < 0 else header_end + 1
+        stack.append((end, name))
+    while stack:
+        scope_end, owner = stack.pop()
+        scope_end = len(code) if scope_end is None else scope_end
+        scan(owner, position, scope_end)
+        position = max(position, scope_end)
+
+    calls = []
+    for owner, names in found.items():
+        seen = set()
+        for name, receiver in names:
+            name = name[::-1]
+            if name[0].isdigit() or name in _NOT_CALLS:
+                continue
+            if receiver and receiver[:0:-1] not in _SELF_RECEIVERS:
+                name = '.' + name
+            if name not in seen:
+                seen.add(name)
+                calls.append([owner, name])
+    return calls
+
+
+class LanguageExtractor:
+    """Single-pass regex extractor for one language.
+
+    Patterns are line patterns: they are matched at the start of a line after
+    any indentation, and each must capture the symbol name in its first group.
+    All branches share a leading newline so the regex engine can jump from
+    line to line instead of attempting a match at every character.
+    """
+
+    def __init__(self, language: str, extensions: Iterable[str],
+                 functions: Iterable[str] = (), classes: Iterable[str] = (),
+                 imports: Iterable[str] = ()):
+        self.language = language
+        self.extensions = tuple(extensions)
+        branches = []
+        self._kinds = {}
+        for kind, patterns in (('function', functions), ('class', classes), ('import', imports)):
+            for pattern in patterns:
+                if re.compile(pattern).groups != 1:
+                    raise ValueError(f"{language} pattern must have exactly one capture group: {pattern}")
+                # Name the capture group so match.lastgroup identifies the branch
+                label = f"{kind}_{len(self._kinds)}"
+                branches.append(_CAPTURE_GROUP.sub(f"(?P<{label}>", pattern, count=1))
+                self._kinds[label] = kind
+        self.pattern = re.compile(r'\n' + _INDENT + '(?:' + '|'.join(branches) + ')', re.MULTILINE)
+
+    def extract(self, code: str) -> dict:
+        """Scan `code` once, returning symbol names by kind plus [kind, name, line] symbols.
+
+        Also returns 'definitions' rows in PythonASTExtractor's layout, with
+        each definition's parent taken from indentation (the nearest less
+        indented definition above it) and the end line None, since a line
+        scan cannot tell where a body ends. 'calls' pairs each definition
+        with the names it calls, as [caller, callee].
+        """
+        text = '\n' + code
+        count = text.count
+        kinds = self._kinds
+        grouped = {'function': [], 'class': [], 'import': []}
+        symbols, definitions, scopes = [], [], []
+        # (indent, name, kind) of the definitions enclosing the current line
+        scope = []
+        line, last = 0, 0
+        for match in self.pattern.finditer(text):
+            label = match.lastgroup
+            kind = kinds[label]
+            name = match[label]
+            start = match.start() + 1
+            line += count('\n', last, start)
+            last = start
+            grouped[kind].append(name)
+            symbols.append([kind, name, line])
+            if kind != 'import':
+                indent = start
+                while text[indent] in ' \t':
+                    indent += 1
+                indent -= start
+                while scope and scope[-1][0] >= indent:
+                    scope.pop()
+                parent = scope[-1] if scope else None
+                row_kind = 'method' if kind == 'function' and parent and parent[2] == 'class' else kind
+                definitions.append([name, row_kind, parent[1] if parent else None, line, None, [], ''])
+                scope.append((indent, name, kind))
+                scopes.append((start - 1, None, name))
+        return {
+            'functions': grouped['function'],
+            'classes': grouped['class'],
+            'imports': grouped['import'],
+            'symbols': symbols,
+            'definitions': definitions,
+            'calls': _region_calls(code, scopes) if scopes else [],
+        }
+
+
+# Longest signature or decorator text kept in a definition row
+MAX_SIGNATURE_CHARS = 200
+
+# Statements whose nested bodies may hold definitions or imports
+_COMPOUND = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.With, ast.AsyncWith, ast.Try)
+if sys.version_info >= (3, 11):
+    _COMPOUND += (ast.TryStar,)
+if sys.version_info >= (3, 10):
+    _COMPOUND += (ast.Match,)
+
+
+def _clip(text: str) -> str:
+    return text if len(text) <= MAX_SIGNATURE_CHARS else text[:MAX_SIGNATURE_CHARS - 3] + '...'
+
+
+def _segment(lines: List[str], start_line: int, start_col: int, end_line: int, end_col: int) -> str:
+    """Return source text between two ast positions (1-based lines, UTF-8 byte columns).
+
+    Slicing the source is much cheaper than ast.unparse and keeps the
+    author's spelling; whitespace runs are collapsed to single spaces.
+    """
+    def cut(line: str, start: int, end: Optional[int]) -> str:
+        if line.isascii():
+            return line[start:end]
+        return line.encode('utf-8')[start:end].decode('utf-8', errors='ignore')
+
+    if start_line == end_line:
+        text = cut(lines[start_line - 1], start_col, end_col)
+    else:
+        text = '\n'.join([cut(lines[start_line - 1], start_col, None)] + lines[start_line:end_line - 1]
+                         + [cut(lines[end_line - 1], 0, end_col)])
+    return ' '.join(text.split())
+
+
+_DEF_NAME = re.compile(r'(?:async\s+)?(?:def|class)\s+\w+')
+# The line breaks ast counts; str.splitlines also splits on form feeds and other separators
+_LINE_BREAK = re.compile(r'\r\n|\r|\n')
+
+
+def split_lines(text: str) -> List[str]:
+    """Split `text` into lines numbered as ast numbers them, without a trailing empty line."""
+    lines = _LINE_BREAK.split(text)
+    if not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def _header_signature(text: str) -> str:
+    """Cut a definition header after its name at the colon that opens the body."""
+    depth, quote, i = 0, None, 0
+    while i < len(text):
+        char = text[i]
+        if quote:
+            if char == '\\':
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in '\'"':
+            quote = char
+        elif char in '([{':
+            depth += 1
+        elif char in ')]}':
+            depth -= 1
+        elif char == ':' and depth == 0:
+            return text[:i].strip()
+        i += 1
+    return text.strip()
+
+
+def _scopes(code: str, definitions: list) -> List[Tuple[int, Optional[int], str]]:
+    """Return (start, end) character offsets of each definition row's lines, and its name."""
+    offsets = [0]
+    offsets.extend(match.end() for match in _LINE_BREAK.finditer(code))
+    offsets.append(len(code))
+    last = len(offsets) - 1
+    return [(offsets[min(row[3] - 1, last)], offsets[min(row[4], last)], row[0]) for row in definitions]
+
+
+class PythonASTExtractor:
+    """Python extractor built on `ast`, falling back to regex for unparsable files.
+
+    Returns the LanguageExtractor keys, with exact 'definitions' rows, one per
+    class, function and method:
+        [qualified_name, kind, parent, start_line, end_line, decorators, signature]
+    where kind is 'class', 'function' or 'method', parent is the enclosing
+    definition's qualified name (or None) and lines are 1-based and inclusive.
+    Call sites are attributed to the innermost definition spanning them, and
+    'import_names' maps each `from` import's module to the names it imports.
+    Methods and nested definitions are named by their qualified name
+    ("Service.run"), so symbols with the same name in different scopes stay
+    distinct; strings and comments are never mistaken for definitions.
+    """
+
+    def __init__(self, fallback: LanguageExtractor):
+        self.language = fallback.language
+        self.extensions = fallback.extensions
+        self.fallback = fallback
+
+    def extract(self, code: str) -> dict:
+        try:
+            tree = ast.parse(code)
+        except (SyntaxError, ValueError, RecursionError):
+            # Python 2 sources, templates and the like
+            return self.fallback.extract(code)
+        lines = _LINE_BREAK.split(code)
+        functions, classes, imports, symbols, definitions = [], [], [], [], []
+        import_names = {}
+
+        def header(node) -> str:
+            # "(args) -> returns" or "(bases)": the header text after the name, up to the body
+            first = node.body[0]
+            text = _segment(lines, node.lineno, node.col_offset, first.lineno, first.col_offset)
+            name = _DEF_NAME.match(text)
+            return _header_signature(text[name.end():]) if name else ''
+
+        def visit(body: List[ast.stmt], parent: Optional[str], in_class: bool) -> None:
+            # Depth-first, so symbols come out in source order
+            for node in body:
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    qualname = f"{parent}.{node.name}" if parent else node.name
+                    if isinstance(node, ast.ClassDef):
+                        kind = 'class'
+                        classes.append(qualname)
+                    else:
+                        kind = 'method' if in_class else 'function'
+                        functions.append(qualname)
+                    signature = header(node)
+                    if isinstance(node, ast.AsyncFunctionDef):
+                        signature = 'async ' + signature
+                    decorators = [_clip(_segment(lines, d.lineno, d.col_offset, d.end_lineno, d.end_col_offset))
+                                  for d in node.decorator_list]
+                    symbols.append(['class' if kind == 'class' else 'function', qualname, node.lineno])
+                    definitions.append([qualname, kind, parent, node.lineno, node.end_lineno,
+                                        decorators, _clip(signature)])
+                    visit(node.body, qualname, kind == 'class')
+                elif isinstance(node, ast.Import):
+                    for alias in node.names:
+                        imports.append(alias.name)
+                        symbols.append(['import', alias.name, node.lineno])
+                elif isinstance(node, ast.ImportFrom):
+                    module = '.' * node.level + (node.module or '')
+                    imports.append(module)
+                    import_names.setdefault(module, []).extend(alias.name for alias in node.names)
+                    symbols.append(['import', module, node.lineno])
+                elif isinstance(node, _COMPOUND):
+                    # Conditional definitions and imports belong to the enclosing scope
+                    visit(getattr(node, 'body', []), parent, in_class)
+                    for child in ast.iter_child_nodes(node):
+                        if isinstance(child, ast.excepthandler) or type(child).__name__ == 'match_case':
+                            visit(child.body, parent, in_class)
+                    visit(getattr(node, 'orelse', []), parent, in_class)
+                    visit(getattr(node, 'finalbody', []), parent, in_class)
+
+        try:
+            visit(tree.body, None, False)
+        except RecursionError:
+            return self.fallback.extract(code)
+        return {
+            'functions': functions,
+            'classes': classes,
+            'imports': imports,
+            'import_names': import_names,
+            'symbols': symbols,
+            'definitions': definitions,
+            'calls': _region_calls(code, _scopes(code, definitions)) if definitions else [],
+        }
+
+
+_REGISTRY: Dict[str, LanguageExtractor] = {}
+
+
+def register_extractor(extractor: LanguageExtractor) -> LanguageExtractor:
+    """Register `extractor` for all of its extensions, replacing any previous one.
+
+    Extractors registered at runtime are not visible to parse_code's worker
+    processes unless they are registered at import time of a module those
+    processes import.
+    """
+    for ext in extractor.extensions:
+        _REGISTRY[ext] = extractor
+    return extractor
+
+
+def get_extractor(filename: str) -> Optional[LanguageExtractor]:
+    """Return the extractor for `filename`'s extension, or None if unsupported."""
+    return _REGISTRY.get(os.path.splitext(filename)[1])
+
+
+def supported_extensions() -> set:
+    """Return every registered file extension."""
+    return set(_REGISTRY)
+
+
+def sparse_patterns() -> List[str]:
+    """Return sparse-checkout patterns for files with an extractor plus top-level READMEs.
+
+    .gitignore and .gitattributes files at every level are kept too, so the
+    scanner and the file classifier still honor them.
+    """
+    return [f"*{ext}" for ext in sorted(_REGISTRY)] + ['/README*', '.gitignore', '.gitattributes']
+
+
+# Regex scanner for Python, used for files `ast` cannot parse
+PYTHON_REGEX_EXTRACTOR = LanguageExtractor(
+    'Python', ['.py'],
+    functions=[r'(?:async[ \t]+)?def[ \t]+(\w+)[ \t]*\('],
+    classes=[r'class[ \t]+(\w+)[ \t]*[:\(]'],
+    imports=[r'from[ \t]+(\.*[\w.]*)[ \t]+import\b', r'import[ \t]+([\w.]+)'],
+)
+
+# PYTHON_EXTRACTOR=regex trades symbol accuracy for a much faster scan
+register_extractor(PYTHON_REGEX_EXTRACTOR if os.getenv("PYTHON_EXTRACTOR", "ast").lower() == "regex"
+                   else PythonASTExtractor(PYTHON_REGEX_EXTRACTOR))
+
+register_extractor(LanguageExtractor(
+    'JavaScript', ['.js', '.ts', '.jsx', '.tsx'],
+    functions=[
+        r'(?:export[ \t]+)?(?:default[ \t]+)?(?:async[ \t]+)?function\*?[ \t]*(\w+)',
+        r'(?:export[ \t]+)?(?:const|let|var)[ \t]+(\w+)[ \t]*=[ \t]*(?:async[ \t]+)?'
+        r'(?:function\b|\([^)\n]*\)[ \t]*=>|\w+[ \t]*=>)',
+    ],
+    classes=[r'(?:export[ \t]+)?(?:default[ \t]+)?(?:abstract[ \t]+)?class[ \t]+(\w+)'],
+    imports=[
+        r'import[ \t]+(?:[^\'"\n]*?[ \t]+from[ \t]+)?[\'"]([^\'"]+)[\'"]',
+        r'(?:const|let|var)[ \t]+[^=\n]+=[ \t]*require\([ \t]*[\'"]([^\'"]+)[\'"]',
+    ],
+))
+
+register_extractor(LanguageExtractor(
+    'Java', ['.java'],
+    functions=[_CONTROL_WORDS + r'(?:[\w<>\[\],.?@]+[ \t]+){1,6}(\w+)[ \t]*\('],
+    classes=[_MODIFIERS + r'(?:class|interface|enum)[ \t]+(\w+)'],
+    imports=[r'import[ \t]+(?:static[ \t]+)?([\w.*]+)[ \t]*;'],
+))
+
+register_extractor(LanguageExtractor(
+    'C/C++', ['.cpp', '.c'],
+    functions=[_CONTROL_WORDS + r'(?:[\w:<>,]+[ \t*&]+){1,4}(\w+)[ \t]*\('],
+    classes=[r'class[ \t]+(\w+)'],
+    imports=[r'#[ \t]*include[ \t]*[<"]([^>"]+)[>"]'],
+))
+
+register_extractor(LanguageExtractor(
+    'C#', ['.cs'],
+    functions=[_CONTROL_WORDS + r'(?:[\w<>\[\],.?]+[ \t]+){1,6}(\w+)[ \t]*\('],
+    classes=[_MODIFIERS + r'(?:class|interface|struct)[ \t]+(\w+)'],
+    imports=[r'using[ \t]+(?:static[ \t]+)?([\w.]+)[ \t]*;'],
+))
+
+register_extractor(LanguageExtractor(
+    'PHP', ['.php'],
+    functions=[_MODIFIERS + r'function[ \t]+&?(\w+)[ \t]*\('],
+    classes=[_MODIFIERS + r'class[ \t]+(\w+)'],
+    imports=[r'(?:require|include)(?:_once)?[ \t]*\(?[ \t]*[\'"]([^\'"]+)[\'"]'],
+))
+
+register_extractor(LanguageExtractor(
+    'Ruby', ['.rb'],
+    functions=[r'def[ \t]+(?:self\.)?(\w+[?!=]?)'],
+    classes=[r'class[ \t]+(\w+)'],
+    imports=[r'require(?:_relative)?[ \t]+[\'"]([^\'"]+)[\'"]'],
+))
+
+register_extractor(LanguageExtractor(
+    'Go', ['.go'],
+    functions=[r'func[ \t]+(?:\([^)\n]*\)[ \t]*)?(\w+)'],
+    classes=[r'type[ \t]+(\w+)[ \t]+(?:struct|interface)\b'],
+    imports=[r'import[ \t]+(?:[\w.]+[ \t]+)?"([^"]+)"', r'(?:[\w.]+[ \t]+)?"([^"\n]+)"[ \t]*$'],
+))
+
+register_extractor(LanguageExtractor(
+    'Rust', ['.rs'],
+    functions=[r'(?:pub(?:\([^)\n]*\))?[ \t]+)?(?:(?:async|const|unsafe|extern(?:[ \t]+"[^"\n]*")?)[ \t]+)*fn[ \t]+(\w+)'],
+    classes=[r'(?:pub(?:\([^)\n]*\))?[ \t]+)?(?:struct|enum|trait)[ \t]+(\w+)'],
+    imports=[r'(?:pub[ \t]+)?use[ \t]+([\w:]+)'],
+))
+
+register_extractor(LanguageExtractor(
+    'Swift', ['.swift'],
+    functions=[_MODIFIERS + r'func[ \t]+(\w+)'],
+    classes=[_MODIFIERS + r'(?:class|struct|protocol)[ \t]+(\w+)'],
+    imports=[r'import[ \t]+(\w+)'],
+))
+
+register_extractor(LanguageExtractor(
+    'Kotlin', ['.kt'],
+    functions=[_MODIFIERS + r'fun[ \t]+(?:<[^>\n]*>[ \t]*)?(?:\w+\.)?(\w+)[ \t]*\('],
+    classes=[_MODIFIERS + r'(?:class|interface|object)[ \t]+(\w+)'],
+    imports=[r'import[ \t]+([\w.]+)'],
+))
+
+register_extractor(LanguageExtractor(
+    'Scala', ['.scala'],
+    functions=[_MODIFIERS + r'def[ \t]+(\w+)'],
+    classes=[_MODIFIERS + r'(?:class|object|trait)[ \t]+(\w+)'],
+    imports=[r'import[ \t]+([\w.]+)'],
+))
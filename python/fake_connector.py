@@ -0,0 +1,103 @@
+"""
+Local stand-in for GeminiConnector that injects latency and API errors.
+
+Used to exercise the request scheduler and pipeline without network access
+or API quota.
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from typing import List, Optional
+
+from gemini_connector import GeminiAPIError
+
+EMBEDDING_DIM = 128
+
+
+class FakeConnector:
+    """Deterministic fake LLM connector with configurable latency and failures."""
+
+    def __init__(self, latency: float = 0.05, error_rate: float = 0.0,
+                 error_codes: tuple = (429, 503), seed: Optional[int] = 0,
+                 embedding_dim: int = EMBEDDING_DIM):
+        self.latency = latency
+        self.embedding_dim = embedding_dim
+        self.error_rate = error_rate
+        self.error_codes = error_codes
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _roll_error(self) -> Optional[int]:
+        with self._lock:
+            if self._random.random() < self.error_rate:
+                return self._random.choice(self.error_codes)
+        return None
+
+    def generate_text(self, prompt: str, temperature: float = 0.7) -> str:
+        """Return a canned response derived from the prompt after a delay."""
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            status_code = self._roll_error()
+            if status_code:
+                raise GeminiAPIError(f"Gemini API error: injected {status_code}", status_code)
+            if "Respond with JSON only" in prompt:
+                return self._symbol_batch_response(prompt)
+            digest = hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:8]
+            return f"Fake analysis {digest}"
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _symbol_batch_response(self, prompt: str) -> str:
+        """Answer a batched symbol prompt with a description for every listed name."""
+        files = {}
+        current = None
+        for line in prompt.splitlines():
+            match = re.match(r'^(File|Functions|Classes): (.*)$', line)
+            if not match:
+                continue
+            key, value = match.groups()
+            if key == 'File':
+                current = files.setdefault(value, {'functions': {}, 'classes': {}})
+            elif current is not None:
+                for name in value.split(', '):
+                    current[key.lower()][name] = f"Fake description of {name}"
+        return json.dumps({'files': files})
+
+    def summarize_content(self, text: str) -> str:
+        """Summarize content with the fake model."""
+        return self.generate_text(f"Please provide a concise summary of the following content:\n\n{text}", 0.3)
+
+    def generate_embeddings(self, text: str) -> List[float]:
+        """Return a deterministic hashed bag-of-words embedding for the text.
+
+        Texts sharing words get similar vectors, so similarity search over
+        fake embeddings returns meaningful neighbours.
+        """
+        vector = [0.0] * self.embedding_dim
+        for word in re.findall(r'[a-z0-9]+', text.lower()):
+            digest = hashlib.sha256(word.encode('utf-8')).digest()
+            vector[int.from_bytes(digest[:4], 'little') % self.embedding_dim] += 1.0 if digest[4] & 1 else -1.0
+        return vector
+
+    def generate_embeddings_batch(self, texts: List[str],
+                                  task_type: str = "retrieval_document") -> List[List[float]]:
+        """Embed several texts as one fake request."""
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        status_code = self._roll_error()
+        if status_code:
+            raise GeminiAPIError(f"Gemini embedding error: injected {status_code}", status_code)
+        return [self.generate_embeddings(text) for text in texts]
@@ -0,0 +1,158 @@
+"""
+Detection of generated, minified, vendored and binary source files.
+
+Such files cost parse time and, worse, Gemini prompts, while documenting
+nothing the repository's authors wrote. FileClassifier decides from the path
+first (vendor directories, protobuf and other generator output names,
+.min.js bundles, and linguist-generated / linguist-vendored attributes in the
+root .gitattributes), so most of them are never read. classify_content then
+sniffs the first block of each file that is read: NUL bytes, a generator
+header in the leading comment lines, and line length and entropy typical of
+minified bundles.
+
+Categories in `skip` are not parsed at all; categories in `no_analysis` are
+parsed into the graph but listed without AI analysis; any classified file is
+ranked after all unclassified ones.
+"""
+
+import math
+import os
+import re
+from collections import Counter
+from typing import Iterable, Optional
+
+from scanner import IgnoreRules
+
+BINARY, MINIFIED, GENERATED, VENDORED = 'binary', 'minified', 'generated', 'vendored'
+CATEGORIES = (BINARY, MINIFIED, GENERATED, VENDORED)
+
+# Characters of a file sniffed by classify_content
+SNIFF_CHARS = 8192
+
+# Leading lines searched for a generator header
+HEADER_LINES = 20
+
+# Mean line length of a minified file's first block, or its longest line when the
+# block is also dense (bits of entropy per character)
+MINIFIED_MEAN_LINE = 200
+MINIFIED_LONG_LINE = 4000
+MINIFIED_ENTROPY_BITS = 5.0
+
+_VENDORED_PATH = re.compile(
+    r'(?:^|/)(?:vendor|vendors|third[_-]?party|extern|external|bower_components|jspm_packages|'
+    r'Pods|Carthage|\.yarn|site-packages)/'
+    r'|(?:^|/)(?:jquery|bootstrap|d3|lodash|underscore|backbone|angular|react(?:-dom)?)'
+    r'(?:[.-][\w.-]*)?\.(?:js|css)$',
+    re.IGNORECASE)
+_GENERATED_PATH = re.compile(
+    r'(?:_pb2(?:_grpc)?\.pyi?|\.pb\.(?:go|cc|h|swift)|_pb\.(?:js|d\.ts)|_grpc_pb\.(?:js|d\.ts)|'
+    r'\.pb\.gw\.go|_mock\.go|\.designer\.cs|\.g\.(?:cs|dart)|\.freezed\.dart|'
+    r'[._-]generated\.\w+)$'
+    r'|(?:^|/)(?:generated|__generated__|gen-\w+)/',
+    re.IGNORECASE)
+_MINIFIED_PATH = re.compile(r'[.-]min\.(?:js|mjs|css)$|\.bundle\.js$', re.IGNORECASE)
+
+_COMMENT_START = re.compile(r'\s*(?:#|//|/\*|\*|<!--|--|;|")')
+_GENERATOR_HEADER = re.compile(
+    r'@generated\b|do not edit|\bauto-?generated\b|automatically generated|'
+    r'(?:code|file) (?:was |is )?generated (?:by|from)|generated by the protocol buffer compiler',
+    re.IGNORECASE)
+
+
+def _entropy(text: str) -> float:
+    """Shannon entropy of `text` in bits per character."""
+    total = len(text)
+    return -sum(count / total * math.log2(count / total) for count in Counter(text).values()) if total else 0.0
+
+
+def classify_content(head: str) -> Optional[str]:
+    """Classify a file from its first SNIFF_CHARS characters: binary, generated, minified or None."""
+    if '\0' in head:
+        return BINARY
+    for line in head.split('\n', HEADER_LINES)[:HEADER_LINES]:
+        if line.strip() and not _COMMENT_START.match(line):
+            break
+        if _GENERATOR_HEADER.search(line):
+            return GENERATED
+    lines = head.count('\n') + 1
+    if len(head) / lines > MINIFIED_MEAN_LINE:
+        return MINIFIED
+    if max(map(len, head.split('\n'))) > MINIFIED_LONG_LINE and _entropy(head) > MINIFIED_ENTROPY_BITS:
+        return MINIFIED
+    return None
+
+
+class FileClassifier:
+    """Path-based classification plus the skip/no-analysis policy and per-category counts."""
+
+    def __init__(self, skip: Iterable[str] = (BINARY, MINIFIED, VENDORED),
+                 no_analysis: Iterable[str] = (GENERATED,), attributes: Iterable[str] = ()):
+        self.skip = frozenset(skip)
+        self.no_analysis = frozenset(no_analysis)
+        self.counts = Counter()
+        # linguist-generated / linguist-vendored rules from .gitattributes lines
+        lines = {GENERATED: [], VENDORED: []}
+        for line in attributes:
+            fields = line.split()
+            if not fields or fields[0].startswith('#'):
+                continue
+            for attribute in fields[1:]:
+                for category in (GENERATED, VENDORED):
+                    name = f'linguist-{category}'
+                    if attribute in (name, f'{name}=true'):
+                        lines[category].append(fields[0])
+                    elif attribute in (f'-{name}', f'{name}=false'):
+                        lines[category].append('!' + fields[0])
+        self._attributes = {category: IgnoreRules('', patterns) for category, patterns in lines.items() if patterns}
+
+    @classmethod
+    def from_env(cls, repo_path: Optional[str] = None) -> Optional["FileClassifier"]:
+        """Build a classifier from CLASSIFY_* environment variables, or None if disabled.
+
+        Reads linguist attributes from `repo_path`/.gitattributes when given.
+        """
+        if os.getenv("CLASSIFY_ENABLED", "1").lower() in ("0", "false", "no"):
+            return None
+        attributes = []
+        if repo_path:
+            try:
+                with open(os.path.join(repo_path, '.gitattributes'), 'r', encoding='utf-8', errors='ignore') as f:
+                    attributes = f.read().splitlines()
+            except OSError:
+                pass
+        return cls(
+            skip=_categories(os.getenv("CLASSIFY_SKIP", "binary,minified,vendored")),
+            no_analysis=_categories(os.getenv("CLASSIFY_NO_ANALYSIS", "generated")),
+            attributes=attributes,
+        )
+
+    def classify_path(self, rel_path: str) -> Optional[str]:
+        """Classify a file from its path relative to the checkout, or return None."""
+        path = rel_path.replace('\\', '/')
+        # True or False where .gitattributes sets the attribute, None elsewhere
+        explicit = {category: rules.match(path, False) for category, rules in self._attributes.items()}
+        for category in (GENERATED, VENDORED):
+            if explicit.get(category):
+                return category
+        if explicit.get(VENDORED) is not False and _VENDORED_PATH.search(path):
+            return VENDORED
+        if _MINIFIED_PATH.search(path):
+            return MINIFIED
+        if explicit.get(GENERATED) is not False and _GENERATED_PATH.search(path):
+            return GENERATED
+        return None
+
+    def stats(self) -> dict:
+        return {
+            'counts': {category: self.counts[category] for category in CATEGORIES if self.counts[category]},
+            'skipped': sum(self.counts[category] for category in self.skip),
+            'not_analyzed': sum(self.counts[category] for category in self.no_analysis),
+        }
+
+
+def _categories(value: str) -> frozenset:
+    names = {name.strip().lower() for name in value.split(',') if name.strip()}
+    unknown = names.difference(CATEGORIES)
+    if unknown:
+        raise ValueError(f"Unknown file categories: {', '.join(sorted(unknown))}")
+    return frozenset(names)
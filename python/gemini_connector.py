@@ -1,27 +1,72 @@
 import os
 import google.generativeai as genai
-from typing import Optional, List
+from typing import Callable, Optional, List
+from llm_cache import LLMCache, cache_key
+
+class GeminiAPIError(Exception):
+    """Gemini API failure carrying the HTTP status code when one is known."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+def _status_code(error: Exception) -> Optional[int]:
+    """Extract an HTTP status code from a google.api_core exception, if any."""
+    code = getattr(error, 'code', None)
+    return code if isinstance(code, int) else None
 
 class GeminiConnector:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, cache: Optional[LLMCache] = None):
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY environment variable is required")
         genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
-
-    def generate_text(self, prompt: str, temperature: float = 0.7) -> str:
-        """Generate text using Gemini API."""
-        try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=temperature,
+        self.model_name = 'gemini-2.5-flash'
+        self.embedding_model_name = 'models/embedding-001'
+        self.model = genai.GenerativeModel(self.model_name)
+        self.cache = cache
+
+    def _cached(self, key: str, compute: Callable):
+        """Return the cached value for `key`, computing and storing it on a miss."""
+        if self.cache is None:
+            return compute()
+        value = self.cache.get(key)
+        if value is None:
+            value = compute()
+            self.cache.set(key, value)
+        return value
+
+    def cached_text(self, prompt: str, temperature: float = 0.7) -> Optional[str]:
+        """Return a cached generate_text response without calling the API."""
+        if self.cache is None:
+            return None
+        return self.cache.get(cache_key(self.model_name, prompt, temperature, "generate"))
+
+    def generate_text(self, prompt: str, temperature: float = 0.7, check_cache: bool = True) -> str:
+        """Generate text using Gemini API.
+
+        With check_cache=False the cache lookup is skipped (the caller already
+        missed via cached_text) but the response is still stored.
+        """
+        def compute() -> str:
+            try:
+                response = self.model.generate_content(
+                    prompt,
+                    generation_config=genai.types.GenerationConfig(
+                        temperature=temperature,
+                    )
                 )
-            )
-            return response.text
-        except Exception as e:
-            raise Exception(f"Gemini API error: {str(e)}")
+                return response.text
+            except Exception as e:
+                raise GeminiAPIError(f"Gemini API error: {str(e)}", _status_code(e))
+
+        key = cache_key(self.model_name, prompt, temperature, "generate")
+        if check_cache:
+            return self._cached(key, compute)
+        value = compute()
+        if self.cache is not None:
+            self.cache.set(key, value)
+        return value
 
     def summarize_content(self, text: str) -> str:
         """Summarize content using Gemini API."""
@@ -30,15 +75,39 @@ class GeminiConnector:
 
     def generate_embeddings(self, text: str) -> List[float]:
         """Generate embeddings for text using Gemini API."""
-        try:
-            result = genai.embed_content(
-                model="models/embedding-001",
-                content=text,
-                task_type="retrieval_document"
-            )
-            return result['embedding']
-        except Exception as e:
-            raise Exception(f"Gemini embedding error: {str(e)}")
+        def compute() -> List[float]:
+            try:
+                result = genai.embed_content(
+                    model=self.embedding_model_name,
+                    content=text,
+                    task_type="retrieval_document"
+                )
+                return result['embedding']
+            except Exception as e:
+                raise GeminiAPIError(f"Gemini embedding error: {str(e)}", _status_code(e))
+
+        return self._cached(cache_key(self.embedding_model_name, text, None, "retrieval_document"), compute)
+
+    def generate_embeddings_batch(self, texts: List[str],
+                                  task_type: str = "retrieval_document") -> List[List[float]]:
+        """Embed several texts in one API call, reusing cached embeddings."""
+        keys = [cache_key(self.embedding_model_name, text, None, task_type) for text in texts]
+        vectors = [self.cache.get(key) if self.cache is not None else None for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            try:
+                result = genai.embed_content(
+                    model=self.embedding_model_name,
+                    content=[texts[i] for i in missing],
+                    task_type=task_type
+                )
+            except Exception as e:
+                raise GeminiAPIError(f"Gemini embedding error: {str(e)}", _status_code(e))
+            for i, vector in zip(missing, result['embedding']):
+                vectors[i] = vector
+                if self.cache is not None:
+                    self.cache.set(keys[i], vector)
+        return vectors
 
 # Global instance for Jac integration
 llm_connector = None
@@ -0,0 +1,161 @@
+"""
+Module-name index for resolving import strings to repository files.
+
+Built once per code_context so each import resolves with dictionary lookups
+instead of scanning every file, using language-aware rules: dotted Python
+modules (absolute and relative, from the repository root or a first-party
+source root, never shadowing the standard library), JavaScript/TypeScript relative paths, Java
+packages, C/C++ include paths, Go package directories and Ruby/PHP requires.
+"""
+
+import posixpath
+import sys
+from typing import Dict, Iterable, List, Optional
+
+JS_EXTENSIONS = ('.js', '.ts', '.jsx', '.tsx')
+
+# Top-level names that resolve to the standard library, not to a same-named repository file
+STDLIB_MODULES = frozenset(getattr(sys, 'stdlib_module_names', sys.builtin_module_names))
+
+
+def _suffixes(path: str) -> Iterable[str]:
+    """Yield every trailing sub-path of a '/'-separated path, shortest first."""
+    parts = path.split('/')
+    for i in range(len(parts) - 1, -1, -1):
+        yield '/'.join(parts[i:])
+
+
+class ImportIndex:
+    """Lookup tables mapping module names and path suffixes to files."""
+
+    def __init__(self, files: Iterable[str]):
+        # Normalized '/'-separated path -> original code_context key
+        self.paths: Dict[str, str] = {}
+        # Dotted Python module from the repository root -> file
+        self.python_modules: Dict[str, str] = {}
+        # Dotted module as imported from its source root (the nearest directory
+        # above its outermost package) -> file
+        self.python_rooted: Dict[str, str] = {}
+        # Trailing dotted sub-module -> file, used only under a first-party package
+        self.python_suffixes: Dict[str, str] = {}
+        # Top-level names importable from a source root, except standard library
+        # names that only a lone module reuses
+        self.first_party = set()
+        # Trailing path suffix (e.g. "util/strings.h") -> file
+        self.path_suffixes: Dict[str, str] = {}
+        # Trailing directory suffix -> first file in that directory (Go packages)
+        self.dir_suffixes: Dict[str, str] = {}
+
+        # Shallower files win suffix collisions
+        python_files = []
+        for original in sorted(files, key=lambda f: (f.count('/') + f.count('\\'), f)):
+            path = original.replace('\\', '/')
+            self.paths[path] = original
+            for suffix in _suffixes(path):
+                self.path_suffixes.setdefault(suffix, original)
+            directory = posixpath.dirname(path)
+            if directory:
+                for suffix in _suffixes(directory):
+                    self.dir_suffixes.setdefault(suffix, original)
+            if path.endswith('.py'):
+                python_files.append((path, original))
+
+        packages = {posixpath.dirname(path) for path, _ in python_files if path.endswith('/__init__.py')}
+        for path, original in python_files:
+            module = path[:-3]
+            if module.endswith('/__init__'):
+                module = module[:-len('/__init__')]
+            self.python_modules.setdefault(module.replace('/', '.'), original)
+            # Climb out of packages to the directory a script or sys.path entry would name
+            root = posixpath.dirname(module)
+            while root and root in packages:
+                root = posixpath.dirname(root)
+            rooted = module[len(root) + 1:] if root else module
+            self.python_rooted.setdefault(rooted.replace('/', '.'), original)
+            top, _, rest = rooted.partition('/')
+            # A package may reuse a standard library name; a lone module would be shadowed by it
+            if top not in STDLIB_MODULES or rest or path.endswith('/__init__.py'):
+                self.first_party.add(top)
+            for suffix in _suffixes(module):
+                self.python_suffixes.setdefault(suffix.replace('/', '.'), original)
+
+    def _relative_path(self, importer: str, target: str, extensions: Iterable[str] = ('',)) -> Optional[str]:
+        base = posixpath.dirname(importer.replace('\\', '/'))
+        candidate = posixpath.normpath(posixpath.join(base, target))
+        for ext in extensions:
+            found = self.paths.get(candidate + ext)
+            if found is not None:
+                return found
+        return None
+
+    def _python(self, importer: str, module: str) -> Optional[str]:
+        if module.startswith('.'):
+            level = len(module) - len(module.lstrip('.'))
+            package = posixpath.dirname(importer.replace('\\', '/'))
+            for _ in range(level - 1):
+                package = posixpath.dirname(package)
+            rest = module[level:].replace('.', '/')
+            target = posixpath.join(package, rest) if rest else package
+            return self.paths.get(target + '.py') or self.paths.get(target + '/__init__.py')
+        # "import a.b.c" may name an attribute of a.b; try the longest module first
+        parts = module.split('.')
+        if parts[0] in STDLIB_MODULES and parts[0] not in self.first_party:
+            return None
+        for end in range(len(parts), 0, -1):
+            name = '.'.join(parts[:end])
+            found = self.python_modules.get(name)
+            if found is None and parts[0] in self.first_party:
+                found = self.python_rooted.get(name) or self.python_suffixes.get(name)
+            if found is not None:
+                return found
+        return None
+
+    def resolve_from(self, importer: str, module: str, names: Iterable[str]) -> List[str]:
+        """Resolve Python `from module import names` to files, de-duplicated.
+
+        Each name is tried as a sub-module first (`from pkg import mod` is
+        pkg/mod.py); names that are not modules resolve to `module` itself.
+        """
+        found = []
+        for name in names:
+            target = None
+            if name != '*':
+                target = self._python(importer, module + name if module.endswith('.') else f"{module}.{name}")
+            if target is None:
+                target = self._python(importer, module)
+            if target is not None and target not in found:
+                found.append(target)
+        return found
+
+    def _javascript(self, importer: str, target: str) -> Optional[str]:
+        if not target.startswith('.'):
+            return None  # Bare specifiers refer to packages, not repository files
+        candidates = ('',) + JS_EXTENSIONS + tuple('/index' + ext for ext in JS_EXTENSIONS)
+        return self._relative_path(importer, target, candidates)
+
+    def resolve(self, importer: str, imp: str, language: str) -> Optional[str]:
+        """Resolve import string `imp` found in `importer` to a repository file, or None."""
+        if language == 'PY':
+            return self._python(importer, imp)
+        if language in ('JS', 'TS', 'JSX', 'TSX'):
+            return self._javascript(importer, imp)
+        if language == 'JAVA':
+            if imp.endswith('*'):
+                return None
+            return self.path_suffixes.get(imp.replace('.', '/') + '.java')
+        if language in ('C', 'CPP'):
+            return self._relative_path(importer, imp) or self.path_suffixes.get(imp)
+        if language == 'GO':
+            # Module prefixes (e.g. github.com/org/repo) are unknown, so try the
+            # longest suffix first, never matching on a lone last segment
+            parts = imp.split('/')
+            for start in range(max(1, len(parts) - 1)):
+                found = self.dir_suffixes.get('/'.join(parts[start:]))
+                if found is not None:
+                    return found
+            return None
+        if language in ('RB', 'PHP'):
+            ext = '.rb' if language == 'RB' else '.php'
+            name = imp if imp.endswith(ext) else imp + ext
+            return self._relative_path(importer, name) or self.path_suffixes.get(name)
+        return None
@@ -0,0 +1,202 @@
+"""
+File importance ranking and analysis budgets.
+
+Each source file gets one importance score combining whether it is an entry
+point, how many repository files import it, its size and how often git
+history touched it. The pipeline analyzes files in descending importance, so
+when an AnalysisBudget (wall-clock seconds, prompt tokens or a file count)
+runs out the most central files are the ones that were documented.
+"""
+
+import math
+import os
+import posixpath
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from git import Repo
+
+from symbol_table import SymbolTable
+
+ENTRY_POINT_NAMES = {
+    'main.py', '__main__.py', 'app.py', 'manage.py', 'wsgi.py', 'asgi.py', 'cli.py', 'server.py',
+    'main.jac', 'app.jac',
+    'index.js', 'index.ts', 'main.js', 'main.ts', 'app.js', 'app.ts', 'server.js', 'server.ts',
+    'main.go', 'main.rs', 'lib.rs', 'main.c', 'main.cpp', 'program.cs', 'main.java', 'application.java',
+}
+# Package initializers are entry points too, but usually thin
+PACKAGE_ENTRY_NAMES = {'__init__.py', 'mod.rs'}
+
+WEIGHTS = {'entry_point': 3.0, 'in_degree': 2.0, 'churn': 1.5, 'size': 1.0}
+
+
+def is_entry_point(file_path: str) -> float:
+    """Return 1.0 for entry points, 0.5 for package initializers, else 0.0."""
+    name = posixpath.basename(file_path.replace('\\', '/')).lower()
+    if name in ENTRY_POINT_NAMES:
+        return 1.0
+    return 0.5 if name in PACKAGE_ENTRY_NAMES else 0.0
+
+
+def import_in_degree(code_graph) -> Counter:
+    """Count the distinct repository files importing each file in a SymbolTable or build_graph result."""
+    if isinstance(code_graph, SymbolTable):
+        return code_graph.import_in_degree()
+    edges = code_graph.get('links', code_graph.get('edges', []))
+    importers = Counter()
+    for edge in edges:
+        if edge.get('relation') == 'imports':
+            importers[edge['target'][len('file:'):]] += 1
+    return importers
+
+
+def git_churn(repo_path: str, max_commits: int = 500) -> Counter:
+    """Count how many of the last `max_commits` commits touched each file.
+
+    Shallow clones only see their last commit, so churn is flat there;
+    returns an empty Counter when history is unavailable. Rename detection
+    is off: it compares blob contents, which a blob-less mirror would fetch
+    from the remote for every renaming commit.
+    """
+    try:
+        log = Repo(repo_path).git.log('--format=', '--name-only', '--no-renames', f'-n{max_commits}')
+    except Exception:
+        return Counter()
+    return Counter(line for line in log.splitlines() if line)
+
+
+def _log_scaled(value: float, maximum: float) -> float:
+    return math.log1p(value) / math.log1p(maximum) if maximum > 0 else 0.0
+
+
+def score_files(code_context: dict, code_graph=None,
+                churn: Optional[Counter] = None) -> Dict[str, dict]:
+    """Return {file_path: {'score', 'entry_point', 'in_degree', 'churn', 'size'}}.
+
+    Counts are log-scaled against the repository maximum so no single signal
+    dominates, then combined with WEIGHTS. Files file_classifier put in a
+    category (generated, vendored, ...) also carry it as 'category'.
+    """
+    in_degree = import_in_degree(code_graph) if code_graph else Counter()
+    churn = churn or Counter()
+    max_in_degree = max(in_degree.values(), default=0)
+    max_churn = max(churn.values(), default=0)
+    max_size = max((data.get('size', 0) for data in code_context.values()), default=0)
+
+    scores = {}
+    for file_path, data in code_context.items():
+        signals = {
+            'entry_point': is_entry_point(file_path),
+            'in_degree': in_degree.get(file_path, 0),
+            'churn': churn.get(file_path.replace('\\', '/'), 0),
+            'size': data.get('size', 0),
+        }
+        score = (WEIGHTS['entry_point'] * signals['entry_point']
+                 + WEIGHTS['in_degree'] * _log_scaled(signals['in_degree'], max_in_degree)
+                 + WEIGHTS['churn'] * _log_scaled(signals['churn'], max_churn)
+                 + WEIGHTS['size'] * _log_scaled(signals['size'], max_size))
+        scores[file_path] = {'score': round(score, 4), **signals}
+        if data.get('category'):
+            scores[file_path]['category'] = data['category']
+    return scores
+
+
+def rank_files(scores: Dict[str, dict]) -> List[str]:
+    """Order file paths by descending score, breaking ties by path; classified files come last."""
+    return sorted(scores, key=lambda path: ('category' in scores[path], -scores[path]['score'], path))
+
+
+class AnalysisBudget:
+    """Wall-clock, prompt-token and file-count limits for AI analysis.
+
+    Analysis runs in chunks; before each chunk `allows` projects the chunk's
+    cost from the ones already spent and declines once it would overrun, so
+    runs stop between chunks with every analyzed file complete.
+    """
+
+    def __init__(self, seconds: Optional[float] = None, tokens: Optional[int] = None,
+                 max_files: Optional[int] = None, file_fraction: Optional[float] = None,
+                 clock=time.monotonic):
+        self.seconds = seconds
+        self.tokens = tokens
+        self.max_files = max_files
+        self.file_fraction = file_fraction
+        self._clock = clock
+        self.started_at = clock()
+        self.spent_seconds = 0.0
+        self.spent_tokens = 0
+        self.files_analyzed = 0
+        self.files_skipped = 0
+        self.exhausted_by: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "AnalysisBudget":
+        """Build a budget from ANALYSIS_* environment variables (unset means unlimited)."""
+        seconds = os.getenv("ANALYSIS_TIME_BUDGET_SECONDS")
+        tokens = os.getenv("ANALYSIS_TOKEN_BUDGET")
+        max_files = os.getenv("ANALYSIS_MAX_FILES")
+        fraction = os.getenv("ANALYSIS_MAX_FILE_FRACTION")
+        return cls(
+            seconds=float(seconds) if seconds else None,
+            tokens=int(tokens) if tokens else None,
+            max_files=int(max_files) if max_files else None,
+            file_fraction=float(fraction) if fraction else None,
+        )
+
+    @property
+    def limited(self) -> bool:
+        return any(limit is not None for limit in (self.seconds, self.tokens, self.max_files, self.file_fraction))
+
+    def start(self, total_files: int) -> None:
+        """Start the clock and resolve the file fraction against `total_files`."""
+        self.started_at = self._clock()
+        if self.file_fraction is not None:
+            fraction_files = max(1, math.ceil(total_files * self.file_fraction))
+            self.max_files = fraction_files if self.max_files is None else min(self.max_files, fraction_files)
+
+    def file_allowance(self, requested: int) -> int:
+        """Return how many of the next `requested` files may still be analyzed (0 to stop)."""
+        if self.exhausted_by:
+            return 0
+        allowed = requested
+        if self.max_files is not None:
+            allowed = min(allowed, self.max_files - self.files_analyzed)
+            if allowed <= 0:
+                self.exhausted_by = 'files'
+                return 0
+        if self.files_analyzed:
+            if self.seconds is not None:
+                elapsed = self._clock() - self.started_at
+                per_file = self.spent_seconds / self.files_analyzed
+                if elapsed + per_file * allowed > self.seconds:
+                    allowed = int((self.seconds - elapsed) / per_file) if per_file else allowed
+                    if allowed <= 0:
+                        self.exhausted_by = 'time'
+                        return 0
+            if self.tokens is not None:
+                per_file = self.spent_tokens / self.files_analyzed
+                if self.spent_tokens + per_file * allowed > self.tokens:
+                    allowed = int((self.tokens - self.spent_tokens) / per_file) if per_file else allowed
+                    if allowed <= 0:
+                        self.exhausted_by = 'tokens'
+                        return 0
+        return allowed
+
+    def charge(self, files: int, seconds: float, tokens: int) -> None:
+        """Record the cost of a finished chunk of analysis."""
+        self.files_analyzed += files
+        self.spent_seconds += seconds
+        self.spent_tokens += tokens
+
+    def report(self) -> dict:
+        return {
+            'time_budget_seconds': self.seconds,
+            'token_budget': self.tokens,
+            'max_files': self.max_files,
+            'files_analyzed': self.files_analyzed,
+            'files_skipped': self.files_skipped,
+            'seconds': round(self.spent_seconds, 3),
+            'prompt_tokens': self.spent_tokens,
+            'exhausted_by': self.exhausted_by,
+        }
@@ -0,0 +1,271 @@
+"""
+Asynchronous documentation jobs with stage progress.
+
+JobManager queues orchestration jobs for a bounded pool of worker threads and
+records every progress event the orchestrator reports (clone, tree, parse,
+graph, per-file AI analysis counts, render, summarize, embed, save), so
+clients can poll a job's latest state or follow its event stream without
+holding a request open for the whole run.
+
+The queue is bounded and prioritized: interactive jobs run before batch
+jobs, identical in-flight requests for the same repository and ref share one
+job (for a moving ref, only until that job has checked out the code), and
+submissions beyond the queue (or per-tenant) limit raise QueueFull so
+callers can push back instead of piling up work.
+"""
+
+import heapq
+import itertools
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+FINISHED_STATES = (SUCCEEDED, FAILED)
+
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+PRIORITIES = {INTERACTIVE: 0, BATCH: 1}
+
+# Stages before a job's checkout is complete; a request for a moving ref only
+# joins a job still in one of them, so it never gets docs for an older commit
+PRE_CHECKOUT_STAGES = (QUEUED, 'started', 'clone')
+_COMMIT_SHA = re.compile(r'[0-9a-f]{40}', re.IGNORECASE)
+
+
+class QueueFull(Exception):
+    """Raised when a job cannot be queued because the queue is saturated."""
+
+    def __init__(self, message: str, retry_after: float = 5.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def job_key(repo_url: str, ref: str = 'HEAD') -> str:
+    """Normalize a repository URL and ref into a coalescing key."""
+    url = repo_url.strip().rstrip('/')
+    if url.endswith('.git'):
+        url = url[:-4]
+    return f"{url.lower()}@{ref}"
+
+
+class Job:
+    """State and progress events of one documentation run."""
+
+    def __init__(self, repo_url: str, priority: str = INTERACTIVE,
+                 tenant: Optional[str] = None, ref: str = 'HEAD'):
+        self.id = uuid.uuid4().hex
+        self.repo_url = repo_url
+        self.ref = ref
+        self.key = job_key(repo_url, ref)
+        self.priority = priority
+        self.tenant = tenant
+        self.status = QUEUED
+        self.stage = QUEUED
+        self.progress = {}
+        self.events: List[dict] = []
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.subscribers = 1
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.updated_at = self.created_at
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def snapshot(self, include_result: bool = False) -> dict:
+        """Return a JSON-serializable view of the job."""
+        data = {
+            'job_id': self.id,
+            'repo_url': self.repo_url,
+            'priority': self.priority,
+            'status': self.status,
+            'stage': self.stage,
+            'progress': dict(self.progress),
+            'subscribers': self.subscribers,
+            'error': self.error,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+        }
+        if include_result:
+            data['result'] = self.result
+        return data
+
+
+class JobManager:
+    """Run `run_fn(repo_url, progress)` jobs on a bounded, prioritized worker pool.
+
+    `run_fn` must return an orchestrate_documentation-style dict and call
+    `progress(stage, **detail)` as it advances.
+    """
+
+    def __init__(self, run_fn: Callable[..., dict], max_workers: int = 2,
+                 max_queue: int = 100, max_pending_per_tenant: Optional[int] = None,
+                 history_limit: int = 100):
+        self.run_fn = run_fn
+        self.max_queue = max_queue
+        self.max_pending_per_tenant = max_pending_per_tenant
+        self.history_limit = history_limit
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        # In-flight (queued or running) job per coalescing key
+        self._active: Dict[str, Job] = {}
+        # (priority, sequence, job); stale entries are skipped when popped
+        self._queue: list = []
+        self._sequence = itertools.count()
+        self._pending = 0
+        self._closed = False
+        self._changed = threading.Condition()
+        self.stats = {'submitted': 0, 'coalesced': 0, 'rejected': 0, 'completed': 0}
+        self._threads = [
+            threading.Thread(target=self._worker_loop, name=f"doc-job-{i}", daemon=True)
+            for i in range(max(1, max_workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, repo_url: str, priority: str = INTERACTIVE,
+               tenant: Optional[str] = None, ref: str = 'HEAD') -> Job:
+        """Queue a job for `repo_url` and return it immediately.
+
+        An identical job already queued or running is returned instead of a
+        new one (and promoted if this request has higher priority). For a
+        ref that can move, such as HEAD or a branch, a running job is only
+        joined until it has checked out the repository; later requests start
+        a new job so commits pushed in the meantime are documented. Raises
+        QueueFull when the queue or the tenant's share of it is full.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r}; expected one of {sorted(PRIORITIES)}")
+        with self._changed:
+            if self._closed:
+                raise RuntimeError("JobManager is shut down")
+            self.stats['submitted'] += 1
+            key = job_key(repo_url, ref)
+            job = self._active.get(key)
+            if job is not None and (job.stage in PRE_CHECKOUT_STAGES or _COMMIT_SHA.fullmatch(ref)):
+                job.subscribers += 1
+                self.stats['coalesced'] += 1
+                if job.status == QUEUED and PRIORITIES[priority] < PRIORITIES[job.priority]:
+                    job.priority = priority
+                    heapq.heappush(self._queue, (PRIORITIES[priority], next(self._sequence), job))
+                return job
+
+            if self._pending >= self.max_queue:
+                self.stats['rejected'] += 1
+                raise QueueFull(f"Job queue is full ({self.max_queue} pending)")
+            if tenant is not None and self.max_pending_per_tenant is not None:
+                tenant_pending = sum(1 for j in self._active.values()
+                                     if j.tenant == tenant and j.status == QUEUED)
+                if tenant_pending >= self.max_pending_per_tenant:
+                    self.stats['rejected'] += 1
+                    raise QueueFull(f"Tenant {tenant} already has {tenant_pending} queued jobs")
+
+            job = Job(repo_url, priority, tenant, ref)
+            self._jobs[job.id] = job
+            self._active[key] = job
+            self._pending += 1
+            heapq.heappush(self._queue, (PRIORITIES[priority], next(self._sequence), job))
+            self._record(job, QUEUED, queue_position=self._pending)
+            self._trim()
+            return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._changed:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Job]:
+        """Block until the job finishes (or `timeout` passes) and return it."""
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                self._changed.wait_for(lambda: job.finished, timeout)
+            return job
+
+    def events_after(self, job_id: str, after: int = 0, timeout: Optional[float] = None) -> List[dict]:
+        """Return events with seq > `after`, waiting up to `timeout` seconds for new ones.
+
+        Returns an empty list on timeout or once a finished job has no newer events.
+        """
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise KeyError(job_id)
+            self._changed.wait_for(lambda: len(job.events) > after or job.finished, timeout)
+            return job.events[after:]
+
+    def queue_stats(self) -> dict:
+        """Return queue depth, running count and submission counters."""
+        with self._changed:
+            running = sum(1 for job in self._active.values() if job.status == RUNNING)
+            return {'pending': self._pending, 'running': running, 'max_queue': self.max_queue, **self.stats}
+
+    def _record(self, job: Job, stage: str, **detail) -> None:
+        # Caller holds self._changed
+        job.stage = stage
+        job.progress.update(detail)
+        job.updated_at = time.time()
+        job.events.append({'seq': len(job.events) + 1, 'stage': stage, 'status': job.status,
+                           'time': job.updated_at, **detail})
+        self._changed.notify_all()
+
+    def _progress(self, job: Job, stage: str, **detail) -> None:
+        with self._changed:
+            self._record(job, stage, **detail)
+
+    def _next_job(self) -> Optional[Job]:
+        with self._changed:
+            while True:
+                while self._queue:
+                    _, _, job = heapq.heappop(self._queue)
+                    if job.status == QUEUED:  # Promoted jobs leave a stale lower-priority entry
+                        job.status = RUNNING
+                        job.started_at = time.time()
+                        self._pending -= 1
+                        self._record(job, 'started', queue_seconds=round(job.started_at - job.created_at, 3))
+                        return job
+                if self._closed:
+                    return None
+                self._changed.wait()
+
+    def _worker_loop(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                result = self.run_fn(job.repo_url, lambda stage, **detail: self._progress(job, stage, **detail))
+            except Exception as e:
+                result = {'status': 'error', 'error': str(e)}
+            with self._changed:
+                job.result = result
+                if result.get('status') == 'success':
+                    job.status = SUCCEEDED
+                else:
+                    job.status = FAILED
+                    job.error = result.get('error', 'Unknown error')
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+                self.stats['completed'] += 1
+                self._record(job, job.status, run_seconds=round(time.time() - job.started_at, 3))
+
+    def _trim(self) -> None:
+        # Caller holds self._changed; forget the oldest finished jobs beyond the limit
+        excess = len(self._jobs) - self.history_limit
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished][:max(0, excess)]:
+            del self._jobs[job_id]
+
+    def shutdown(self) -> None:
+        """Stop accepting jobs and wait for queued and running jobs to finish."""
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+        for thread in self._threads:
+            thread.join()
@@ -0,0 +1,90 @@
+"""
+Per-repository manifest for incremental re-analysis.
+
+Maps each file path to its content hash together with the parsed symbols,
+graph fragment, AI analysis and rendered markdown section from the last run,
+so unchanged files can skip parsing, prompting and rendering. Directory and
+repository summaries are kept alongside, keyed by a hash of their inputs.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+from typing import Iterable, Optional
+
+MANIFEST_VERSION = 2
+
+
+def content_hash(text: str) -> str:
+    """Return the SHA-256 hex digest of file contents."""
+    return hashlib.sha256(text.encode('utf-8', errors='ignore')).hexdigest()
+
+
+class RepoManifest:
+    """JSON-backed record of per-file analysis results keyed by content hash."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files = {}
+        # Directory path ('' for the repository) -> {'input': hash, 'summary': text}
+        self.summaries = {}
+        self.reused = 0
+        self.changed = 0
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == MANIFEST_VERSION:
+                    self.files = data.get('files', {})
+                    self.summaries = data.get('summaries', {})
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable manifest {path}: {e}", file=sys.stderr)
+
+    @classmethod
+    def for_repo(cls, repo_url: str, manifest_dir: Optional[str] = None) -> "RepoManifest":
+        """Open the manifest for `repo_url` under MANIFEST_DIR (or .cache/manifests)."""
+        if manifest_dir is None:
+            manifest_dir = os.getenv(
+                "MANIFEST_DIR",
+                os.path.join(os.path.dirname(__file__), '..', '.cache', 'manifests'),
+            )
+        repo_name = re.sub(r'[^\w.-]', '_', repo_url.rstrip('/').split('/')[-1])
+        url_digest = hashlib.sha1(repo_url.encode('utf-8')).hexdigest()[:12]
+        return cls(os.path.join(manifest_dir, f"{repo_name}-{url_digest}.json"))
+
+    def lookup(self, rel_path: str, file_hash: str) -> Optional[dict]:
+        """Return the stored entry for `rel_path` if its hash is unchanged."""
+        entry = self.files.get(rel_path)
+        if entry is not None and entry.get('hash') == file_hash:
+            return entry
+        return None
+
+    def record(self, rel_path: str, file_hash: str, **fields) -> None:
+        """Store fields for `rel_path`, discarding stale data if the hash changed."""
+        entry = self.files.get(rel_path)
+        if entry is None or entry.get('hash') != file_hash:
+            entry = {'hash': file_hash}
+            self.files[rel_path] = entry
+        entry.update(fields)
+
+    def prune(self, live_paths: Iterable[str]) -> int:
+        """Drop entries for files that no longer exist; return how many were removed."""
+        live = set(live_paths)
+        stale = [path for path in self.files if path not in live]
+        for path in stale:
+            del self.files[path]
+        return len(stale)
+
+    def save(self) -> None:
+        """Atomically write the manifest to disk."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'files': self.files, 'summaries': self.summaries}, f)
+        os.replace(tmp_path, self.path)
+
+    def stats(self) -> dict:
+        """Return reuse counters for the current run."""
+        return {'files': len(self.files), 'reused': self.reused, 'changed': self.changed}
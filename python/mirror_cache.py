@@ -0,0 +1,216 @@
+"""
+Local bare-mirror cache for repeated repository analysis.
+
+The first request for a repository creates a bare clone of its branches and
+tags (not refs/pull/* and other hosting refs), by default as a blob-less
+partial clone so only the blobs a checkout needs are ever downloaded; later
+requests fetch incrementally and check out a cheap detached worktree from it,
+sparse when CLONE_SPARSE is set. Mirrors are locked per repository so
+concurrent jobs share one mirror, and the least recently used mirrors are
+evicted when the cache exceeds its disk quota, using the size each mirror
+had when it was last fetched.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from git import Git, Repo
+
+from extractors import sparse_patterns
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LAST_USED_FILE = 'cg-last-used'
+# Mirror size in bytes, recorded after each fetch
+SIZE_FILE = 'cg-size'
+
+# Only branches and tags are fetched, so pull-request refs never bloat a mirror
+FETCH_REFSPECS = ('+refs/heads/*:refs/heads/*', '+refs/tags/*:refs/tags/*')
+
+
+@contextmanager
+def file_lock(path: str, blocking: bool = True):
+    """Hold an exclusive advisory lock on `path`; yields False if non-blocking and busy."""
+    with open(path, 'a+') as handle:
+        try:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            else:
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            if blocking:
+                raise
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _mirror_size(mirror: str) -> int:
+    """Return the bytes a mirror's objects use, as reported by git count-objects."""
+    counts = dict(line.split(': ', 1) for line in Repo(mirror).git.count_objects('-v').splitlines())
+    return sum(int(counts.get(key, 0)) for key in ('size', 'size-pack', 'size-garbage')) * 1024
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class MirrorCache:
+    """Managed directory of bare mirrors with worktree checkouts and LRU eviction."""
+
+    def __init__(self, root: str, quota_bytes: int = 5 * 1024 * 1024 * 1024,
+                 blob_filter: Optional[str] = 'blob:none', sparse: bool = False):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.blob_filter = blob_filter
+        self.sparse = sparse
+        os.makedirs(root, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional["MirrorCache"]:
+        """Build a cache from MIRROR_CACHE_* environment variables, or None if disabled.
+
+        CLONE_SPARSE applies to the worktrees checked out from the mirrors.
+        """
+        if os.getenv("MIRROR_CACHE_ENABLED", "1").lower() in ("0", "false", "no"):
+            return None
+        default_root = os.path.join(os.path.dirname(__file__), '..', '.cache', 'mirrors')
+        return cls(
+            os.getenv("MIRROR_CACHE_DIR", default_root),
+            quota_bytes=int(os.getenv("MIRROR_CACHE_QUOTA_MB", "5120")) * 1024 * 1024,
+            blob_filter=os.getenv("MIRROR_CACHE_FILTER", "blob:none") or None,
+            sparse=os.getenv("CLONE_SPARSE", "0").lower() in ("1", "true", "yes"),
+        )
+
+    def mirror_path(self, repo_url: str) -> str:
+        """Return the mirror directory used for `repo_url`."""
+        name = re.sub(r'[^\w.-]', '_', repo_url.rstrip('/').split('/')[-1])
+        if name.endswith('.git'):
+            name = name[:-4]
+        digest = hashlib.sha1(repo_url.encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.root, f"{name}-{digest}.git")
+
+    def _ensure_mirror(self, repo_url: str, mirror: str) -> None:
+        if os.path.isdir(mirror):
+            # Explicit refspecs also narrow mirrors created with --mirror
+            Repo(mirror).git.fetch('--prune', 'origin', *FETCH_REFSPECS)
+        else:
+            options = [f'--filter={self.blob_filter}'] if self.blob_filter else []
+            Git().clone('--bare', *options, repo_url, mirror)
+        with open(os.path.join(mirror, SIZE_FILE), 'w') as f:
+            f.write(str(_mirror_size(mirror)))
+        with open(os.path.join(mirror, LAST_USED_FILE), 'w') as f:
+            f.write(str(time.time()))
+
+    def checkout(self, repo_url: str, ref: str = 'HEAD') -> str:
+        """Create or refresh the mirror for `repo_url` and return a fresh worktree of `ref`.
+
+        Call release() with the returned path when done.
+        """
+        mirror = self.mirror_path(repo_url)
+        worktree = tempfile.mkdtemp(prefix='cg-worktree-')
+        with file_lock(mirror + '.lock'):
+            self._ensure_mirror(repo_url, mirror)
+            if self.sparse:
+                Repo(mirror).git.worktree('add', '--no-checkout', '--detach', worktree, ref)
+                self._sparse_checkout(worktree)
+            else:
+                Repo(mirror).git.worktree('add', '--detach', worktree, ref)
+        self.evict()
+        return worktree
+
+    @staticmethod
+    def _sparse_checkout(worktree: str) -> None:
+        # `git sparse-checkout` would move core.bare into per-worktree config and
+        # leave the mirror unusable by path, so write this worktree's pattern
+        # file and enable sparse checkout for the one read-tree only
+        checkout = Git(worktree)
+        info = os.path.join(checkout.rev_parse('--absolute-git-dir'), 'info')
+        os.makedirs(info, exist_ok=True)
+        with open(os.path.join(info, 'sparse-checkout'), 'w') as f:
+            f.write('\n'.join(sparse_patterns()) + '\n')
+        checkout.execute(['git', '-c', 'core.sparseCheckout=true', '-c', 'core.sparseCheckoutCone=false',
+                          'read-tree', '-mu', 'HEAD'])
+
+    def release(self, worktree: str) -> None:
+        """Remove a worktree created by checkout()."""
+        mirror = None
+        git_file = os.path.join(worktree, '.git')
+        if os.path.isfile(git_file):
+            with open(git_file, 'r', encoding='utf-8') as f:
+                # "gitdir: <mirror>/worktrees/<name>"
+                gitdir = f.read().strip().split('gitdir:', 1)[-1].strip()
+            mirror = os.path.dirname(os.path.dirname(gitdir))
+        shutil.rmtree(worktree, ignore_errors=True)
+        if mirror and os.path.isdir(mirror):
+            with file_lock(mirror + '.lock'):
+                Repo(mirror).git.worktree('prune')
+
+    def evict(self) -> list:
+        """Delete least recently used mirrors until the cache fits its quota.
+
+        Sizes are those recorded at each mirror's last fetch, so no mirror is
+        walked here. Mirrors that are locked or still have live worktrees are
+        skipped. Returns the evicted mirror paths.
+        """
+        mirrors = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.endswith('.git') and os.path.isdir(path):
+                stamp = os.path.join(path, LAST_USED_FILE)
+                last_used = os.path.getmtime(stamp) if os.path.exists(stamp) else 0
+                mirrors.append((last_used, path, _recorded_size(path)))
+
+        total = sum(size for _, _, size in mirrors)
+        evicted = []
+        for _, path, size in sorted(mirrors):
+            if total <= self.quota_bytes:
+                break
+            with file_lock(path + '.lock', blocking=False) as acquired:
+                if not acquired:
+                    continue
+                Repo(path).git.worktree('prune')
+                worktrees = os.path.join(path, 'worktrees')
+                if os.path.isdir(worktrees) and os.listdir(worktrees):
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+            try:
+                os.remove(path + '.lock')
+            except OSError:
+                pass
+            evicted.append(path)
+            total -= size
+        return evicted
+
+
+def _recorded_size(mirror: str) -> int:
+    try:
+        with open(os.path.join(mirror, SIZE_FILE), 'r') as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        # Mirrors from before sizes were recorded
+        return _dir_size(mirror)
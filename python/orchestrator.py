@@ -6,6 +6,8 @@ Orchestrator for Codebase Genius - coordinates repository analysis and documenta
 import sys
 import json
 import os
+import shutil
+from typing import Callable, Iterable, Iterator, Optional, Tuple
 
 # Add the current directory to sys.path to ensure imports work
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -16,62 +18,224 @@ load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 
 try:
     from repo_parser import (
-        clone_repo, generate_file_tree, parse_code, build_graph,
-        analyze_code_with_ai, generate_markdown, save_docs
+        clone_repo, generate_file_tree, parse_code, build_symbol_table,
+        iter_file_sections, write_markdown
     )
+    from artifacts import LOCK_FILE, output_dir_for, write_artifacts, write_docs
     from gemini_connector import GeminiConnector
+    from request_scheduler import RequestScheduler
+    from llm_cache import LLMCache
+    from manifest import RepoManifest
+    from mirror_cache import MirrorCache, file_lock
+    from scanner import RepoScanner
+    from file_classifier import FileClassifier
+    from summarizer import HierarchicalSummarizer
+    from embedding_index import EmbeddingIndexer, index_dir_for
+    from importance import AnalysisBudget, git_churn, rank_files, score_files
 except ImportError as e:
     print(json.dumps({"status": "error", "error": f"Import error: {str(e)}"}))
     sys.exit(1)
 
-def orchestrate_documentation(repo_url: str) -> dict:
-    """Main orchestration function for documentation generation."""
+class PipelineServices:
+    """Long-lived clients shared by orchestration runs.
+
+    A one-off run creates and closes its own; the persistent worker keeps one
+    instance warm so connector setup and rate-limit state survive across jobs.
+    """
+
+    def __init__(self, connector=None):
+        self.llm_cache = LLMCache.from_env()
+        # Any GeminiConnector-compatible object, e.g. FakeConnector for local load tests
+        self.gemini_connector = connector or GeminiConnector(cache=self.llm_cache)
+        self.scheduler = RequestScheduler.from_env(self.gemini_connector)
+        self.mirror_cache = MirrorCache.from_env()
+
+    def close(self) -> None:
+        """Stop the request pool and close the LLM cache."""
+        self.scheduler.shutdown()
+        if self.llm_cache:
+            self.llm_cache.close()
+
+def _counted_sections(sections: Iterable[Tuple[str, str]], total: int,
+                      progress: Callable[..., None]) -> Iterator[Tuple[str, str]]:
+    """Pass file sections through, reporting per-file analysis progress."""
+    for done, section in enumerate(sections, 1):
+        progress('analysis', files_done=done, files_total=total)
+        yield section
+    # write_markdown assembles the overview and diagrams once sections run out
+    progress('render')
+
+def orchestrate_documentation(repo_url: str, services: PipelineServices = None,
+                              progress: Optional[Callable[..., None]] = None,
+                              include_docs: bool = False,
+                              budget: Optional[AnalysisBudget] = None) -> dict:
+    """Main orchestration function for documentation generation.
+
+    Pass `services` to reuse warm clients; otherwise they are created for
+    this run and closed afterwards. `progress(stage, **detail)` is called as
+    each pipeline stage starts and after every analyzed file.
+
+    The docs, graph and file tree are written under outputs/<repo>/ and the
+    result only references them (path, size, sha256); set `include_docs` to
+    also embed the markdown.
+
+    Files are analyzed in descending importance. With a limited `budget`
+    (default: AnalysisBudget.from_env()) analysis stops once it is spent and
+    the remaining files are documented from their symbols only.
+    """
+    if progress is None:
+        progress = lambda stage, **detail: None
+    owns_services = services is None
+    repo_path = None
     try:
         # Initialize Gemini connector
-        gemini_connector = GeminiConnector()
-
-        # Step 1: Clone repository
+        if owns_services:
+            services = PipelineServices()
+        gemini_connector = services.gemini_connector
+        scheduler = services.scheduler
+        mirror_cache = services.mirror_cache
+        llm_stats_before = dict(scheduler.stats)
+        manifest = RepoManifest.for_repo(repo_url)
+
+        # Step 1: Clone repository (worktree from the local mirror cache when enabled)
         print("Cloning repository...", file=sys.stderr)
-        repo_path = clone_repo(repo_url)
+        progress('clone')
+        repo_path = mirror_cache.checkout(repo_url) if mirror_cache else clone_repo(repo_url)
 
-        # Step 2: Generate file tree
+        # Step 2: Generate file tree from a single scan of the checkout, shared with the parser
         print("Generating file tree...", file=sys.stderr)
-        file_tree = generate_file_tree(repo_path)
+        progress('tree')
+        scan = RepoScanner.from_env().scan(repo_path)
+        file_tree = generate_file_tree(repo_path, scan)
 
         # Step 3: Parse code
         print("Parsing code...", file=sys.stderr)
-        code_context = parse_code(repo_path)
+        progress('parse')
+        classifier = FileClassifier.from_env(repo_path)
+        code_context = parse_code(repo_path, manifest, scan=scan, classifier=classifier)
 
         # Step 4: Build graph
         print("Building code graph...", file=sys.stderr)
-        code_graph = build_graph(code_context)
-
-        # Step 5: AI-enhanced analysis
-        print("Analyzing code with AI...", file=sys.stderr)
-        enhanced_context = analyze_code_with_ai(code_context, gemini_connector)
-
-        # Step 6: Generate documentation
-        print("Generating documentation...", file=sys.stderr)
-        docs = generate_markdown(code_graph, repo_url, enhanced_context)
-
-        # Step 7: Save documentation
-        print("Saving documentation...", file=sys.stderr)
-        output_file = save_docs(docs, repo_url)
-
-        return {
+        progress('graph', files_total=len(code_context))
+        code_graph = build_symbol_table(code_context, manifest)
+
+        # Rank files so the most important ones are analyzed (and documented) first
+        importance = score_files(code_context, code_graph,
+                                 git_churn(repo_path, int(os.getenv("ANALYSIS_CHURN_COMMITS", "500"))))
+        code_context = {file_path: code_context[file_path] for file_path in rank_files(importance)}
+        if budget is None:
+            budget = AnalysisBudget.from_env()
+
+        # Steps 5-6: AI-enhanced analysis streamed into documentation, one chunk at a time
+        print("Analyzing code with AI and generating documentation...", file=sys.stderr)
+        progress('analysis', files_done=0, files_total=len(code_context))
+        context_report = {}
+        summarizer = None
+        if os.getenv("SUMMARY_ENABLED", "1").lower() not in ("0", "false", "no"):
+            summarizer = HierarchicalSummarizer(
+                scheduler, repo_url.rstrip('/').split('/')[-1], manifest,
+                token_budget=int(os.getenv("SUMMARY_TOKEN_BUDGET", "3000")))
+
+        indexer = None
+        if os.getenv("EMBEDDINGS_ENABLED", "1").lower() not in ("0", "false", "no"):
+            indexer = EmbeddingIndexer(scheduler, batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "100")))
+
+        def on_analyzed(file_path: str, data: dict) -> None:
+            if summarizer:
+                summarizer.add_file(file_path, data.get('ai_analysis', ''))
+            if indexer:
+                indexer.add_file(file_path, data)
+
+        def summarize() -> dict:
+            # Directory and repository summaries are reduced from the file analyses
+            progress('summarize', files=len(summarizer.file_summaries))
+            return summarizer.summarize()
+
+        file_sections = _counted_sections(
+            iter_file_sections(code_context, gemini_connector, scheduler, manifest,
+                               context_report=context_report, on_analyzed=on_analyzed, budget=budget),
+            len(code_context), progress)
+
+        def coverage() -> Optional[str]:
+            if not budget.files_skipped:
+                return None
+            return (f"Partial documentation: the analysis budget ({budget.exhausted_by}) ran out, so "
+                    f"{budget.files_skipped} of {len(code_context)} files, the least important, "
+                    f"are listed without AI analysis.")
+
+        # Sections stream into docs.md (or per-package pages) as they are analyzed
+        output_dir = output_dir_for(repo_url)
+        # A concurrent job for the same repository waits here rather than
+        # interleaving its docs, manifest and artifacts with this one's
+        os.makedirs(output_dir, exist_ok=True)
+        with file_lock(os.path.join(output_dir, LOCK_FILE)):
+            docs = write_docs(output_dir, lambda f, pages_dir: write_markdown(
+                f, code_graph, repo_url, manifest=manifest, file_sections=file_sections,
+                summaries=summarize if summarizer else None, notice=coverage,
+                shard_dir=pages_dir, shard_depth=int(os.getenv("DOCS_SHARD_DEPTH", "1"))),
+                sharded=os.getenv("DOCS_SHARDED", "0").lower() in ("1", "true", "yes"))
+            manifest.save()
+
+            # Step 7: Embed file and symbol summaries for code search
+            embedding_index = None
+            if indexer:
+                print("Building embedding index...", file=sys.stderr)
+                progress('embed', entries=len(indexer.entries))
+                embedding_index = indexer.build().save(index_dir_for(repo_url))
+
+            # Step 8: Save documentation and run artifacts
+            print("Saving documentation...", file=sys.stderr)
+            progress('save')
+            summary = {
+                "files": len(code_context),
+                "scan": scan.stats(),
+                # Generated, minified, vendored and binary files, skipped or listed without analysis
+                "file_categories": classifier.stats() if classifier else None,
+                "graph_nodes": code_graph.node_count,
+                "graph_edges": code_graph.edge_count,
+                # Source tokens sent in file analysis prompts (files reused from the manifest send none)
+                "context_tokens": sum(stats['tokens'] for stats in context_report.values()),
+                "context_files_truncated": sum(1 for stats in context_report.values() if stats['truncated']),
+                "summary_stats": dict(summarizer.stats) if summarizer else None,
+                "embedding_stats": dict(indexer.stats) if indexer else None,
+                "analysis_budget": budget.report() if budget.limited else None,
+            }
+            artifacts = write_artifacts(output_dir, repo_url, docs, code_graph, file_tree,
+                                        {**summary, "context_tokens_per_file": context_report,
+                                         "file_importance": importance})
+
+        result = {
             "status": "success",
-            "repo_path": repo_path,
-            "file_tree": file_tree,
-            "code_graph": code_graph,
-            "docs": docs,
-            "output_file": output_file
+            "output_dir": output_dir,
+            "output_file": artifacts['docs']['path'],
+            "artifacts": artifacts,
+            "summary": summary,
+            # Counters are shared by concurrent jobs on a warm scheduler
+            "llm_stats": {k: v - llm_stats_before[k] for k, v in scheduler.stats.items()},
+            "cache_stats": services.llm_cache.stats() if services.llm_cache else None,
+            "manifest_stats": manifest.stats()
         }
+        if embedding_index:
+            result["artifacts"]["embeddings"] = embedding_index
+        if include_docs:
+            with open(docs['path'], encoding='utf-8') as f:
+                result["docs"] = f.read()
+        return result
 
     except Exception as e:
         return {
             "status": "error",
             "error": str(e)
         }
+    finally:
+        # The checkout is only needed while parsing; mirrors stay cached
+        if repo_path:
+            if services.mirror_cache:
+                services.mirror_cache.release(repo_path)
+            else:
+                shutil.rmtree(repo_path, ignore_errors=True)
+        if owns_services and services is not None:
+            services.close()
 
 def main():
     """Main entry point when called from command line."""
@@ -80,7 +244,7 @@ def main():
         sys.exit(1)
 
     repo_url = sys.argv[1]
-    result = orchestrate_documentation(repo_url)
+    result = orchestrate_documentation(repo_url, include_docs='--include-docs' in sys.argv[2:])
     print(json.dumps(result))
 
 if __name__ == "__main__":
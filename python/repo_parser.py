@@ -1,200 +1,394 @@
+import builtins
+import io
 import os
+import json
+import itertools
+import re
+import shutil
+import mmap
 import tempfile
-import git
+import sys
+import time
 from git import Repo
-import re
-import networkx as nx
-from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, TextIO, Tuple
 from gemini_connector import GeminiConnector
+from request_scheduler import RequestScheduler, estimate_tokens
+from manifest import RepoManifest, content_hash
+from extractors import get_extractor, sparse_patterns
+from import_index import ImportIndex
+from scanner import RepoScan, RepoScanner
+from file_classifier import SNIFF_CHARS, FileClassifier, classify_content
+from context_builder import build_context
+from importance import AnalysisBudget
+from symbol_table import FILE, SymbolTable
+from artifacts import DOCS_FILE
+from diagrams import ROOT_PACKAGE, DiagramBuilder, package_of
+
+# Files at least this large are memory-mapped when a stage re-reads them
+MMAP_THRESHOLD_BYTES = 1024 * 1024
+
+# File sections of a document kept in memory before spooling to disk
+MARKDOWN_SPOOL_BYTES = 1024 * 1024
+
+# Largest prefix of a file considered when selecting prompt context
+CONTEXT_MAX_SOURCE_BYTES = 1024 * 1024
+
+def clone_repo(repo_url: str, depth: Optional[int] = None, blob_filter: Optional[str] = None,
+               sparse: Optional[bool] = None) -> str:
+    """Clone the repository to a temporary directory and return the path.
+
+    Only the working tree is analyzed, so by default the clone is shallow
+    (`depth`, CLONE_DEPTH, default 1; 0 fetches full history). With `sparse`
+    (CLONE_SPARSE) only files with a registered source extension, top-level
+    READMEs, .gitignore and .gitattributes files are checked out, and blobs
+    are fetched lazily through a partial clone (`blob_filter`, CLONE_FILTER, default
+    "blob:none" when sparse) so binary assets are never downloaded. Use file:// URLs for local
+    repositories, since git ignores depth and filters for plain paths.
+    """
+    if depth is None:
+        depth = int(os.getenv("CLONE_DEPTH", "1"))
+    if sparse is None:
+        sparse = os.getenv("CLONE_SPARSE", "0").lower() in ("1", "true", "yes")
+    if blob_filter is None:
+        blob_filter = os.getenv("CLONE_FILTER", "blob:none" if sparse else "") or None
+
+    options = {'single_branch': True}
+    if depth > 0:
+        options['depth'] = depth
+    if blob_filter:
+        options['filter'] = blob_filter
+    if sparse:
+        options['no_checkout'] = True
 
-def clone_repo(repo_url: str) -> str:
-    """Clone the repository to a temporary directory and return the path."""
     temp_dir = tempfile.mkdtemp()
-    Repo.clone_from(repo_url, temp_dir)
+    repo = Repo.clone_from(repo_url, temp_dir, **options)
+    if sparse:
+        repo.git.sparse_checkout('set', '--no-cone', *sparse_patterns())
+        repo.git.read_tree('-mu', 'HEAD')
     return temp_dir
 
-def generate_file_tree(repo_path: str) -> dict:
-    """Generate a file tree excluding irrelevant folders."""
-    tree = {}
-    exclude = {'.git', 'node_modules', '__pycache__', '.env', 'venv', '.vscode', '.idea', 'dist', 'build'}
-
-    for root, dirs, files in os.walk(repo_path):
-        dirs[:] = [d for d in dirs if d not in exclude]
-        rel_root = os.path.relpath(root, repo_path)
-        if rel_root == '.':
-            rel_root = ''
-        tree[rel_root] = files
-
-    return tree
-
-def parse_code(repo_path: str) -> dict:
-    """Parse source files using regex and Gemini AI for intelligent analysis."""
-    code_context = {}
-
-    # Supported file extensions for different programming languages
-    supported_extensions = {
-        '.py',    # Python
-        '.js',    # JavaScript
-        '.ts',    # TypeScript
-        '.tsx',   # React TypeScript
-        '.jsx',   # React JavaScript
-        '.java',  # Java
-        '.cpp',   # C++
-        '.c',     # C
-        '.cs',    # C#
-        '.php',   # PHP
-        '.rb',    # Ruby
-        '.go',    # Go
-        '.rs',    # Rust
-        '.swift', # Swift
-        '.kt',    # Kotlin
-        '.scala', # Scala
-    }
-
-    for root, dirs, files in os.walk(repo_path):
-        for file in files:
-            if any(file.endswith(ext) for ext in supported_extensions):
-                filepath = os.path.join(root, file)
-                try:
-                    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                        code = f.read()
-
-                    # Language-specific parsing patterns
-                    functions = []
-                    classes = []
-                    imports = []
-
-                    if file.endswith('.py'):
-                        # Python patterns
-                        functions = re.findall(r'def\s+(\w+)\s*\(', code)
-                        classes = re.findall(r'class\s+(\w+)\s*[:\(]', code)
-                        imports = re.findall(r'^(?:from\s+[\w.]+\s+import|import\s+[\w.]+)', code, re.MULTILINE)
-
-                    elif file.endswith(('.js', '.ts', '.jsx', '.tsx')):
-                        # JavaScript/TypeScript patterns
-                        functions = re.findall(r'(?:function\s+(\w+)|const\s+(\w+)\s*=\s*(?:\([^)]*\)\s*=>|function))', code)
-                        functions = [f for f in functions if f[0] or f[1]]  # Filter out None values
-                        functions = [f[0] if f[0] else f[1] for f in functions]
-                        classes = re.findall(r'class\s+(\w+)', code)
-                        imports = re.findall(r'^(?:import\s+.*?\s+from\s+[\'"]([^\'"]+)[\'"]|const\s+\w+\s*=\s*require\([^)]+\))', code, re.MULTILINE)
-
-                    elif file.endswith('.java'):
-                        # Java patterns
-                        functions = re.findall(r'(?:public|private|protected)?\s*(?:static\s+)?(?:\w+\s+)+\s+(\w+)\s*\(', code)
-                        classes = re.findall(r'class\s+(\w+)', code)
-                        imports = re.findall(r'^import\s+[^;]+;', code, re.MULTILINE)
-
-                    elif file.endswith(('.cpp', '.c')):
-                        # C/C++ patterns
-                        functions = re.findall(r'(?:[\w\*]+\s+)+\s*(\w+)\s*\(', code)
-                        classes = re.findall(r'class\s+(\w+)', code)
-                        imports = re.findall(r'^#include\s+[<"]([^>"]+)[>"]', code, re.MULTILINE)
-
-                    elif file.endswith('.cs'):
-                        # C# patterns
-                        functions = re.findall(r'(?:public|private|protected)?\s*(?:static\s+)?(?:\w+\s+)+\s+(\w+)\s*\(', code)
-                        classes = re.findall(r'class\s+(\w+)', code)
-                        imports = re.findall(r'^using\s+[^;]+;', code, re.MULTILINE)
-
-                    elif file.endswith('.php'):
-                        # PHP patterns
-                        functions = re.findall(r'function\s+(\w+)\s*\(', code)
-                        classes = re.findall(r'class\s+(\w+)', code)
-                        imports = re.findall(r'^(?:require|include)(?:_once)?\s*[\'"]([^\'"]+)[\'"]', code, re.MULTILINE)
-
-                    elif file.endswith('.rb'):
-                        # Ruby patterns
-                        functions = re.findall(r'def\s+(\w+)', code)
-                        classes = re.findall(r'class\s+(\w+)', code)
-                        imports = re.findall(r'^(?:require|require_relative)\s+[\'"]([^\'"]+)[\'"]', code, re.MULTILINE)
-
-                    # Default fallback for other languages
-                    else:
-                        functions = re.findall(r'(?:function|def|func)\s+(\w+)\s*\(', code)
-                        classes = re.findall(r'class\s+(\w+)', code)
-                        imports = []
-
-                    rel_path = os.path.relpath(filepath, repo_path)
-                    code_context[rel_path] = {
-                        'functions': functions,
-                        'classes': classes,
-                        'imports': imports,
-                        'code': code[:2000],  # First 2000 chars for AI analysis
-                        'full_code': code,
-                        'language': file.split('.')[-1].upper()
-                    }
-
-                except Exception as e:
-                    print(f"Error parsing {filepath}: {e}")
+def generate_file_tree(repo_path: str, scan: Optional[RepoScan] = None) -> dict:
+    """Generate a file tree excluding irrelevant folders.
+
+    Pass the RepoScan also given to parse_code so the checkout is walked once.
+    """
+    if scan is None:
+        scan = RepoScanner.from_env().scan(repo_path)
+    return scan.tree
+
+def _parse_file(task: tuple) -> tuple:
+    """Read and scan one file; runs in a worker process in parallel mode.
+
+    Returns (rel_path, entry), with entry None if the file could not be read.
+    When the content hash equals `known_hash` the scan is skipped and the
+    entry is flagged unchanged so the caller can fill in manifest symbols.
+
+    Unless `skip` is None, files not already classified by path have their
+    first block classified; a file whose category is in `skip` is not read
+    further and its entry only holds the category.
+    """
+    filepath, rel_path, known_hash, size, category, skip = task
+    file = os.path.basename(filepath)
+    try:
+        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+            code = f.read(SNIFF_CHARS)
+            if skip is not None and category is None:
+                category = classify_content(code)
+                if category in skip:
+                    return rel_path, {'category': category, 'skipped': True}
+            code += f.read()
+
+        file_hash = content_hash(code)
+        unchanged = file_hash == known_hash
+        if unchanged:
+            extracted = {'functions': [], 'classes': [], 'imports': [], 'symbols': [], 'definitions': [], 'calls': []}
+        else:
+            extracted = get_extractor(file).extract(code)
+        # Keep only a summary resident; later stages re-read the body via read_source
+        return rel_path, {
+            **extracted,
+            'path': filepath,
+            'size': size,
+            'language': file.split('.')[-1].upper(),
+            'content_hash': file_hash,
+            'category': category,
+            'unchanged': unchanged
+        }
+
+    except Exception as e:
+        print(f"Error parsing {filepath}: {e}", file=sys.stderr)
+        return rel_path, None
+
+def read_source(path: str, start: int = 0, end: Optional[int] = None) -> str:
+    """Lazily read bytes [start:end] of a source file as text.
+
+    Files above MMAP_THRESHOLD_BYTES are memory-mapped so only the requested
+    span is paged in.
+    """
+    size = os.path.getsize(path)
+    end = size if end is None else min(end, size)
+    if start >= end:
+        return ''
+    with open(path, 'rb') as f:
+        if size >= MMAP_THRESHOLD_BYTES:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                data = mapped[start:end]
+        else:
+            f.seek(start)
+            data = f.read(end - start)
+    return data.decode('utf-8', errors='ignore')
+
+def iter_code_context(repo_path: str, manifest: Optional[RepoManifest] = None,
+                      workers: Optional[int] = None, scan: Optional[RepoScan] = None,
+                      classifier: Optional[FileClassifier] = None) -> Iterator[Tuple[str, dict]]:
+    """Read and scan source files, yielding (rel_path, summary) pairs.
+
+    Files come from `scan` (by default a RepoScanner.from_env() scan of
+    `repo_path`). Each file is read, hashed and scanned by the extractor
+    registered for its extension, and only a per-file summary (symbols,
+    path, size, hash) is yielded; file bodies are never retained.
+
+    When a manifest is given, files whose content hash is unchanged reuse the
+    symbols recorded on the previous run instead of being re-scanned. With
+    `workers` > 1 (default: PARSE_WORKERS) files are read and scanned in a
+    process pool with results yielded in walk order.
+
+    `classifier` (by default FileClassifier.from_env, None when disabled)
+    counts generated, minified, vendored and binary files and leaves out the
+    categories it skips; the summaries of other classified files carry their
+    'category', plus 'skip_analysis' for categories listed without AI analysis.
+    """
+    if scan is None:
+        scan = RepoScanner.from_env().scan(repo_path)
+    if classifier is None:
+        classifier = FileClassifier.from_env(repo_path)
+    skip = classifier.skip if classifier else None
+
+    def tasks():
+        for entry in scan.files:
+            if get_extractor(entry.rel_path) is not None:
+                category = classifier.classify_path(entry.rel_path) if classifier else None
+                if category is not None and category in skip:
+                    # Decided by path alone: never read
+                    classifier.counts[category] += 1
+                    continue
+                known = manifest.files.get(entry.rel_path) if manifest else None
+                known_hash = known.get('hash') if known and 'calls' in known.get('symbols', {}) else None
+                yield entry.path, entry.rel_path, known_hash, entry.size, category, skip
+
+    if workers is None:
+        workers = int(os.getenv("PARSE_WORKERS", "1"))
+    if workers > 1:
+        # Chunk the work so each worker gets several batches to balance load
+        task_list = list(tasks())
+        chunksize = max(1, len(task_list) // (workers * 4))
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(_parse_file, task_list, chunksize=chunksize)
+    else:
+        executor = None
+        results = map(_parse_file, tasks())
+
+    try:
+        for rel_path, entry in results:
+            if entry is None:
+                continue
+            category = entry.pop('category')
+            if category:
+                classifier.counts[category] += 1
+                if entry.pop('skipped', False):
                     continue
+                entry['category'] = category
+                if category in classifier.no_analysis:
+                    entry['skip_analysis'] = True
+            if entry.pop('unchanged'):
+                entry.update(manifest.files[rel_path]['symbols'])
+                manifest.reused += 1
+            elif manifest:
+                manifest.record(rel_path, entry['content_hash'], symbols={
+                    key: entry[key] for key in ('functions', 'classes', 'imports', 'import_names', 'symbols',
+                                                'definitions', 'calls')
+                    if key in entry
+                })
+                manifest.changed += 1
+            yield rel_path, entry
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+def parse_code(repo_path: str, manifest: Optional[RepoManifest] = None,
+               workers: Optional[int] = None, scan: Optional[RepoScan] = None,
+               classifier: Optional[FileClassifier] = None) -> dict:
+    """Parse source files with the registered language extractors.
+
+    Collects iter_code_context into the code_context dict used by later
+    stages and prunes manifest entries for files that no longer exist.
+    """
+    code_context = dict(iter_code_context(repo_path, manifest, workers, scan, classifier))
+
+    if manifest:
+        manifest.prune(code_context.keys())
 
     return code_context
 
-def build_graph(code_context: dict) -> dict:
-    """Build a Code Context Graph with AI-enhanced relationships."""
-    G = nx.DiGraph()
-
-    # Add nodes
+def _file_graph_fragment(file: str, data: dict) -> dict:
+    """Build the file-local nodes and edges contributed by one file.
+
+    Each definition is contained by its enclosing definition, taken from the
+    extractor's line spans (or indentation for regex extractors).
+    """
+    nodes = []
+    for func in data['functions']:
+        nodes.append([f"{file}:{func}", {'type': 'function', 'file': file}])
+    for cls in data['classes']:
+        nodes.append([f"{file}:{cls}", {'type': 'class', 'file': file}])
+
+    edges = []
+    for name, _, parent, *_ in data.get('definitions') or ():
+        if parent is not None and parent != name:
+            edges.append([f"{file}:{parent}", f"{file}:{name}", {'relation': 'contains'}])
+
+    return {'nodes': nodes, 'edges': edges}
+
+# Calls to these are never resolved repository-wide, even if a file defines one:
+# builtins, and methods of builtin types when called on some other object
+_BUILTIN_NAMES = frozenset(dir(builtins))
+_BUILTIN_METHODS = frozenset(name for kind in (str, bytes, list, dict, set, tuple, int, float, object)
+                             for name in dir(kind))
+
+def _resolve_call(file: str, local: dict, caller: str, callee: str,
+                  imported: list, table: SymbolTable, global_index: dict) -> Optional[int]:
+    """Return the node a call from `caller` in `file` most likely reaches, or None.
+
+    `callee` is an extractor call name, '.'-prefixed for attributes of other
+    objects. Tried in order: the caller's enclosing scopes (so self.method()
+    finds the sibling method; not for attribute calls), a unique definition
+    of that name in the same file, a top-level definition in a file this one
+    imports, and finally a name defined exactly once in the repository.
+    `local` maps the names defined in `file` to their node ids.
+    """
+    attribute = callee.startswith('.')
+    name = callee[1:] if attribute else callee
+    if name not in global_index:
+        # Library and builtin calls: nothing in the repository has that name
+        return None
+    scope = None if attribute else caller
+    while scope is not None:
+        target = local.get(f"{scope}.{name}" if scope else name)
+        if target is not None:
+            return target
+        scope = scope.rpartition('.')[0] if scope else None
+    target = global_index.get((file, name), -1)
+    if target >= 0:
+        return target
+    candidates = {table.find(other, name) for other in imported} - {None}
+    if len(candidates) == 1:
+        return candidates.pop()
+    if name in (_BUILTIN_METHODS if attribute else _BUILTIN_NAMES):
+        return None
+    target = global_index.get(name, -1)
+    return target if target >= 0 else None
+
+def build_symbol_table(code_context: dict, manifest: Optional[RepoManifest] = None) -> SymbolTable:
+    """Build the Code Context Graph as an interned SymbolTable.
+
+    Files, classes and functions are linked by 'contains' edges from the
+    definition spans, 'imports' edges between files and 'calls' edges
+    between definitions, resolved through an index of definition names
+    built in one pass over the nodes. File-local graph fragments are reused
+    from the manifest for unchanged files.
+    """
+    table = SymbolTable()
     for file, data in code_context.items():
-        for func in data['functions']:
-            G.add_node(f"{file}:{func}", type='function', file=file)
-        for cls in data['classes']:
-            G.add_node(f"{file}:{cls}", type='class', file=file)
-
-    # Add basic edges based on file relationships
-    for file, data in code_context.items():
-        for cls in data['classes']:
-            for func in data['functions']:
-                G.add_edge(f"{file}:{cls}", f"{file}:{func}", relation='contains')
-
-    # Add import relationships
-    file_nodes = {}
-    for file in code_context.keys():
-        file_nodes[file] = f"file:{file}"
-
+        file_hash = data.get('content_hash')
+        cached = manifest.lookup(file, file_hash) if manifest and file_hash else None
+        if cached and 'fragment' in cached:
+            fragment = cached['fragment']
+        else:
+            fragment = _file_graph_fragment(file, data)
+            if manifest and file_hash:
+                manifest.record(file, file_hash, fragment=fragment)
+                # Fragments from before span-based containment
+                manifest.files[file].pop('graph', None)
+        table.add_fragment(file, fragment)
+
+    # Short definition name -> node id, per file and repository-wide; -1 when ambiguous
+    global_index = {}
+    for node_id in range(table.node_count):
+        if table.node_kind[node_id] != FILE:
+            short = table.name(node_id).rpartition('.')[2]
+            for key in ((table.path(node_id), short), short):
+                global_index[key] = node_id if key not in global_index else -1
+
+    # Add import relationships, resolved through a module index built once
+    index = ImportIndex(code_context.keys())
     for file, data in code_context.items():
+        language = data.get('language', '')
+        import_names = data.get('import_names') or {}
+        imported = []
         for imp in data['imports']:
-            # Simple heuristic: if import contains a filename from our codebase
-            for other_file in code_context.keys():
-                if other_file.replace('.py', '').replace('/', '.') in imp:
-                    if file != other_file:
-                        G.add_edge(f"file:{file}", f"file:{other_file}", relation='imports')
-
-    return nx.node_link_data(G)
-
-def analyze_code_with_ai(code_context: dict, gemini_connector: GeminiConnector) -> dict:
-    """Use Gemini AI to analyze code and extract insights."""
-    enhanced_context = {}
-
-    for file_path, data in code_context.items():
-        language = data.get('language', 'Unknown')
-        lang_name = {
-            'PY': 'Python',
-            'JS': 'JavaScript',
-            'TS': 'TypeScript',
-            'TSX': 'React TypeScript',
-            'JSX': 'React JavaScript',
-            'JAVA': 'Java',
-            'CPP': 'C++',
-            'C': 'C',
-            'CS': 'C#',
-            'PHP': 'PHP',
-            'RB': 'Ruby',
-            'GO': 'Go',
-            'RS': 'Rust',
-            'SWIFT': 'Swift',
-            'KT': 'Kotlin',
-            'SCALA': 'Scala'
-        }.get(language, language)
-
-        # Analyze the code with AI
-        analysis_prompt = f"""
+            if imp in import_names:
+                targets = index.resolve_from(file, imp, import_names[imp])
+            else:
+                targets = [index.resolve(file, imp, language)]
+            for other_file in targets:
+                if other_file is not None and other_file != file and other_file not in imported:
+                    table.add_edge(table.add_file(file), table.add_file(other_file), 'imports')
+                    imported.append(other_file)
+
+        calls = data.get('calls')
+        if not calls:
+            continue
+        local = {name: table.find(file, name) for name in itertools.chain(data['functions'], data['classes'])}
+        for caller, callee in calls:
+            source = local.get(caller)
+            if source is None:
+                continue
+            target = _resolve_call(file, local, caller, callee, imported, table, global_index)
+            if target is not None and target != source:
+                table.add_edge(source, target, 'calls')
+
+    return table
+
+def build_graph(code_context: dict, manifest: Optional[RepoManifest] = None) -> dict:
+    """Build the Code Context Graph as networkx node-link data (see build_symbol_table)."""
+    return build_symbol_table(code_context, manifest).to_node_link()
+
+LANGUAGE_NAMES = {
+    'PY': 'Python',
+    'JS': 'JavaScript',
+    'TS': 'TypeScript',
+    'TSX': 'React TypeScript',
+    'JSX': 'React JavaScript',
+    'JAVA': 'Java',
+    'CPP': 'C++',
+    'C': 'C',
+    'CS': 'C#',
+    'PHP': 'PHP',
+    'RB': 'Ruby',
+    'GO': 'Go',
+    'RS': 'Rust',
+    'SWIFT': 'Swift',
+    'KT': 'Kotlin',
+    'SCALA': 'Scala'
+}
+
+def _file_analysis_prompt(file_path: str, data: dict, lang_name: str, token_budget: int) -> Tuple[str, dict]:
+    """Build the per-file analysis prompt and return it with its context stats.
+
+    The code excerpt is chosen by build_context from the file's symbols to fit
+    `token_budget` tokens.
+    """
+    source = read_source(data['path'], end=CONTEXT_MAX_SOURCE_BYTES)
+    code, stats = build_context(source, data.get('symbols', []), token_budget, data.get('imports'),
+                                data.get('definitions'))
+    return f"""
         Analyze this {lang_name} code file and provide insights:
 
         File: {file_path}
         Language: {lang_name}
         Code:
-        {data['code']}
+        {code}
 
         Please provide:
         1. A brief description of what this file does
@@ -204,17 +398,11 @@ def analyze_code_with_ai(code_context: dict, gemini_connector: GeminiConnector)
         5. Dependencies and relationships
 
         Keep the analysis concise but informative.
-        """
+        """, stats
 
-        try:
-            analysis = gemini_connector.generate_text(analysis_prompt, temperature=0.3)
-        except Exception as e:
-            analysis = f"AI analysis failed: {str(e)}"
-
-        # Analyze individual functions and classes
-        function_analyses = {}
-        for func in data['functions'][:5]:  # Limit to first 5 functions
-            func_prompt = f"""
+def _function_prompt(func: str, lang_name: str) -> str:
+    """Build the per-function analysis prompt."""
+    return f"""
             Analyze this {lang_name} function/method:
 
             {func}(...)
@@ -222,103 +410,536 @@ def analyze_code_with_ai(code_context: dict, gemini_connector: GeminiConnector)
             Based on the function name and typical usage patterns in {lang_name}, what does this function likely do?
             Provide a brief description.
             """
-            try:
-                func_analysis = gemini_connector.generate_text(func_prompt, temperature=0.2)
-                function_analyses[func] = func_analysis.strip()
-            except:
-                function_analyses[func] = f"Function {func} - purpose analysis unavailable"
 
+SYMBOL_BATCH_HEADER = """
+Describe the purpose of every function and class listed below, based on its
+name, its file and typical usage patterns in its language.
+Respond with JSON only, using exactly this schema:
+{"files": {"<file path>": {"functions": {"<name>": "<one-sentence description>"},
+                           "classes": {"<name>": "<one-sentence description>"}}}}
+
+"""
+
+def _symbol_block(file_path: str, lang_name: str, functions: list, classes: list) -> str:
+    """Render one file's symbols as a section of a batched prompt."""
+    block = f"File: {file_path}\nLanguage: {lang_name}\n"
+    if functions:
+        block += f"Functions: {', '.join(functions)}\n"
+    if classes:
+        block += f"Classes: {', '.join(classes)}\n"
+    return block + "\n"
+
+def _symbol_blocks(file_path: str, data: dict, lang_name: str, token_budget: int) -> list:
+    """Split a file's symbols into prompt blocks that each fit within the token budget."""
+    symbols = [('functions', name) for name in dict.fromkeys(data['functions'])]
+    symbols += [('classes', name) for name in dict.fromkeys(data['classes'])]
+    budget = max(1, token_budget - estimate_tokens(SYMBOL_BATCH_HEADER))
+
+    blocks = []
+    current = {'functions': [], 'classes': []}
+    for kind, name in symbols:
+        current[kind].append(name)
+        text = _symbol_block(file_path, lang_name, current['functions'], current['classes'])
+        if estimate_tokens(text) > budget and len(current['functions']) + len(current['classes']) > 1:
+            current[kind].pop()
+            blocks.append((file_path, current['functions'], current['classes'],
+                           _symbol_block(file_path, lang_name, current['functions'], current['classes'])))
+            current = {'functions': [], 'classes': []}
+            current[kind].append(name)
+    if current['functions'] or current['classes']:
+        blocks.append((file_path, current['functions'], current['classes'],
+                       _symbol_block(file_path, lang_name, current['functions'], current['classes'])))
+    return blocks
+
+def _pack_symbol_batches(blocks: list, token_budget: int) -> list:
+    """Greedily pack symbol blocks from one or more files into token-bounded batches."""
+    budget = token_budget - estimate_tokens(SYMBOL_BATCH_HEADER)
+    batches = []
+    current, used = [], 0
+    for block in blocks:
+        tokens = estimate_tokens(block[3])
+        if current and used + tokens > budget:
+            batches.append(current)
+            current, used = [], 0
+        current.append(block)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def _parse_symbol_batch(response: str) -> dict:
+    """Parse a batched symbol response, tolerating markdown code fences.
+
+    Raises ValueError unless the response has the {'files': {path: {'functions':
+    {...}, 'classes': {...}}}} shape, so a malformed reply fails only its batch.
+    """
+    text = response.strip()
+    if text.startswith('```'):
+        text = text.split('\n', 1)[1] if '\n' in text else ''
+        text = text.rsplit('```', 1)[0]
+    start, end = text.find('{'), text.rfind('}')
+    if start == -1 or end == -1:
+        raise ValueError("No JSON object in batched symbol response")
+    data = json.loads(text[start:end + 1])
+    files = data.get('files', {}) if isinstance(data, dict) else None
+    if not isinstance(files, dict):
+        raise ValueError("Batched symbol response has no 'files' object")
+    for described in files.values():
+        if not isinstance(described, dict) or not all(
+                isinstance(described.get(kind_key, {}), dict) for kind_key in ('functions', 'classes')):
+            raise ValueError("Malformed file entry in batched symbol response")
+    return files
+
+def analyze_code_with_ai(code_context: dict, gemini_connector: GeminiConnector,
+                         scheduler: Optional[RequestScheduler] = None,
+                         manifest: Optional[RepoManifest] = None,
+                         batch_symbols: Optional[bool] = None,
+                         batch_token_budget: Optional[int] = None,
+                         file_token_budget: Optional[int] = None,
+                         context_report: Optional[dict] = None,
+                         usage: Optional[dict] = None) -> dict:
+    """Use Gemini AI to analyze code and extract insights.
+
+    All file and function prompts are dispatched through a RequestScheduler so
+    they run concurrently within the configured rate limits. Files whose
+    content hash matches the manifest reuse their previous analysis.
+
+    In batch mode (the default, see GEMINI_BATCH_SYMBOLS) every function and
+    class is described through structured prompts packing the symbols of one
+    or more files up to `batch_token_budget` tokens, instead of one prompt per
+    function for the first five functions of each file.
+
+    Each file prompt carries up to `file_token_budget` tokens of source
+    (GEMINI_FILE_TOKEN_BUDGET), selected span by span; per-file context
+    stats are stored as 'context_stats' and, if given, in `context_report`.
+    The number of prompts sent and their estimated tokens are added to
+    `usage` ('prompts', 'prompt_tokens') if given.
+    """
+    if batch_symbols is None:
+        batch_symbols = os.getenv("GEMINI_BATCH_SYMBOLS", "1").lower() not in ("0", "false", "no")
+    if batch_token_budget is None:
+        batch_token_budget = int(os.getenv("GEMINI_BATCH_TOKEN_BUDGET", "2000"))
+    if file_token_budget is None:
+        file_token_budget = int(os.getenv("GEMINI_FILE_TOKEN_BUDGET", "800"))
+
+    owns_scheduler = scheduler is None
+    if scheduler is None:
+        scheduler = RequestScheduler.from_env(gemini_connector)
+
+    reused = {}
+    for file_path, data in code_context.items():
+        file_hash = data.get('content_hash')
+        cached = manifest.lookup(file_path, file_hash) if manifest and file_hash else None
+        if cached and 'ai_analysis' in cached:
+            reused[file_path] = cached
+
+    # Flatten every prompt up front so the scheduler can run them concurrently.
+    # Each job is (kind, target, prompt, temperature).
+    jobs = []
+    symbol_blocks = []
+    context_stats = {}
+    for file_path, data in code_context.items():
+        if file_path in reused:
+            continue
+        language = data.get('language', 'Unknown')
+        lang_name = LANGUAGE_NAMES.get(language, language)
+        prompt, context_stats[file_path] = _file_analysis_prompt(file_path, data, lang_name, file_token_budget)
+        jobs.append(('file', file_path, prompt, 0.3))
+        if batch_symbols:
+            symbol_blocks.extend(_symbol_blocks(file_path, data, lang_name, batch_token_budget))
+        else:
+            for func in data['functions'][:5]:  # Limit to first 5 functions
+                jobs.append(('function', (file_path, func), _function_prompt(func, lang_name), 0.2))
+
+    for batch in _pack_symbol_batches(symbol_blocks, batch_token_budget):
+        prompt = SYMBOL_BATCH_HEADER + ''.join(block[3] for block in batch)
+        jobs.append(('batch', batch, prompt, 0.2))
+
+    if usage is not None:
+        usage['prompts'] = usage.get('prompts', 0) + len(jobs)
+        usage['prompt_tokens'] = usage.get('prompt_tokens', 0) + sum(estimate_tokens(job[2]) for job in jobs)
+
+    def run(job):
+        kind, target, prompt, temperature = job
+        try:
+            response = scheduler.generate_text(prompt, temperature=temperature)
+            if kind == 'batch':
+                return _parse_symbol_batch(response), True
+            return response, True
+        except Exception as e:
+            if kind == 'file':
+                return f"AI analysis failed: {str(e)}", False
+            if kind == 'batch':
+                return {}, False
+            return f"Function {target[1]} - purpose analysis unavailable", False
+
+    try:
+        results = scheduler.map(run, jobs)
+    finally:
+        if owns_scheduler:
+            scheduler.shutdown()
+
+    analyses = {}
+    function_analyses = {file_path: {} for file_path in code_context}
+    class_analyses = {file_path: {} for file_path in code_context}
+    failed = set()
+    for (kind, target, _, _), (result, ok) in zip(jobs, results):
+        if kind == 'file':
+            analyses[target] = result
+            if not ok:
+                failed.add(target)
+        elif kind == 'function':
+            file_path, func = target
+            function_analyses[file_path][func] = result.strip()
+            if not ok:
+                failed.add(file_path)
+        else:
+            for file_path, functions, classes, _ in target:
+                described = result.get(file_path, {})
+                for kind_key, names, out in (('functions', functions, function_analyses),
+                                             ('classes', classes, class_analyses)):
+                    descriptions = described.get(kind_key, {})
+                    for name in names:
+                        if name in descriptions:
+                            out[file_path][name] = str(descriptions[name]).strip()
+                        else:
+                            failed.add(file_path)
+
+    enhanced_context = {}
+    for file_path, data in code_context.items():
+        if file_path in reused:
+            enhanced_context[file_path] = {
+                **data,
+                'ai_analysis': reused[file_path]['ai_analysis'],
+                'function_descriptions': reused[file_path].get('function_descriptions', {}),
+                'class_descriptions': reused[file_path].get('class_descriptions', {}),
+                'reused_analysis': True
+            }
+            continue
         enhanced_context[file_path] = {
             **data,
-            'ai_analysis': analysis,
-            'function_descriptions': function_analyses
+            'ai_analysis': analyses[file_path],
+            'function_descriptions': function_analyses[file_path],
+            'class_descriptions': class_analyses[file_path],
+            'context_stats': context_stats[file_path]
         }
+        if context_report is not None:
+            context_report[file_path] = context_stats[file_path]
+        # Only persist complete analyses so failed prompts are retried next run
+        if manifest and data.get('content_hash') and file_path not in failed:
+            manifest.record(file_path, data['content_hash'],
+                            ai_analysis=analyses[file_path],
+                            function_descriptions=function_analyses[file_path],
+                            class_descriptions=class_analyses[file_path])
 
     return enhanced_context
 
-def generate_markdown(code_graph: dict, repo_url: str, enhanced_context: dict = None) -> str:
-    """Generate comprehensive markdown documentation with AI insights."""
-    G = nx.node_link_graph(code_graph)
-    repo_name = repo_url.split('/')[-1]
+def _render_file_section(file_path: str, data: dict) -> str:
+    """Render the markdown section for one analyzed file."""
+    md = f"### 🔍 `{file_path}`\n\n"
+    md += f"**AI Analysis:** {data.get('ai_analysis', 'Analysis not available')}\n\n"
 
-    md = f"# 📚 {repo_name} - Codebase Documentation\n\n"
-    md += f"**Repository:** {repo_url}\n\n"
-    md += f"**Analysis Date:** Generated by Codebase Genius AI\n\n"
+    if data.get('classes'):
+        md += "**Classes:**\n"
+        for cls in data['classes']:
+            desc = data.get('class_descriptions', {}).get(cls)
+            md += f"- `{cls}`: {desc}\n" if desc else f"- `{cls}`\n"
+        md += "\n"
+
+    if data.get('functions'):
+        md += "**Functions:**\n"
+        for func in data['functions']:
+            desc = data.get('function_descriptions', {}).get(func, f"Function {func}")
+            md += f"- `{func}`: {desc}\n"
+        md += "\n"
+
+    if data.get('imports'):
+        md += "**Dependencies:**\n"
+        for imp in data['imports'][:10]:  # Limit to first 10 imports
+            md += f"- `{imp}`\n"
+        if len(data['imports']) > 10:
+            md += f"- ... and {len(data['imports']) - 10} more imports\n"
+        md += "\n"
+
+    return md
 
-    # Overview section
-    total_files = len([node for node, data in G.nodes(data=True) if data.get('type') == 'file'])
-    total_classes = len([node for node, data in G.nodes(data=True) if data.get('type') == 'class'])
-    total_functions = len([node for node, data in G.nodes(data=True) if data.get('type') == 'function'])
+def _file_sections(enhanced_context: dict, manifest: Optional[RepoManifest] = None) -> Iterator[Tuple[str, str]]:
+    """Yield (file_path, markdown section), reusing manifest sections for unchanged files."""
+    for file_path, data in enhanced_context.items():
+        cached = None
+        if manifest and data.get('reused_analysis'):
+            cached = manifest.lookup(file_path, data.get('content_hash'))
+        if cached and 'markdown' in cached:
+            yield file_path, cached['markdown']
+            continue
+        section = _render_file_section(file_path, data)
+        if manifest and data.get('content_hash'):
+            manifest.record(file_path, data['content_hash'], markdown=section)
+        yield file_path, section
+
+def _outline_section(file_path: str, data: dict, rank: int) -> str:
+    """Render a section for a file left out of a budgeted analysis, or never analyzed."""
+    if data.get('skip_analysis'):
+        reason = f"Not analyzed: detected as a {data['category']} file."
+    else:
+        reason = f"Not analyzed: the analysis budget ran out before this file (importance rank {rank})."
+    return _render_file_section(file_path, {**data, 'ai_analysis': reason})
+
+def iter_file_sections(code_context: dict, gemini_connector: GeminiConnector,
+                       scheduler: Optional[RequestScheduler] = None,
+                       manifest: Optional[RepoManifest] = None,
+                       chunk_size: Optional[int] = None,
+                       context_report: Optional[dict] = None,
+                       on_analyzed: Optional[Callable[[str, dict], None]] = None,
+                       budget: Optional[AnalysisBudget] = None) -> Iterator[Tuple[str, str]]:
+    """Analyze files in chunks and yield their rendered markdown sections.
+
+    Only one chunk of AI analyses and prompts is resident at a time; each
+    chunk is released once its sections have been yielded. Prompt context
+    stats of analyzed files are collected into `context_report` if given,
+    and `on_analyzed(file_path, enhanced_data)` sees every file's analysis
+    before its chunk is released.
+
+    With a limited `budget`, files are analyzed in code_context order (rank
+    them with importance.rank_files first) until the budget runs out. The
+    remaining files still get sections: analyses reusable from the manifest
+    are used as-is, the rest list their symbols without AI insights. Files
+    flagged 'skip_analysis' (generated code, see file_classifier) are always
+    listed that way, without prompts.
+    """
+    if chunk_size is None:
+        chunk_size = int(os.getenv("ANALYSIS_CHUNK_SIZE", "50"))
+    owns_scheduler = scheduler is None
+    if scheduler is None:
+        scheduler = RequestScheduler.from_env(gemini_connector)
+    if budget is not None and budget.limited:
+        # Smaller chunks let a budgeted run stop closer to its limit
+        chunk_size = min(chunk_size, max(4, 2 * scheduler.max_concurrency))
+        budget.start(len(code_context))
+    else:
+        budget = None
+
+    def analyze(chunk: dict) -> dict:
+        chunk = {file_path: data for file_path, data in chunk.items() if not data.get('skip_analysis')}
+        if not chunk:
+            return {}
+        started = time.monotonic()
+        usage = {}
+        enhanced = analyze_code_with_ai(chunk, gemini_connector, scheduler, manifest,
+                                        context_report=context_report, usage=usage)
+        if budget is not None and usage.get('prompts'):
+            budget.charge(len(chunk), time.monotonic() - started, usage['prompt_tokens'])
+        if on_analyzed:
+            for analyzed_path, analyzed in enhanced.items():
+                on_analyzed(analyzed_path, analyzed)
+        return enhanced
+
+    try:
+        items = iter(code_context.items())
+        rank = 0
+        while True:
+            size = chunk_size if budget is None else budget.file_allowance(chunk_size)
+            if size <= 0:
+                break
+            chunk = dict(itertools.islice(items, size))
+            if not chunk:
+                return
+            enhanced = analyze(chunk)
+            for file_path, data in chunk.items():
+                rank += 1
+                if file_path in enhanced:
+                    yield from _file_sections({file_path: enhanced[file_path]}, manifest)
+                else:
+                    yield file_path, _outline_section(file_path, data, rank)
+
+        # Budget spent: no new prompts from here on
+        while True:
+            chunk = dict(itertools.islice(items, chunk_size))
+            if not chunk:
+                return
+            reusable = {}
+            for file_path, data in chunk.items():
+                cached = manifest.lookup(file_path, data.get('content_hash')) if manifest else None
+                if cached and 'ai_analysis' in cached:
+                    reusable[file_path] = data
+            enhanced = analyze(reusable)
+            for file_path, data in chunk.items():
+                rank += 1
+                if file_path in enhanced:
+                    yield from _file_sections({file_path: enhanced[file_path]}, manifest)
+                else:
+                    if not data.get('skip_analysis'):
+                        budget.files_skipped += 1
+                    yield file_path, _outline_section(file_path, data, rank)
+    finally:
+        if owns_scheduler:
+            scheduler.shutdown()
+
+def _render_summaries(summaries: dict) -> str:
+    """Render the repository overview and top-level component summaries."""
+    md = ""
+    if summaries.get('repo'):
+        md += "## 🧭 Repository Summary\n\n" + summaries['repo'] + "\n\n"
+    components = {path: text for path, text in summaries.get('directories', {}).items() if '/' not in path}
+    if components:
+        md += "### 📦 Components\n\n"
+        for path in sorted(components):
+            md += f"- **`{path}/`**: {components[path]}\n"
+        md += "\n"
+    return md
+
+def _shard_file(package: str, used: set) -> str:
+    """Return an unused page file name for `package` and record it in `used`.
+
+    Names are compared case-insensitively. Sanitized names never start with
+    '_', so the root package's page cannot clash with any other; later
+    collisions get a numeric suffix.
+    """
+    stem = '_root' if package == ROOT_PACKAGE else (
+        re.sub(r'[^\w.-]+', '_', package.replace('/', '__')).strip('_') or 'package')
+    name, n = stem, 1
+    while name.lower() in used:
+        n += 1
+        name = f"{stem}-{n}"
+    used.add(name.lower())
+    return name + '.md'
+
+def _write_structure(out: TextIO, diagrams: DiagramBuilder, pages: dict, shard_dir: Optional[str]) -> None:
+    """Write the clustered overview diagram and the per-package drill-downs.
+
+    Sharded runs append a drill-down to every package page; otherwise the
+    DIAGRAM_MAX_PACKAGES heaviest packages the overview collapsed are inlined.
+    """
+    out.write("## 🏗️ Code Structure\n\n")
+    out.write(diagrams.overview())
+    if pages:
+        for package, page in pages.items():
+            with open(os.path.join(shard_dir, page['file']), 'a', encoding='utf-8') as f:
+                f.write(f"## 🏗️ Structure of `{package}`\n\n" + diagrams.package(package))
+        return
+    for package in diagrams.drill_down_packages()[:int(os.getenv("DIAGRAM_MAX_PACKAGES", "10"))]:
+        out.write(f"### 📦 `{package}`\n\n" + diagrams.package(package))
+
+def write_markdown(out: TextIO, code_graph, repo_url: str, enhanced_context: dict = None,
+                   manifest: Optional[RepoManifest] = None,
+                   file_sections: Optional[Iterable[Tuple[str, str]]] = None,
+                   summaries: Optional[Callable[[], dict]] = None,
+                   notice: Optional[Callable[[], Optional[str]]] = None,
+                   shard_dir: Optional[str] = None, shard_depth: int = 1) -> dict:
+    """Stream the documentation to the text file `out`.
+
+    File sections come from `enhanced_context` or, in streaming mode, from a
+    `file_sections` iterator such as iter_file_sections. `summaries` is
+    called once every section has been consumed and returns
+    {'repo': str, 'directories': {path: str}}, e.g. from
+    HierarchicalSummarizer.summarize. `notice` is called at the same point
+    and may return a note rendered above the overview, such as the coverage
+    of a budgeted run. `code_graph` is a SymbolTable or node-link data such
+    as build_graph returns.
+
+    Each section is written out as soon as it is produced. The overview
+    needs the final counts, so sections are spooled to a temporary file and
+    copied after the overview. With `shard_dir`, sections go instead to one
+    page per package (the first `shard_depth` directories of the path) in
+    that directory, and `out` becomes an index linking the pages, which
+    assumes `shard_dir` sits next to it.
+
+    Returns {'files': sections written, 'pages': {package: {'file', 'files'}}}.
+    """
+    table = code_graph if isinstance(code_graph, SymbolTable) else SymbolTable.from_node_link(code_graph)
+    repo_name = repo_url.split('/')[-1]
 
-    md += "## 📊 Overview\n\n"
-    md += f"- **Files Analyzed:** {len(enhanced_context) if enhanced_context else len(G.nodes)}\n"
-    md += f"- **Classes:** {total_classes}\n"
-    md += f"- **Functions:** {total_functions}\n"
-    md += f"- **Code Relationships:** {len(G.edges)}\n\n"
+    if file_sections is None and enhanced_context:
+        file_sections = _file_sections(enhanced_context, manifest)
 
     # File-by-file analysis
-    if enhanced_context:
-        md += "## 📁 File Analysis\n\n"
-        for file_path, data in enhanced_context.items():
-            md += f"### 🔍 `{file_path}`\n\n"
-            md += f"**AI Analysis:** {data.get('ai_analysis', 'Analysis not available')}\n\n"
-
-            if data.get('classes'):
-                md += "**Classes:**\n"
-                for cls in data['classes']:
-                    md += f"- `{cls}`\n"
-                md += "\n"
-
-            if data.get('functions'):
-                md += "**Functions:**\n"
-                for func in data['functions']:
-                    desc = data.get('function_descriptions', {}).get(func, f"Function {func}")
-                    md += f"- `{func}`: {desc}\n"
-                md += "\n"
-
-            if data.get('imports'):
-                md += "**Dependencies:**\n"
-                for imp in data['imports'][:10]:  # Limit to first 10 imports
-                    md += f"- `{imp}`\n"
-                if len(data['imports']) > 10:
-                    md += f"- ... and {len(data['imports']) - 10} more imports\n"
-                md += "\n"
-
-    # Code Structure Visualization
-    md += "## 🏗️ Code Structure\n\n"
-    md += "```mermaid\ngraph TD\n"
-
-    # Add nodes
-    for node, data in G.nodes(data=True):
-        if data.get('type') == 'class':
-            md += f"    {node.replace(':', '_').replace('/', '_')}([Class: {node.split(':')[-1]}])\n"
-        elif data.get('type') == 'function':
-            md += f"    {node.replace(':', '_').replace('/', '_')}{{Function: {node.split(':')[-1]}}}\n"
-
-    # Add edges
-    for edge in G.edges(data=True):
-        source = edge[0].replace(':', '_').replace('/', '_')
-        target = edge[1].replace(':', '_').replace('/', '_')
-        relation = edge[2].get('relation', 'relates_to')
-        md += f"    {source} -->|{relation}| {target}\n"
-
-    md += "```\n\n"
+    files_analyzed = 0
+    pages = {}
+    page_files = set()
+    spool = None if shard_dir else tempfile.SpooledTemporaryFile(
+        max_size=MARKDOWN_SPOOL_BYTES, mode='w+', encoding='utf-8')
+    try:
+        for file_path, section in file_sections or ():
+            files_analyzed += 1
+            if spool is not None:
+                spool.write(section)
+                continue
+            package = package_of(file_path, shard_depth)
+            page = pages.get(package)
+            if page is None:
+                page = pages[package] = {'file': _shard_file(package, page_files), 'files': 0}
+                with open(os.path.join(shard_dir, page['file']), 'w', encoding='utf-8') as f:
+                    f.write(f"# 📦 `{package}` - {repo_name}\n\n[← Back to the index](../{DOCS_FILE})\n\n")
+            with open(os.path.join(shard_dir, page['file']), 'a', encoding='utf-8') as f:
+                f.write(section)
+            page['files'] += 1
+
+        out.write(f"# 📚 {repo_name} - Codebase Documentation\n\n")
+        out.write(f"**Repository:** {repo_url}\n\n")
+        out.write(f"**Analysis Date:** Generated by Codebase Genius AI\n\n")
+
+        note = notice() if notice is not None else None
+        if note:
+            out.write(f"> **Note:** {note}\n\n")
+
+        # Overview section
+        out.write("## 📊 Overview\n\n")
+        out.write(f"- **Files Analyzed:** {files_analyzed if files_analyzed else table.node_count}\n")
+        out.write(f"- **Classes:** {table.count('class')}\n")
+        out.write(f"- **Functions:** {table.count('function')}\n")
+        out.write(f"- **Code Relationships:** {table.edge_count}\n\n")
+
+        if summaries is not None:
+            out.write(_render_summaries(summaries()))
+
+        if pages:
+            out.write("## 📁 File Analysis by Package\n\n")
+            links_dir = os.path.basename(os.path.normpath(shard_dir))
+            for package in sorted(pages):
+                page = pages[package]
+                out.write(f"- [`{package}`]({links_dir}/{page['file']}): {page['files']} files\n")
+            out.write("\n")
+        elif files_analyzed and spool is not None:
+            out.write("## 📁 File Analysis\n\n")
+            spool.seek(0)
+            shutil.copyfileobj(spool, out)
+    finally:
+        if spool is not None:
+            spool.close()
+
+    # Code Structure Visualization, clustered so its size is bounded
+    _write_structure(out, DiagramBuilder.from_env(table, shard_depth), pages, shard_dir)
 
     # Installation and Usage
-    md += "## 🚀 Installation & Usage\n\n"
-    md += "```bash\n"
-    md += f"# Clone the repository\n"
-    md += f"git clone {repo_url}\n\n"
-    md += f"# Install dependencies\n"
-    md += f"pip install -r requirements.txt\n\n"
-    md += f"# Run the application\n"
-    md += f"python main.py\n"
-    md += "```\n\n"
-
-    md += "## 🤖 Generated by Codebase Genius\n\n"
-    md += "*This documentation was automatically generated using AI-powered code analysis.*\n"
-
-    return md
+    out.write("## 🚀 Installation & Usage\n\n")
+    out.write("```bash\n")
+    out.write(f"# Clone the repository\n")
+    out.write(f"git clone {repo_url}\n\n")
+    out.write(f"# Install dependencies\n")
+    out.write(f"pip install -r requirements.txt\n\n")
+    out.write(f"# Run the application\n")
+    out.write(f"python main.py\n")
+    out.write("```\n\n")
+
+    out.write("## 🤖 Generated by Codebase Genius\n\n")
+    out.write("*This documentation was automatically generated using AI-powered code analysis.*\n")
+
+    return {'files': files_analyzed, 'pages': pages}
+
+def generate_markdown(code_graph, repo_url: str, enhanced_context: dict = None,
+                      manifest: Optional[RepoManifest] = None,
+                      file_sections: Optional[Iterable[Tuple[str, str]]] = None,
+                      summaries: Optional[Callable[[], dict]] = None,
+                      notice: Optional[Callable[[], Optional[str]]] = None) -> str:
+    """Generate comprehensive markdown documentation with AI insights.
+
+    Returns the document as one string; see write_markdown for the
+    arguments and for streaming large documents to disk instead.
+    """
+    out = io.StringIO()
+    write_markdown(out, code_graph, repo_url, enhanced_context, manifest,
+                   file_sections=file_sections, summaries=summaries, notice=notice)
+    return out.getvalue()
 
 def save_docs(docs: str, repo_url: str, output_dir: str = "../outputs") -> str:
     """Save documentation to file and return the file path."""
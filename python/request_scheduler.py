@@ -0,0 +1,176 @@
+"""
+Concurrent, rate-limited request scheduler for LLM connectors.
+
+Wraps any connector exposing ``generate_text(prompt, temperature)`` (and
+optionally batched embeddings) and runs requests on a thread pool, gated by
+token buckets for requests/min and tokens/min, retrying 429/5xx failures
+with jittered exponential backoff.
+"""
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Return True if the error is a rate limit or transient server error."""
+    status_code = getattr(error, 'status_code', None)
+    if status_code is None:
+        status_code = getattr(error, 'code', None)
+    return isinstance(status_code, int) and status_code in RETRYABLE_STATUS_CODES
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at a per-minute rate."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0) -> None:
+        """Block until `amount` tokens are available, then consume them."""
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            self._sleep(wait)
+
+
+class RequestScheduler:
+    """Run connector requests concurrently under rate limits with retries."""
+
+    def __init__(self, connector: Any, max_concurrency: int = 4,
+                 requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 30.0,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.connector = connector
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._request_bucket = TokenBucket(requests_per_minute, sleep=sleep) if requests_per_minute else None
+        self._token_bucket = TokenBucket(tokens_per_minute, sleep=sleep) if tokens_per_minute else None
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                            thread_name_prefix="llm-request")
+        self._stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0, 'cache_hits': 0}
+
+    @classmethod
+    def from_env(cls, connector: Any) -> "RequestScheduler":
+        """Build a scheduler configured from GEMINI_* environment variables."""
+        rpm = os.getenv("GEMINI_REQUESTS_PER_MINUTE")
+        tpm = os.getenv("GEMINI_TOKENS_PER_MINUTE")
+        return cls(
+            connector,
+            max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")),
+            requests_per_minute=float(rpm) if rpm else None,
+            tokens_per_minute=float(tpm) if tpm else None,
+            max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "5")),
+        )
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after:
+            return float(retry_after)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def generate_text(self, prompt: str, temperature: float = 0.7) -> str:
+        """Rate-limited, retried equivalent of `connector.generate_text`.
+
+        Connectors exposing `cached_text` are checked first so cache hits do
+        not consume rate-limit budget.
+        """
+        cached_text = getattr(self.connector, 'cached_text', None)
+        if cached_text is not None:
+            cached = cached_text(prompt, temperature)
+            if cached is not None:
+                self._count('cache_hits')
+                return cached
+
+        def call():
+            if cached_text is not None:
+                return self.connector.generate_text(prompt, temperature, check_cache=False)
+            return self.connector.generate_text(prompt, temperature)
+
+        return self._call(call, estimate_tokens(prompt))
+
+    def generate_embeddings(self, texts: List[str],
+                            task_type: str = "retrieval_document") -> List[List[float]]:
+        """Rate-limited, retried batch embedding of `texts` as one request.
+
+        Connectors without `generate_embeddings_batch` embed text by text.
+        """
+        batch = getattr(self.connector, 'generate_embeddings_batch', None)
+
+        def call():
+            if batch is not None:
+                return batch(texts, task_type)
+            return [self.connector.generate_embeddings(text) for text in texts]
+
+        return self._call(call, sum(estimate_tokens(text) for text in texts))
+
+    def _call(self, fn: Callable, tokens: int):
+        """Run one connector request under the rate limits, retrying transient failures."""
+        attempt = 0
+        while True:
+            if self._request_bucket:
+                self._request_bucket.acquire(1)
+            if self._token_bucket:
+                self._token_bucket.acquire(tokens)
+            self._count('requests')
+            try:
+                with self._slots:
+                    return fn()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    self._count('failures')
+                    raise
+                self._count('retries')
+                self._sleep(self._backoff(attempt, e))
+                attempt += 1
+
+    def submit(self, fn: Callable, *args, **kwargs):
+        """Submit a callable to the scheduler's worker pool."""
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def map(self, fn: Callable, items: Iterable) -> List:
+        """Apply `fn` to every item concurrently, returning results in order."""
+        futures = [self._executor.submit(fn, item) for item in items]
+        return [future.result() for future in futures]
+
+    def shutdown(self) -> None:
+        """Stop the worker pool after pending requests finish."""
+        self._executor.shutdown(wait=True)
@@ -35,7 +35,8 @@ try:
         print(json.dumps(error_response))
         sys.exit(1)
     
-    result = orchestrate_documentation(repo_url)
+    # Docs are written under outputs/<repo>/; --include-docs also embeds them in the JSON
+    result = orchestrate_documentation(repo_url, include_docs='--include-docs' in sys.argv[2:])
     print(json.dumps(result))
     sys.exit(0)
     
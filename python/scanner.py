@@ -0,0 +1,259 @@
+"""
+Single filesystem scan of a repository checkout.
+
+The file tree and the parser used to walk the clone separately, and the
+parser's walk had no excludes, so it descended into node_modules, virtual
+environments and build output. RepoScanner walks the checkout once with
+os.scandir, skipping excluded names, .gitignore'd paths and symlinks (unless
+enabled, and then only those pointing inside the checkout), and records each
+file's size and mtime. The resulting RepoScan provides both the tree written
+to tree.json and the file list the parser reads.
+"""
+
+import os
+import re
+from collections import Counter
+from typing import FrozenSet, Iterable, List, Optional, Tuple
+
+DEFAULT_EXCLUDES = frozenset({
+    '.git', 'node_modules', '__pycache__', '.env', 'venv', '.venv', '.vscode', '.idea', 'dist', 'build',
+})
+
+GITIGNORE_FILE = '.gitignore'
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """Translate a gitignore glob to a regex over '/'-separated relative paths."""
+    out, i, n = [], 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        if char == '*':
+            if pattern.startswith('**', i) and (i == 0 or pattern[i - 1] == '/'):
+                if i + 2 == n:
+                    # "dir/**": everything inside
+                    out.append('.*')
+                    i += 2
+                    continue
+                if pattern[i + 2] == '/':
+                    # "**/": any number of leading directories
+                    out.append('(?:.*/)?')
+                    i += 3
+                    continue
+            out.append('[^/]*')
+        elif char == '?':
+            out.append('[^/]')
+        elif char == '[':
+            # A ']' right after '[' (or '[!') is part of the set
+            close = pattern.find(']', i + (3 if pattern.startswith('[!', i) else 2))
+            if close < 0:
+                out.append(re.escape(char))
+            else:
+                body = pattern[i + 1:close]
+                out.append('[' + ('^' + body[1:] if body.startswith('!') else body) + ']')
+                i = close
+        elif char == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(char))
+        i += 1
+    return ''.join(out)
+
+
+class IgnoreRules:
+    """The patterns of one .gitignore, matched against paths relative to its directory."""
+
+    __slots__ = ('base', 'rules', '_any_file', '_any_dir')
+
+    def __init__(self, base: str, lines: Iterable[str]):
+        self.base = base
+        # (compiled pattern, negated, directories only)
+        self.rules: List[Tuple[re.Pattern, bool, bool]] = []
+        for line in lines:
+            line = line.rstrip('\n\r')
+            if not line.endswith('\\ '):
+                line = line.rstrip(' \t')
+            if not line or line.startswith('#'):
+                continue
+            negated = line.startswith('!')
+            if negated or line.startswith(('\\!', '\\#')):
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            # A slash other than a trailing one anchors the pattern to this directory
+            anchored = '/' in line
+            regex = _glob_to_regex(line.lstrip('/'))
+            try:
+                compiled = re.compile(regex if anchored else '(?:.*/)?' + regex)
+            except re.error:
+                continue
+            self.rules.append((compiled, negated, dir_only))
+        # Without negations the last match is irrelevant, so one alternation decides
+        self._any_file = self._any_dir = None
+        if not any(negated for _, negated, _ in self.rules):
+            self._any_dir = self._alternation(self.rules)
+            self._any_file = self._alternation([rule for rule in self.rules if not rule[2]])
+
+    @staticmethod
+    def _alternation(rules: list) -> Optional[re.Pattern]:
+        return re.compile('|'.join(f'(?:{rule[0].pattern})' for rule in rules)) if rules else None
+
+    @classmethod
+    def read(cls, base: str, path: str) -> "IgnoreRules":
+        try:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                return cls(base, f)
+        except OSError:
+            return cls(base, ())
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """Return True if `rel_path` is ignored, False if re-included, None if no rule applies."""
+        if self._any_dir is not None or not self.rules:
+            combined = self._any_dir if is_dir else self._any_file
+            return True if combined is not None and combined.fullmatch(rel_path) else None
+        for compiled, negated, dir_only in reversed(self.rules):
+            if (is_dir or not dir_only) and compiled.fullmatch(rel_path):
+                return not negated
+        return None
+
+
+def _ignored(rule_sets: Tuple[IgnoreRules, ...], rel_path: str, is_dir: bool) -> bool:
+    # The deepest .gitignore with a matching rule decides
+    for rules in reversed(rule_sets):
+        decision = rules.match(rel_path[len(rules.base) + 1:] if rules.base else rel_path, is_dir)
+        if decision is not None:
+            return decision
+    return False
+
+
+class ScanEntry:
+    """A scanned file: absolute path, path relative to the checkout, size and mtime."""
+
+    __slots__ = ('path', 'rel_path', 'size', 'mtime')
+
+    def __init__(self, path: str, rel_path: str, size: int, mtime: float):
+        self.path = path
+        self.rel_path = rel_path
+        self.size = size
+        self.mtime = mtime
+
+
+class RepoScan:
+    """The result of one scan.
+
+    `tree` maps each directory (relative, '' for the root) to the names of
+    its files, in walk order; `files` lists the files within the size cap;
+    `skipped` counts what was left out and why.
+    """
+
+    def __init__(self):
+        self.tree = {}
+        self.files: List[ScanEntry] = []
+        self.skipped = Counter()
+
+    def stats(self) -> dict:
+        return {
+            'directories': len(self.tree),
+            'files': len(self.files),
+            'bytes': sum(entry.size for entry in self.files),
+            'skipped': dict(self.skipped),
+        }
+
+
+class RepoScanner:
+    """One os.scandir pass over a checkout honoring excludes, .gitignore, size caps and symlinks."""
+
+    def __init__(self, excludes: Iterable[str] = DEFAULT_EXCLUDES, max_file_bytes: Optional[int] = None,
+                 gitignore: bool = True, follow_symlinks: bool = False):
+        self.excludes: FrozenSet[str] = frozenset(excludes)
+        self.max_file_bytes = max_file_bytes
+        self.gitignore = gitignore
+        self.follow_symlinks = follow_symlinks
+
+    @classmethod
+    def from_env(cls) -> "RepoScanner":
+        """Build a scanner from SCAN_* environment variables.
+
+        SCAN_EXCLUDE names are skipped in addition to DEFAULT_EXCLUDES.
+        """
+        extra = [name.strip() for name in os.getenv("SCAN_EXCLUDE", "").split(',') if name.strip()]
+        max_kb = os.getenv("SCAN_MAX_FILE_KB", "1024")
+        return cls(
+            excludes=DEFAULT_EXCLUDES | set(extra),
+            max_file_bytes=int(max_kb) * 1024 if max_kb else None,
+            gitignore=os.getenv("SCAN_GITIGNORE", "1").lower() not in ("0", "false", "no"),
+            follow_symlinks=os.getenv("SCAN_FOLLOW_SYMLINKS", "0").lower() in ("1", "true", "yes"),
+        )
+
+    def scan(self, repo_path: str) -> RepoScan:
+        """Walk `repo_path` depth-first in name order and return the RepoScan.
+
+        Excluded names and ignored paths are pruned without descending into
+        them. Files over the size cap are listed in the tree but not handed
+        to the parser. Symlinks are skipped unless follow_symlinks is set,
+        and even then only followed to targets inside the checkout, visiting
+        each directory once.
+        """
+        result = RepoScan()
+        root = os.path.abspath(repo_path)
+        real_root = os.path.realpath(root)
+        visited = {os.stat(root).st_ino}
+        # (directory path, relative path with '/' separators, active .gitignore rules)
+        stack = [(root, '', ())]
+        while stack:
+            path, rel_dir, rule_sets = stack.pop()
+            try:
+                with os.scandir(path) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError:
+                result.skipped['unreadable'] += 1
+                continue
+            if self.gitignore and any(entry.name == GITIGNORE_FILE for entry in entries):
+                rule_sets += (IgnoreRules.read(rel_dir, os.path.join(path, GITIGNORE_FILE)),)
+
+            names, subdirs = [], []
+            for entry in entries:
+                name = entry.name
+                if name in self.excludes:
+                    result.skipped['excluded'] += 1
+                    continue
+                rel_path = f"{rel_dir}/{name}" if rel_dir else name
+                try:
+                    is_link = entry.is_symlink()
+                    if is_link and not (self.follow_symlinks and _inside(os.path.realpath(entry.path), real_root)):
+                        result.skipped['symlink'] += 1
+                        continue
+                    is_dir = entry.is_dir()
+                    if rule_sets and _ignored(rule_sets, rel_path, is_dir):
+                        result.skipped['gitignored'] += 1
+                        continue
+                    if is_dir:
+                        inode = entry.stat().st_ino if is_link else entry.inode()
+                        if inode in visited:
+                            result.skipped['symlink'] += 1
+                            continue
+                        visited.add(inode)
+                        subdirs.append((entry.path, rel_path, rule_sets))
+                        continue
+                    if not entry.is_file():
+                        result.skipped['special'] += 1
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    result.skipped['unreadable'] += 1
+                    continue
+                names.append(name)
+                if self.max_file_bytes is not None and stat.st_size > self.max_file_bytes:
+                    result.skipped['too_large'] += 1
+                    continue
+                result.files.append(ScanEntry(entry.path, rel_path if os.sep == '/' else rel_path.replace('/', os.sep),
+                                              stat.st_size, stat.st_mtime))
+            result.tree[rel_dir if os.sep == '/' else rel_dir.replace('/', os.sep)] = names
+            stack.extend(reversed(subdirs))
+        return result
+
+
+def _inside(path: str, root: str) -> bool:
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
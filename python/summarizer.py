@@ -0,0 +1,176 @@
+"""
+Hierarchical map-reduce summaries: files -> directories -> repository.
+
+File analyses are the map step. Each directory is then summarized from the
+summaries of its files and subdirectories, deepest level first, with every
+directory of a level reduced concurrently through the RequestScheduler. The
+root is reduced into the repository overview. Children that do not fit one
+prompt's token budget are reduced in groups first, so prompt size stays
+bounded however large the repository is.
+
+Directory summaries are recorded in the manifest keyed by a hash of their
+inputs, so incremental runs only re-reduce the branches whose files changed.
+"""
+
+import posixpath
+import sys
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from manifest import RepoManifest, content_hash
+from request_scheduler import RequestScheduler, estimate_tokens
+
+# Longest excerpt of a child summary included in a parent prompt
+CHILD_SUMMARY_CHARS = 600
+
+DIRECTORY_PROMPT = """Summarize the purpose of the directory `{path}` in the repository {repo}
+from the summaries of its contents below. Reply in 2-4 sentences describing its
+responsibility and how its parts fit together.
+
+{children}"""
+
+REPOSITORY_PROMPT = """Write an overview of the repository {repo} from the summaries of its
+top-level components below: one paragraph on what the project does, then up to
+five bullet points on its main components and how they interact.
+
+{children}"""
+
+GROUP_PROMPT = """Summarize in 2-3 sentences what the following parts of `{path}` in the
+repository {repo} do together.
+
+{children}"""
+
+FAILED_PREFIX = "AI analysis failed"
+
+
+def _excerpt(text: str) -> str:
+    text = ' '.join(text.split())
+    return text if len(text) <= CHILD_SUMMARY_CHARS else text[:CHILD_SUMMARY_CHARS].rsplit(' ', 1)[0] + '...'
+
+
+class HierarchicalSummarizer:
+    """Reduce per-file analyses into directory and repository summaries."""
+
+    def __init__(self, scheduler: RequestScheduler, repo_name: str,
+                 manifest: Optional[RepoManifest] = None, token_budget: int = 3000):
+        self.scheduler = scheduler
+        self.repo_name = repo_name
+        self.manifest = manifest
+        self.token_budget = token_budget
+        self.file_summaries: Dict[str, str] = {}
+        self.stats = {'prompts': 0, 'reused': 0, 'passthrough': 0, 'failed': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def add_file(self, file_path: str, analysis: str) -> None:
+        """Record a file's analysis as its leaf summary."""
+        if analysis and not analysis.startswith(FAILED_PREFIX):
+            self.file_summaries[file_path.replace('\\', '/')] = _excerpt(analysis)
+
+    def add_analyses(self, analyses: Dict[str, str]) -> None:
+        """Record several {file_path: analysis} leaf summaries at once."""
+        for file_path, analysis in analyses.items():
+            self.add_file(file_path, analysis)
+
+    def _children(self) -> Dict[str, List[str]]:
+        """Map every directory ('' for the root) to its sorted child paths."""
+        children = defaultdict(set)
+        for path in self.file_summaries:
+            child = path
+            while child:
+                parent = posixpath.dirname(child)
+                seen = child in children[parent]
+                children[parent].add(child)
+                if seen:
+                    break
+                child = parent
+        return {path: sorted(names) for path, names in children.items()}
+
+    def _generate(self, prompt: str) -> Optional[str]:
+        self._count('prompts')
+        try:
+            return self.scheduler.generate_text(prompt, temperature=0.3).strip()
+        except Exception as e:
+            print(f"Summary failed: {e}", file=sys.stderr)
+            self._count('failed')
+            return None
+
+    def _reduce(self, path: str, items: List[Tuple[str, str]]) -> Optional[str]:
+        """Summarize (name, summary) items for `path`, grouping when they exceed the budget.
+
+        A group holds at least two items even if that overruns the budget, so
+        every level of grouping halves the items and the recursion ends.
+        """
+        template = REPOSITORY_PROMPT if path == '' else DIRECTORY_PROMPT
+        lines = [f"- `{name}`: {summary}" for name, summary in items]
+        overhead = estimate_tokens(template)
+        groups, current, used = [], [], overhead
+        for line in lines:
+            tokens = estimate_tokens(line) + 1
+            if len(current) > 1 and used + tokens > self.token_budget:
+                groups.append(current)
+                current, used = [], overhead
+            current.append(line)
+            used += tokens
+        groups.append(current)
+
+        if len(groups) > 1:
+            group_summaries = []
+            for i, group in enumerate(groups, 1):
+                summary = self._generate(GROUP_PROMPT.format(path=path or '/', repo=self.repo_name,
+                                                             children='\n'.join(group)))
+                if summary is None:
+                    return None
+                group_summaries.append((f"part {i}", _excerpt(summary)))
+            return self._reduce(path, group_summaries)
+        return self._generate(template.format(path=path, repo=self.repo_name, children='\n'.join(lines)))
+
+    def _summarize_directory(self, path: str, items: List[Tuple[str, str]]) -> Optional[str]:
+        input_hash = content_hash('\n'.join(f"{name}\t{summary}" for name, summary in items))
+        cached = self.manifest.summaries.get(path) if self.manifest else None
+        if cached and cached.get('input') == input_hash:
+            self._count('reused')
+            return cached['summary']
+        summary = self._reduce(path, items)
+        if summary is not None and self.manifest:
+            self.manifest.summaries[path] = {'input': input_hash, 'summary': summary}
+        return summary
+
+    def summarize(self) -> dict:
+        """Run the reduce levels and return {'repo': str or None, 'directories': {path: summary}}."""
+        children = self._children()
+        summaries = dict(self.file_summaries)
+        directories = {}
+        by_depth = defaultdict(list)
+        for path in children:
+            by_depth[path.count('/') + 1 if path else 0].append(path)
+
+        for depth in sorted(by_depth, reverse=True):
+            jobs = []
+            for path in by_depth[depth]:
+                items = [(posixpath.basename(child) + ('/' if child in children else ''), summaries[child])
+                         for child in children[path] if child in summaries]
+                if not items:
+                    continue
+                if path and len(children[path]) == 1 and children[path][0] in children:
+                    # A directory holding a single subdirectory adds nothing to summarize
+                    summaries[path] = items[0][1]
+                    self._count('passthrough')
+                    continue
+                jobs.append((path, items))
+
+            results = self.scheduler.map(lambda job: self._summarize_directory(*job), jobs)
+            for (path, _), summary in zip(jobs, results):
+                if summary is not None:
+                    summaries[path] = _excerpt(summary) if path else summary
+                    directories[path] = summary
+
+        if self.manifest:
+            live = set(directories)
+            for path in [path for path in self.manifest.summaries if path not in live]:
+                del self.manifest.summaries[path]
+        return {'repo': directories.pop('', None), 'directories': directories}
@@ -0,0 +1,220 @@
+"""
+Interned, array-backed symbol table for the code graph.
+
+The graph used to be a networkx DiGraph keyed by "file:name" strings and
+round-tripped through node_link_data, costing several dicts and strings per
+symbol. Here every file path, symbol name and relation is interned once in a
+StringPool, and nodes and edges are stored as parallel integer columns
+(`array`), so a node costs a few bytes plus its share of the pool. Labels
+such as "pkg/mod.py:Widget" are only formed when a node is rendered.
+
+to_node_link()/write_json() emit the same node-link layout networkx
+produced, so graph.json and callers expecting a dict are unchanged.
+"""
+
+import json
+from array import array
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Node kinds, stored as their index
+KINDS = ('file', 'class', 'function')
+FILE, CLASS, FUNCTION = range(len(KINDS))
+FILE_PREFIX = 'file:'
+
+
+class StringPool:
+    """Intern strings as dense integer ids."""
+
+    __slots__ = ('_ids', 'strings')
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def intern(self, value: str) -> int:
+        string_id = self._ids.get(value)
+        if string_id is None:
+            string_id = self._ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+    def get(self, value: str) -> Optional[int]:
+        """Return the id of `value` without interning it, or None."""
+        return self._ids.get(value)
+
+    def __getitem__(self, string_id: int) -> str:
+        return self.strings[string_id]
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+
+class SymbolTable:
+    """Files, classes and functions plus the relations between them, in columnar arrays.
+
+    Node ids are dense and follow insertion order. Adding a node that
+    already exists returns its id (a symbol re-added with another kind takes
+    the new kind, as a DiGraph would); an edge repeating the source, target
+    and relation of an earlier one is dropped when the edges are first read.
+    One pair may carry several relations (an outer function both contains
+    and calls a nested one), so the node-link data is a multigraph.
+    """
+
+    def __init__(self):
+        self.pool = StringPool()
+        self.node_kind = array('B')
+        self.node_file = array('i')  # Pool id of the file path
+        self.node_name = array('i')  # Pool id of the symbol name (the path for file nodes)
+        self.edge_source = array('i')
+        self.edge_target = array('i')
+        self.edge_relation = array('i')  # Pool id of the relation
+        # (file id << 32 | name id) for symbols, -(file id + 1) for files
+        self._index: Dict[int, int] = {}
+        self._edges_dirty = False
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_kind)
+
+    @property
+    def edge_count(self) -> int:
+        self._sort_edges()
+        return len(self.edge_source)
+
+    def _add_node(self, key: int, kind: int, file_id: int, name_id: int) -> int:
+        node_id = self._index.get(key)
+        if node_id is None:
+            node_id = self._index[key] = len(self.node_kind)
+            self.node_kind.append(kind)
+            self.node_file.append(file_id)
+            self.node_name.append(name_id)
+        else:
+            self.node_kind[node_id] = kind
+        return node_id
+
+    def add_file(self, path: str) -> int:
+        """Return the node id of the file `path`, adding it if needed."""
+        file_id = self.pool.intern(path)
+        return self._add_node(-(file_id + 1), FILE, file_id, file_id)
+
+    def add_symbol(self, path: str, name: str, kind: str) -> int:
+        """Add (or retype) the `kind` symbol `name` defined in `path` and return its node id."""
+        file_id = self.pool.intern(path)
+        name_id = self.pool.intern(name)
+        return self._add_node(file_id << 32 | name_id, KINDS.index(kind), file_id, name_id)
+
+    def find(self, path: str, name: str) -> Optional[int]:
+        """Return the node id of symbol `name` in `path`, or None; adds nothing."""
+        file_id, name_id = self.pool.get(path), self.pool.get(name)
+        if file_id is None or name_id is None:
+            return None
+        return self._index.get(file_id << 32 | name_id)
+
+    def add_edge(self, source: int, target: int, relation: str) -> None:
+        self._edges_dirty = True
+        self.edge_source.append(source)
+        self.edge_target.append(target)
+        self.edge_relation.append(self.pool.intern(relation))
+
+    def add_fragment(self, path: str, fragment: dict) -> None:
+        """Add a file-local {'nodes', 'edges'} fragment keyed by "path:name" labels."""
+        prefix = len(path) + 1
+        ids = {}
+        for label, attrs in fragment['nodes']:
+            ids[label] = self.add_symbol(path, label[prefix:], attrs['type'])
+        for source, target, attrs in fragment['edges']:
+            self.add_edge(ids[source], ids[target], attrs['relation'])
+
+    def _sort_edges(self) -> None:
+        """Group edges by source in node order, keeping one edge per (source, target, relation)."""
+        if not self._edges_dirty:
+            return
+        order = sorted(range(len(self.edge_source)), key=self.edge_source.__getitem__)
+        source, target, relation = array('i'), array('i'), array('i')
+        current, seen = None, set()
+        for i in order:
+            if self.edge_source[i] != current:
+                current, seen = self.edge_source[i], set()
+            edge = (self.edge_target[i], self.edge_relation[i])
+            if edge in seen:
+                continue
+            seen.add(edge)
+            source.append(self.edge_source[i])
+            target.append(self.edge_target[i])
+            relation.append(self.edge_relation[i])
+        self.edge_source, self.edge_target, self.edge_relation = source, target, relation
+        self._edges_dirty = False
+
+    def label(self, node_id: int) -> str:
+        """Return the node's graph label: "file:<path>" or "<path>:<name>"."""
+        path = self.pool[self.node_file[node_id]]
+        if self.node_kind[node_id] == FILE:
+            return FILE_PREFIX + path
+        return f"{path}:{self.pool[self.node_name[node_id]]}"
+
+    def kind(self, node_id: int) -> str:
+        return KINDS[self.node_kind[node_id]]
+
+    def name(self, node_id: int) -> str:
+        return self.pool[self.node_name[node_id]]
+
+    def path(self, node_id: int) -> str:
+        return self.pool[self.node_file[node_id]]
+
+    def count(self, kind: str) -> int:
+        return self.node_kind.count(KINDS.index(kind))
+
+    def edges(self) -> Iterator[Tuple[int, int, str]]:
+        """Yield (source id, target id, relation) grouped by source in node order."""
+        self._sort_edges()
+        pool = self.pool
+        for source, target, relation in zip(self.edge_source, self.edge_target, self.edge_relation):
+            yield source, target, pool[relation]
+
+    def import_in_degree(self) -> Counter:
+        """Count the distinct repository files importing each file."""
+        imports = self.pool.intern('imports')
+        self._sort_edges()
+        return Counter(self.path(target) for target, relation in zip(self.edge_target, self.edge_relation)
+                       if relation == imports)
+
+    def _node_record(self, node_id: int) -> dict:
+        if self.node_kind[node_id] == FILE:
+            return {'id': self.label(node_id)}
+        return {'type': self.kind(node_id), 'file': self.path(node_id), 'id': self.label(node_id)}
+
+    def to_node_link(self) -> dict:
+        """Return the graph as networkx node-link data."""
+        return {
+            'directed': True, 'multigraph': True, 'graph': {},
+            'nodes': [self._node_record(node_id) for node_id in range(self.node_count)],
+            'edges': [{'relation': relation, 'source': self.label(source), 'target': self.label(target)}
+                      for source, target, relation in self.edges()],
+        }
+
+    def write_json(self, f) -> None:
+        """Stream to_node_link() as JSON to `f` without building it in memory."""
+        f.write('{"directed": true, "multigraph": true, "graph": {}, "nodes": [')
+        for node_id in range(self.node_count):
+            f.write((', ' if node_id else '') + json.dumps(self._node_record(node_id)))
+        f.write('], "edges": [')
+        for i, (source, target, relation) in enumerate(self.edges()):
+            f.write((', ' if i else '') + json.dumps(
+                {'relation': relation, 'source': self.label(source), 'target': self.label(target)}))
+        f.write(']}')
+
+    @classmethod
+    def from_node_link(cls, data: dict) -> "SymbolTable":
+        """Load node-link data, e.g. a build_graph result or graph.json."""
+        table = cls()
+        ids = {}
+        for node in data.get('nodes', []):
+            label = node['id']
+            if node.get('type') in ('class', 'function') and 'file' in node:
+                ids[label] = table.add_symbol(node['file'], label[len(node['file']) + 1:], node['type'])
+            else:
+                ids[label] = table.add_file(label[len(FILE_PREFIX):] if label.startswith(FILE_PREFIX) else label)
+        for edge in data.get('links', data.get('edges', [])):
+            table.add_edge(ids[edge['source']], ids[edge['target']], edge.get('relation', 'relates_to'))
+        return table
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Persistent orchestrator worker for Codebase Genius.
+
+Keeps the Python pipeline imported and its connectors warm in one long-lived
+process, accepting jobs over a local HTTP socket instead of paying
+interpreter start, library imports and Gemini client setup per request.
+
+Usage:
+    python python/worker.py            # listens on WORKER_HOST:WORKER_PORT
+
+Endpoints:
+    GET  /health            -> {"status": "ok", "jobs_completed": N, ...}
+    POST /orchestrate       {"repo_url": "..."} -> orchestrate_documentation result
+    POST /jobs              {"repo_url": "...", "priority": "interactive"|"batch", "tenant": "..."}
+                            -> 202 {"job_id": "...", "status": "queued", ...}, or 429 when the queue is full
+    GET  /jobs/<id>         -> job status, stage and progress; ?result=1 adds the result
+    GET  /jobs/<id>/events  -> server-sent progress events until the job finishes
+    GET  /jobs/<id>/docs    -> the generated markdown, streamed from outputs/<repo>/docs.md
+    GET  /jobs/<id>/pages/<file>
+                            -> one per-package page of a sharded (DOCS_SHARDED) run
+    GET  /search?repo_url=...&q=...&k=10
+                            -> top-k files and symbols matching a natural-language query
+"""
+
+import json
+import os
+import shutil
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib import error, parse, request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+
+from embedding_index import META_FILE, EmbeddingIndex, index_dir_for, search_code
+from jobs import INTERACTIVE, JobManager, QueueFull
+from orchestrator import PipelineServices, orchestrate_documentation
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+def worker_url() -> str:
+    """Return the base URL clients use to reach the worker."""
+    return os.getenv("WORKER_URL", f"http://{DEFAULT_HOST}:{os.getenv('WORKER_PORT', DEFAULT_PORT)}")
+
+
+class OrchestratorWorker:
+    """Runs orchestration jobs against one shared set of warm services."""
+
+    def __init__(self, max_jobs: int = 2, max_queue: int = 100,
+                 max_pending_per_tenant: Optional[int] = None, services: PipelineServices = None):
+        self.services = services or PipelineServices()
+        self.started_at = time.time()
+        self.jobs = JobManager(self.run, max_workers=max_jobs, max_queue=max_queue,
+                               max_pending_per_tenant=max_pending_per_tenant)
+        # Loaded embedding indexes by directory, with the mtime they were loaded at
+        self._indexes = {}
+
+    @classmethod
+    def from_env(cls) -> "OrchestratorWorker":
+        """Build a worker sized by WORKER_* environment variables."""
+        per_tenant = os.getenv("WORKER_MAX_PENDING_PER_TENANT")
+        return cls(
+            max_jobs=int(os.getenv("WORKER_MAX_JOBS", "2")),
+            max_queue=int(os.getenv("WORKER_MAX_QUEUE", "100")),
+            max_pending_per_tenant=int(per_tenant) if per_tenant else None,
+        )
+
+    def run(self, repo_url: str, progress: Optional[Callable[..., None]] = None) -> dict:
+        """Run one documentation job on the calling thread."""
+        return orchestrate_documentation(repo_url, self.services, progress)
+
+    def run_queued(self, repo_url: str) -> dict:
+        """Queue an interactive job and wait for its result.
+
+        Returns an error status if the job was dropped from the history, or
+        finished without a result, before it could be collected.
+        """
+        job = self.jobs.submit(repo_url, INTERACTIVE)
+        finished = self.jobs.wait(job.id)
+        if finished is None:
+            return {"status": "error", "error": f"Job {job.id} is no longer tracked"}
+        if finished.result is None:
+            return {"status": "error", "error": finished.error or f"Job {job.id} finished without a result"}
+        return finished.result
+
+    def search(self, repo_url: str, query: str, k: int = 10, exact: bool = False) -> Optional[dict]:
+        """Search a repository's embedding index, keeping it loaded between queries.
+
+        Returns None when the repository has no index yet.
+        """
+        directory = index_dir_for(repo_url)
+        try:
+            mtime = os.path.getmtime(os.path.join(directory, META_FILE))
+        except FileNotFoundError:
+            return None
+        cached = self._indexes.get(directory)
+        if cached and cached[0] == mtime:
+            index = cached[1]
+        else:
+            index = EmbeddingIndex.load(directory)
+            self._indexes[directory] = (mtime, index)
+        return search_code(repo_url, query, self.services.scheduler, k, exact, index)
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "queue": self.jobs.queue_stats(),
+        }
+
+    def close(self) -> None:
+        self.jobs.shutdown()
+        self.services.close()
+
+
+class WorkerRequestHandler(BaseHTTPRequestHandler):
+    """JSON-over-HTTP front end for an OrchestratorWorker."""
+
+    worker: OrchestratorWorker = None
+
+    def _send_json(self, status: int, payload: dict, headers: Optional[dict] = None) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_found(self, message: str = None) -> None:
+        self._send_json(404, {"status": "error", "error": message or f"Unknown path {self.path}"})
+
+    def do_GET(self):
+        url = parse.urlsplit(self.path)
+        parts = url.path.strip('/').split('/')
+        if url.path == '/health':
+            self._send_json(200, self.worker.health())
+        elif url.path == '/search':
+            self._search(parse.parse_qs(url.query))
+        elif len(parts) in (2, 3, 4) and parts[0] == 'jobs':
+            job = self.worker.jobs.get(parts[1])
+            if job is None:
+                self._not_found(f"Unknown job {parts[1]}")
+            elif len(parts) == 2:
+                include_result = parse.parse_qs(url.query).get('result', ['0'])[0] not in ('0', 'false')
+                self._send_json(200, job.snapshot(include_result))
+            elif parts[2] == 'events':
+                self._stream_events(job.id)
+            elif parts[2] == 'docs' and len(parts) == 3:
+                self._stream_docs(job)
+            elif parts[2] == 'pages' and len(parts) == 4:
+                self._stream_page(job, parts[3])
+            else:
+                self._not_found()
+        else:
+            self._not_found()
+
+    def _search(self, query: dict) -> None:
+        repo_url, text = query.get('repo_url', [''])[0], query.get('q', [''])[0]
+        if not repo_url or not text:
+            self._send_json(400, {"status": "error", "error": "repo_url and q are required"})
+            return
+        try:
+            k = int(query.get('k', ['10'])[0])
+        except ValueError:
+            self._send_json(400, {"status": "error", "error": "k must be an integer"})
+            return
+        exact = query.get('exact', ['0'])[0] not in ('0', 'false')
+        result = self.worker.search(repo_url, text, k, exact)
+        if result is None:
+            self._not_found(f"No embedding index for {repo_url}; generate its documentation first")
+        else:
+            self._send_json(200 if result['status'] == 'success' else 502, result)
+
+    def _stream_events(self, job_id: str) -> None:
+        """Send job events as text/event-stream, resuming after Last-Event-ID."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        seen = int(self.headers.get('Last-Event-ID') or 0)
+        try:
+            while True:
+                events = self.worker.jobs.events_after(job_id, seen, timeout=15)
+                if not events:
+                    job = self.worker.jobs.get(job_id)
+                    if job is None or job.finished:
+                        return
+                    self.wfile.write(b': keep-alive\n\n')  # Comment line keeps proxies from timing out
+                for event in events:
+                    self.wfile.write(f"id: {event['seq']}\nevent: progress\ndata: {json.dumps(event)}\n\n".encode('utf-8'))
+                    seen = event['seq']
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, KeyError):
+            pass  # Client went away, or the job was dropped from history
+
+    def _send_markdown(self, path: str, etag: Optional[str] = None) -> None:
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/markdown; charset=utf-8')
+        self.send_header('Content-Length', str(os.path.getsize(path)))
+        if etag:
+            self.send_header('ETag', f'"{etag}"')
+        self.end_headers()
+        with open(path, 'rb') as f:
+            shutil.copyfileobj(f, self.wfile, 64 * 1024)
+
+    def _stream_docs(self, job) -> None:
+        """Send a finished job's docs.md in chunks without loading it whole."""
+        artifact = ((job.result or {}).get('artifacts') or {}).get('docs')
+        if artifact is None or not os.path.exists(artifact['path']):
+            self._not_found(f"Job {job.id} has no documentation (status: {job.status})")
+            return
+        self._send_markdown(artifact['path'], artifact['sha256'])
+
+    def _stream_page(self, job, name: str) -> None:
+        """Send one per-package page of a finished sharded job."""
+        pages = (((job.result or {}).get('artifacts') or {}).get('docs') or {}).get('pages')
+        name = parse.unquote(name)
+        path = os.path.join(pages['path'], name) if pages else None
+        # Page names are flat file names; anything else could escape the pages directory
+        if path is None or name != os.path.basename(name) or not name.endswith('.md') or not os.path.isfile(path):
+            self._not_found(f"Job {job.id} has no page {name}")
+            return
+        self._send_markdown(path)
+
+    def _read_job_request(self) -> Optional[dict]:
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError as e:
+            self._send_json(400, {"status": "error", "error": f"Invalid JSON body: {e}"})
+            return None
+        if not payload.get('repo_url'):
+            self._send_json(400, {"status": "error", "error": "repo_url is required"})
+            return None
+        return payload
+
+    def do_POST(self):
+        if self.path not in ('/orchestrate', '/jobs'):
+            self._not_found()
+            return
+        payload = self._read_job_request()
+        if payload is None:
+            return
+        try:
+            if self.path == '/orchestrate':
+                self._send_json(200, self.worker.run_queued(payload['repo_url']))
+            else:
+                job = self.worker.jobs.submit(payload['repo_url'], payload.get('priority', INTERACTIVE),
+                                              payload.get('tenant'))
+                self._send_json(202, job.snapshot())
+        except QueueFull as e:
+            self._send_json(429, {"status": "error", "error": str(e)},
+                            {'Retry-After': str(int(e.retry_after))})
+        except ValueError as e:
+            self._send_json(400, {"status": "error", "error": str(e)})
+
+    def log_message(self, format, *args):
+        print(f"worker: {format % args}", file=sys.stderr)
+
+
+def serve(host: Optional[str] = None, port: Optional[int] = None) -> None:
+    """Start the worker and serve until interrupted."""
+    host = host or os.getenv("WORKER_HOST", DEFAULT_HOST)
+    port = port or int(os.getenv("WORKER_PORT", DEFAULT_PORT))
+    worker = OrchestratorWorker.from_env()
+    handler = type('BoundWorkerRequestHandler', (WorkerRequestHandler,), {'worker': worker})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Orchestrator worker listening on http://{host}:{port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        worker.close()
+
+
+def request_documentation(repo_url: str, base_url: Optional[str] = None,
+                          timeout: Optional[float] = None) -> Optional[dict]:
+    """Submit a job to a running worker; returns None if no worker is reachable."""
+    body = json.dumps({"repo_url": repo_url}).encode('utf-8')
+    req = request.Request(f"{base_url or worker_url()}/orchestrate", data=body,
+                          headers={'Content-Type': 'application/json'})
+    try:
+        with request.urlopen(req, timeout=timeout) as response:
+            return json.loads(response.read())
+    except error.HTTPError as e:
+        return json.loads(e.read() or b'{}') or {"status": "error", "error": str(e)}
+    except (error.URLError, ConnectionError):
+        return None
+
+
+if __name__ == "__main__":
+    serve()